@@ -7,6 +7,92 @@ class Settings(BaseSettings):
     OPENAI_API_KEY: Optional[str] = None
     ANTHROPIC_API_KEY: Optional[str] = None
 
+    # LLM Provider HTTP Pool
+    LLM_HTTP_MAX_CONNECTIONS: int = 100  # concurrent sockets across all providers
+    LLM_HTTP_MAX_KEEPALIVE: int = 20  # idle connections kept open for reuse
+    LLM_HTTP_KEEPALIVE_EXPIRY: float = 120.0  # seconds an idle connection stays open
+    LLM_HTTP2: bool = False  # multiplex requests over HTTP/2 (requires the h2 package)
+    LLM_HTTP_CONNECT_TIMEOUT: float = 10.0
+    LLM_HTTP_READ_TIMEOUT: float = 600.0  # seconds between bytes; long generations stream slowly
+    LLM_HTTP_WRITE_TIMEOUT: float = 30.0
+    LLM_HTTP_POOL_TIMEOUT: float = 30.0  # seconds to wait for a free connection
+    LLM_HTTP_WARM_CONNECTIONS: int = 2  # connections opened per provider at startup (0 = off)
+
+    # LLM Request Scheduler
+    LLM_MAX_CONCURRENCY_PER_PROVIDER: int = 16  # in-flight requests per provider (0 = unlimited)
+    LLM_MAX_CONCURRENCY_PER_MODEL: int = 8  # in-flight requests per model (0 = unlimited)
+    LLM_REQUESTS_PER_MINUTE: int = 500  # per provider (0 = unlimited)
+    LLM_TOKENS_PER_MINUTE: int = 200000  # per provider, estimated prompt + max_tokens (0 = unlimited)
+    LLM_QUEUE_MAX_SIZE: int = 100  # waiting requests before new ones are rejected with 429
+    LLM_QUEUE_TIMEOUT: float = 60.0  # seconds a request may wait for a slot (0 = no limit)
+    # Per-provider / per-model overrides, e.g.
+    # {"openai": {"rpm": 3500, "tpm": 90000}, "anthropic:claude-3-opus-20240229": {"concurrency": 2}}
+    LLM_SCHEDULER_OVERRIDES: dict = {}
+
+    # LLM Retries, Hedging and Failover
+    LLM_RETRY_MAX_ATTEMPTS: int = 3  # attempts per provider/model before failing over
+    LLM_RETRY_BASE_DELAY: float = 0.5  # seconds; doubles each attempt with full jitter
+    LLM_RETRY_MAX_DELAY: float = 20.0  # cap on one backoff; a longer Retry-After fails over instead
+    LLM_ATTEMPT_TIMEOUT: float = 120.0  # seconds before a non-streaming attempt counts as stalled (0 = none)
+    LLM_FIRST_CHUNK_TIMEOUT: float = 30.0  # seconds to wait for a stream's first chunk (0 = none)
+    LLM_HEDGE_ENABLED: bool = False  # send one duplicate when an attempt runs past the latency percentile
+    LLM_HEDGE_PERCENTILE: float = 0.95
+    LLM_HEDGE_MIN_SAMPLES: int = 20  # latencies recorded for a model before it is hedged
+    LLM_HEDGE_MIN_DELAY: float = 1.0  # never hedge sooner than this many seconds
+    # Equivalent models tried in order when a target keeps failing, e.g.
+    # {"openai:gpt-4": ["anthropic:claude-3-opus-20240229"]}
+    LLM_FAILOVER: dict = {}
+
+    # LLM Streaming
+    LLM_STREAM_COALESCE_MS: float = 30.0  # merge deltas arriving within this window into one SSE frame (0 = only already-queued deltas)
+    LLM_STREAM_COALESCE_BYTES: int = 512  # flush a frame once this many characters are buffered (0 = no limit)
+    LLM_STREAM_BUFFER: int = 64  # deltas read ahead of a slow client before the provider read pauses
+    LLM_STREAM_STATS_EVENT: bool = True  # send an "event: stats" frame (TTFT, tokens/sec) before [DONE]
+
+    # LLM Batch Completions
+    LLM_BATCH_MAX_CONCURRENCY: int = 8  # default and upper bound on requests in flight per batch
+    LLM_BATCH_MAX_ITEMS: int = 1000  # requests accepted in one batch
+    LLM_BATCH_JOB_HISTORY: int = 50  # finished background batches kept for status polling
+
+    # LLM Response Cache
+    LLM_CACHE_ENABLED: bool = True  # cache deterministic completions unless a request opts out
+    LLM_CACHE_MAX_TEMPERATURE: float = 0.0  # by default only requests at or below this temperature are cached
+    LLM_CACHE_TTL: float = 86400.0  # default seconds a cached completion stays valid
+    LLM_CACHE_MAX_BYTES: int = 32 * 1024 * 1024  # memory budget for the in-process tier
+    LLM_CACHE_DB_PATH: Optional[str] = None  # SQLite file for the persistent tier (None = memory only)
+
+    # Prompt Caching and Conversation Compaction
+    LLM_PROMPT_CACHE_ENABLED: bool = True  # add Anthropic cache_control breakpoints on the system prompt and recent turns
+    LLM_PROMPT_CACHE_MIN_TOKENS: int = 1024  # shortest prefix worth marking (the provider minimum for most models)
+    LLM_COMPACTION_MODE: str = "off"  # default for requests: "off", "truncate" or "summarize"
+    LLM_CONTEXT_TOKEN_BUDGET: int = 8000  # conversation turns are compacted to fit this many tokens
+    LLM_COMPACTION_SUMMARY_MODEL: Optional[str] = None  # "provider:model" used for summaries (None = the request's model)
+    LLM_COMPACTION_SUMMARY_TOKENS: int = 512  # max_tokens of each summary
+
+    # Mock LLM Provider (provider="mock", for load testing the proxy offline)
+    LLM_MOCK_ENABLED: bool = False
+    LLM_MOCK_LATENCY_MS: float = 300.0  # median time to first token
+    LLM_MOCK_LATENCY_SIGMA: float = 0.5  # log-normal spread of the latency (0 = constant)
+    LLM_MOCK_TOKENS_PER_SECOND: float = 60.0  # output rate after the first token (0 = instant)
+    LLM_MOCK_OUTPUT_TOKENS: int = 200  # tokens per completion, capped by max_tokens
+    LLM_MOCK_FAILURE_RATE: float = 0.0  # fraction of requests failing before the first token
+    LLM_MOCK_FAILURE_STATUS: int = 503  # HTTP status of injected failures (429/5xx are retried)
+    LLM_MOCK_STREAM_ABORT_RATE: float = 0.0  # fraction of streams broken part way through
+    LLM_MOCK_SEED: Optional[int] = None  # fixed seed for reproducible runs
+
+    # Conversation Sessions
+    LLM_SESSION_MAX_SESSIONS: int = 1000  # sessions kept in memory (least recently used are evicted)
+    LLM_SESSION_TTL: float = 86400.0  # idle seconds before a session expires (0 = never)
+    LLM_SESSION_MAX_MESSAGES: int = 1000  # history length limit per session
+    LLM_SESSION_DB_PATH: Optional[str] = None  # SQLite file persisting sessions (None = memory only)
+
+    # LLM Usage Telemetry
+    LLM_TELEMETRY_DB_PATH: Optional[str] = None  # SQLite file receiving one row per call (None = memory only)
+    LLM_TELEMETRY_FLUSH_INTERVAL: float = 30.0  # seconds between writes of buffered call records
+    # USD per million (input, output) tokens, merged over the built-in prices, e.g.
+    # {"gpt-4o": [5.0, 15.0]}
+    LLM_PRICING: dict = {}
+
     # Server Configuration
     HOST: str = "0.0.0.0"
     PORT: int = 8000
@@ -35,6 +121,57 @@ class Settings(BaseSettings):
     MSSQL_PASSWORD: Optional[str] = None
     MSSQL_DRIVER: str = "{ODBC Driver 18 for SQL Server}"
 
+    # MSSQL Connection Pool
+    MSSQL_POOL_MIN_SIZE: int = 1
+    MSSQL_POOL_MAX_SIZE: int = 10
+    MSSQL_POOL_IDLE_TIMEOUT: float = 300.0  # seconds an idle connection is kept open
+    MSSQL_POOL_MAX_LIFETIME: float = 1800.0  # seconds before a connection is recycled
+    MSSQL_POOL_ACQUIRE_TIMEOUT: float = 30.0  # seconds to wait for a free connection
+    MSSQL_POOL_PRE_PING: bool = True  # validate connections with SELECT 1 on checkout
+
+    # MSSQL Query Execution
+    MSSQL_EXECUTOR_WORKERS: int = 10  # worker threads running blocking pyodbc calls
+    MSSQL_QUERY_TIMEOUT: float = 30.0  # default per-request timeout in seconds (0 = none)
+    MSSQL_FETCH_BATCH_SIZE: int = 1000  # rows per fetchmany() call when streaming
+    MSSQL_BATCH_CHUNK_SIZE: int = 1000  # parameter rows per executemany() call in batch writes
+    MSSQL_FAST_EXECUTEMANY: bool = True  # send parameter arrays in one round trip per chunk
+
+    # MSSQL Query Result Cache
+    MSSQL_QUERY_CACHE_ENABLED: bool = False  # cache SELECT results unless a request opts in/out
+    MSSQL_QUERY_CACHE_TTL: float = 60.0  # default seconds a cached result stays valid
+    MSSQL_QUERY_CACHE_MAX_BYTES: int = 64 * 1024 * 1024  # total memory budget for cached results
+    MSSQL_QUERY_CACHE_MAX_ENTRY_BYTES: int = 8 * 1024 * 1024  # larger results are never cached
+
+    # MSSQL Query Instrumentation
+    MSSQL_SLOW_QUERY_THRESHOLD: float = 1.0  # log queries slower than this many seconds (0 = off)
+    MSSQL_METRICS_WINDOW: int = 1000  # recent executions per fingerprint used for percentiles
+    MSSQL_METRICS_MAX_FINGERPRINTS: int = 500  # distinct query shapes tracked before LRU eviction
+
+    # MSSQL Schema Catalog
+    MSSQL_CATALOG_REFRESH_INTERVAL: float = 300.0  # seconds between background reloads (0 = on demand only)
+
+    # Bulk Export
+    EXPORT_DIR: str = "exports"  # directory for file exports
+    EXPORT_BATCH_SIZE: int = 50000  # rows per fetchmany() call when exporting
+    EXPORT_MAX_WORKERS: int = 2  # concurrent background export jobs
+    EXPORT_MAX_PARTITIONS: int = 8  # upper bound on parallel range-partitioned reads
+    EXPORT_JOB_HISTORY: int = 100  # finished jobs kept for status polling
+
+    # Streamlit Runner
+    STREAMLIT_PORT: int = 8501  # first port tried for app processes
+    STREAMLIT_STARTUP_TIMEOUT: float = 30.0  # seconds to wait for the app to answer its health check
+    STREAMLIT_STOP_TIMEOUT: float = 5.0  # seconds to wait after terminate before killing
+    STREAMLIT_PIP_TIMEOUT: float = 60.0  # seconds per pip install
+    STREAMLIT_WORK_DIR: str = "streamlit_apps"  # one subdirectory (app.py, streamlit.log) per app process
+    STREAMLIT_POOL_SIZE: int = 1  # pre-started idle workers handed to the next run (0 = cold start every run)
+    STREAMLIT_PRELOAD_MODULES: list = ["pandas", "numpy"]  # imported by workers before they are handed out
+    STREAMLIT_MAX_SESSIONS: int = 10  # apps running at once across all sessions
+    STREAMLIT_IDLE_TIMEOUT: float = 1800.0  # seconds without API calls before a session's app is stopped (0 = never; not the default session)
+    STREAMLIT_WHEEL_DIR: str = "wheelhouse"  # local wheel cache packages are installed from offline
+    STREAMLIT_INSTALL_FAILURE_TTL: float = 3600.0  # seconds before a failed package install is retried
+    STREAMLIT_IMPORT_DISTRIBUTIONS: dict = {}  # extra import name -> PyPI distribution mappings
+    STREAMLIT_IMPORT_CACHE_SIZE: int = 256  # app versions whose import analysis is remembered (by code hash)
+
     class Config:
         env_file = ".env.ai_studio"
         case_sensitive = True
@@ -1,13 +1,61 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.config import settings
 from app.routes import llm_routes, streamlit_routes, database_routes
+from app.services.database_service import database_service
+from app.services.export_service import export_service
+from app.services.llm_service import llm_service
+from app.services.llm_batch_service import llm_batch_service
+from app.services.llm_session_service import llm_session_service
+from app.services.streamlit_service import streamlit_service
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Startup: pre-open pooled database connections
+    try:
+        await asyncio.to_thread(database_service.warm_pool)
+    except Exception as e:
+        print(f"Warning: Failed to warm database connection pool: {e}")
+
+    # Open keep-alive connections to the LLM providers
+    try:
+        await llm_service.warm_connections()
+    except Exception as e:
+        print(f"Warning: Failed to warm LLM provider connections: {e}")
+
+    # Pre-start Streamlit workers so the first run is warm, and stop idle apps
+    streamlit_service.start_pool()
+    reaper_task = asyncio.create_task(streamlit_service.reap_periodically())
+
+    # Load the schema catalog and keep it fresh in the background
+    catalog_task = asyncio.create_task(database_service.refresh_catalog_periodically())
+
+    # Persist LLM usage records periodically
+    telemetry_task = asyncio.create_task(llm_service.telemetry.flush_periodically())
+
+    yield
+
+    # Shutdown: stop background work and release pooled resources
+    catalog_task.cancel()
+    telemetry_task.cancel()
+    reaper_task.cancel()
+    llm_batch_service.close()
+    llm_session_service.close()
+    export_service.close()
+    database_service.close()
+    await llm_service.close()
+    await streamlit_service.close()
+
 
 app = FastAPI(
     title=settings.APP_NAME,
     description="Backend API server for AI Studio - LLM API proxy",
     version="1.0.0",
-    debug=settings.DEBUG
+    debug=settings.DEBUG,
+    lifespan=lifespan
 )
 
 # Configure CORS - Allow all origins for development
@@ -1,22 +1,55 @@
 from pydantic import BaseModel, Field
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Literal
 
 
 class QueryRequest(BaseModel):
     query: str = Field(..., description="SQL query to execute")
     params: Optional[List[Any]] = Field(default=None, description="Optional query parameters")
+    timeout: Optional[float] = Field(default=None, gt=0, description="Query timeout in seconds (None = server default)")
+    stream: Optional[bool] = Field(default=False, description="Stream rows to the client as they are fetched")
+    stream_format: Literal["ndjson", "json"] = Field(default="ndjson", description="Streaming format (ndjson or chunked json)")
+    batch_size: Optional[int] = Field(default=None, gt=0, description="Rows per fetch batch when streaming")
+    format: Optional[Literal["json", "arrow", "parquet"]] = Field(default=None, description="Result format (default: negotiated from Accept, else json)")
+    cache: Optional[Literal["use", "refresh", "skip"]] = Field(default=None, description="Result cache control (None = server default)")
+    cache_ttl: Optional[float] = Field(default=None, gt=0, description="Seconds to keep this result cached")
+
+
+class FilterCondition(BaseModel):
+    column: str = Field(..., description="Column to filter on")
+    op: Literal[
+        "eq", "ne", "lt", "le", "gt", "ge", "like", "not_like",
+        "in", "not_in", "between", "is_null", "is_not_null"
+    ] = Field(default="eq", description="Comparison operator")
+    value: Optional[Any] = Field(default=None, description="Value (a list for in/not_in/between, omitted for is_null)")
+
+
+class OrderBy(BaseModel):
+    column: str = Field(..., description="Column to sort by")
+    direction: Literal["asc", "desc"] = Field(default="asc", description="Sort direction")
 
 
 class TableQueryRequest(BaseModel):
     table_name: str = Field(..., description="Name of the table to query")
     columns: Optional[List[str]] = Field(default=None, description="Columns to fetch (None = all)")
-    where_clause: Optional[str] = Field(default=None, description="WHERE clause filter")
+    where_clause: Optional[str] = Field(default=None, description="Raw WHERE clause filter (prefer filters)")
+    filters: Optional[List[FilterCondition]] = Field(default=None, description="Parameterized column predicates, combined with AND")
     limit: Optional[int] = Field(default=None, gt=0, description="Maximum number of rows")
+    order_by: Optional[List[OrderBy]] = Field(default=None, description="Sort order")
+    timeout: Optional[float] = Field(default=None, gt=0, description="Query timeout in seconds (None = server default)")
+    stream: Optional[bool] = Field(default=False, description="Stream rows to the client as they are fetched")
+    stream_format: Literal["ndjson", "json"] = Field(default="ndjson", description="Streaming format (ndjson or chunked json)")
+    batch_size: Optional[int] = Field(default=None, gt=0, description="Rows per fetch batch when streaming")
+    format: Optional[Literal["json", "arrow", "parquet"]] = Field(default=None, description="Result format (default: negotiated from Accept, else json)")
+    page_size: Optional[int] = Field(default=None, gt=0, description="Return one page of this many rows plus a continuation token")
+    key_column: Optional[str] = Field(default=None, description="Unique column for keyset pagination, in key order; not combinable with order_by (default: offset pagination)")
+    offset: Optional[int] = Field(default=None, ge=0, description="Starting row offset for offset pagination")
+    continuation_token: Optional[str] = Field(default=None, description="Token from the previous page's next_token")
 
 
 class QueryResponse(BaseModel):
     data: List[Dict[str, Any]] = Field(..., description="Query results")
     row_count: int = Field(..., description="Number of rows returned")
+    next_token: Optional[str] = Field(default=None, description="Continuation token for the next page (paginated requests only)")
 
 
 class TablesResponse(BaseModel):
@@ -25,7 +58,7 @@ class TablesResponse(BaseModel):
 
 class TableSchemaResponse(BaseModel):
     table_name: str = Field(..., description="Name of the table")
-    columns: List[Dict[str, str]] = Field(..., description="Column information")
+    columns: List[Dict[str, Any]] = Field(..., description="Column information")
 
 
 class ConnectionTestResponse(BaseModel):
@@ -34,3 +67,157 @@ class ConnectionTestResponse(BaseModel):
     server: Optional[str] = Field(default=None, description="Server address")
     version: Optional[str] = Field(default=None, description="Database version")
     error: Optional[str] = Field(default=None, description="Error message if connection failed")
+
+
+class PoolStatsResponse(BaseModel):
+    configured: bool = Field(..., description="Whether the database (and its pool) is configured")
+    size: int = Field(default=0, description="Open connections (idle + in use)")
+    idle: int = Field(default=0, description="Idle connections ready for checkout")
+    in_use: int = Field(default=0, description="Connections currently checked out")
+    waiting: int = Field(default=0, description="Requests waiting for a free connection")
+    min_size: int = Field(default=0, description="Configured minimum pool size")
+    max_size: int = Field(default=0, description="Configured maximum pool size")
+    acquired_total: int = Field(default=0, description="Total checkouts")
+    created_total: int = Field(default=0, description="Total physical connections opened")
+    discarded_total: int = Field(default=0, description="Connections closed as stale or broken")
+    timeouts_total: int = Field(default=0, description="Checkouts that timed out waiting")
+    wait_time_total: float = Field(default=0.0, description="Cumulative checkout wait time in seconds")
+    wait_time_avg: float = Field(default=0.0, description="Average checkout wait time in seconds")
+    wait_time_max: float = Field(default=0.0, description="Longest checkout wait time in seconds")
+
+
+class CacheStatsResponse(BaseModel):
+    enabled: bool = Field(..., description="Whether SELECT results are cached by default")
+    entries: int = Field(..., description="Cached result sets")
+    bytes: int = Field(..., description="Approximate memory used by cached results")
+    max_bytes: int = Field(..., description="Memory budget for cached results")
+    hits: int = Field(..., description="Cache hits")
+    misses: int = Field(..., description="Cache misses")
+    hit_rate: float = Field(..., description="hits / (hits + misses)")
+    evictions: int = Field(..., description="Entries evicted to stay under max_bytes")
+    expirations: int = Field(..., description="Entries dropped after their TTL")
+    invalidations: int = Field(..., description="Entries dropped by invalidation")
+
+
+class QueryFingerprintStats(BaseModel):
+    id: str = Field(..., description="Short hash of the fingerprint, used as the Prometheus label")
+    fingerprint: str = Field(..., description="Normalized query text with literals replaced by ?")
+    count: int = Field(..., description="Executions")
+    errors: int = Field(..., description="Failed executions")
+    slow: int = Field(..., description="Executions over the slow query threshold")
+    rows: int = Field(..., description="Total rows returned or affected")
+    avg_rows: float = Field(..., description="Average rows per execution")
+    total_time: float = Field(..., description="Cumulative execution time in seconds")
+    avg_time: float = Field(..., description="Average execution time in seconds")
+    max_time: float = Field(..., description="Slowest execution in seconds")
+    p50: float = Field(..., description="Median over the recent window in seconds")
+    p95: float = Field(..., description="95th percentile over the recent window in seconds")
+    p99: float = Field(..., description="99th percentile over the recent window in seconds")
+    phases: Dict[str, float] = Field(..., description="Cumulative seconds per phase (connect, execute, fetch, serialize)")
+    last_seen: float = Field(..., description="Unix time of the latest execution")
+
+
+class QueryStatsResponse(BaseModel):
+    since: float = Field(..., description="Unix time statistics were last reset")
+    slow_query_threshold: float = Field(..., description="Seconds above which queries are logged")
+    fingerprints: int = Field(..., description="Distinct query fingerprints tracked")
+    queries: List[QueryFingerprintStats] = Field(..., description="Per-fingerprint statistics")
+    pool: PoolStatsResponse = Field(..., description="Connection pool statistics")
+    cache: CacheStatsResponse = Field(..., description="Result cache statistics")
+
+
+class CacheInvalidateRequest(BaseModel):
+    tables: Optional[List[str]] = Field(default=None, description="Drop results that reference these tables")
+    query: Optional[str] = Field(default=None, description="Drop the result of this exact query")
+    params: Optional[List[Any]] = Field(default=None, description="Parameters of the query to drop")
+
+
+class CacheInvalidateResponse(BaseModel):
+    invalidated: int = Field(..., description="Number of cache entries removed")
+
+
+class CatalogTable(BaseModel):
+    schema_name: str = Field(..., alias="schema", description="Schema the table belongs to")
+    name: str = Field(..., description="Table name")
+    columns: List[Dict[str, Any]] = Field(..., description="Column information")
+
+
+class CatalogResponse(BaseModel):
+    tables: List[CatalogTable] = Field(..., description="All base tables with their columns")
+    table_count: int = Field(..., description="Number of tables")
+    loaded_at: Optional[float] = Field(default=None, description="Unix time the catalog was loaded")
+    load_duration: Optional[float] = Field(default=None, description="Seconds the bulk load took")
+    stale: bool = Field(..., description="Whether a reload is pending")
+
+
+class CatalogRefreshResponse(BaseModel):
+    table_count: int = Field(..., description="Number of tables loaded")
+    loaded_at: Optional[float] = Field(default=None, description="Unix time the catalog was loaded")
+    load_duration: Optional[float] = Field(default=None, description="Seconds the bulk load took")
+
+
+class ExportRequest(BaseModel):
+    table_name: Optional[str] = Field(default=None, description="Table to export (or use query)")
+    columns: Optional[List[str]] = Field(default=None, description="Columns to export (None = all)")
+    where_clause: Optional[str] = Field(default=None, description="WHERE clause filter for table exports")
+    query: Optional[str] = Field(default=None, description="SQL query to export (or use table_name)")
+    params: Optional[List[Any]] = Field(default=None, description="Optional query parameters")
+    format: Literal["csv", "parquet"] = Field(default="csv", description="Export file format")
+    compression: Optional[Literal["gzip", "snappy", "zstd", "none"]] = Field(
+        default=None, description="Compression (csv: gzip|none, default gzip; parquet: snappy|zstd|gzip|none, default snappy)"
+    )
+    destination: Literal["stream", "file"] = Field(default="stream", description="Stream to the client or write to the server's export directory")
+    batch_size: Optional[int] = Field(default=None, gt=0, description="Rows per fetch batch")
+    partition_column: Optional[str] = Field(default=None, description="Numeric column used to split parallel reads (file exports; the query must be usable as a derived table: no leading CTE, no ORDER BY without TOP)")
+    partitions: int = Field(default=1, ge=1, description="Number of parallel range-partitioned reads (file exports)")
+    timeout: Optional[float] = Field(default=None, gt=0, description="Per-batch timeout in seconds for streamed exports")
+
+
+class ExportJobResponse(BaseModel):
+    job_id: str = Field(..., description="Export job identifier")
+    status: str = Field(..., description="pending, running, completed, failed or cancelled")
+    destination: str = Field(..., description="stream or file")
+    format: str = Field(..., description="Export file format")
+    compression: Optional[str] = Field(default=None, description="Requested compression")
+    partitions: int = Field(..., description="Number of parallel reads")
+    rows: int = Field(..., description="Rows exported so far")
+    bytes: int = Field(..., description="Encoded bytes written so far")
+    files: List[str] = Field(..., description="Output files (file exports)")
+    elapsed: float = Field(..., description="Seconds since the export started")
+    rows_per_second: float = Field(..., description="Average row throughput")
+    bytes_per_second: float = Field(..., description="Average byte throughput")
+    created_at: float = Field(..., description="Unix time the job was created")
+    started_at: Optional[float] = Field(default=None, description="Unix time the job started")
+    finished_at: Optional[float] = Field(default=None, description="Unix time the job finished")
+    error: Optional[str] = Field(default=None, description="Error message if the export failed")
+
+
+class ExportJobsResponse(BaseModel):
+    jobs: List[ExportJobResponse] = Field(..., description="Recent export jobs, newest first")
+
+
+class BatchStatement(BaseModel):
+    query: str = Field(..., description="SQL statement to execute")
+    params: Optional[List[Any]] = Field(default=None, description="Optional statement parameters")
+
+
+class BatchRequest(BaseModel):
+    statements: Optional[List[BatchStatement]] = Field(default=None, description="Statements to run in order")
+    statement: Optional[str] = Field(default=None, description="Parameterized statement to run once per param row")
+    param_rows: Optional[List[List[Any]]] = Field(default=None, description="Parameter rows for statement")
+    chunk_size: Optional[int] = Field(default=None, gt=0, description="Parameter rows per executemany call")
+    timeout: Optional[float] = Field(default=None, gt=0, description="Timeout in seconds for the whole batch (None = server default)")
+
+
+class BatchTiming(BaseModel):
+    index: int = Field(..., description="Batch (statement or chunk) index")
+    rows: int = Field(..., description="Parameter rows sent in this batch")
+    rowcount: Optional[int] = Field(default=None, description="Rows affected, when reported by the driver")
+    duration: float = Field(..., description="Seconds spent executing this batch")
+
+
+class BatchResponse(BaseModel):
+    batches: List[BatchTiming] = Field(..., description="Per-batch timings")
+    total_rows: int = Field(..., description="Total parameter rows executed")
+    duration: float = Field(..., description="Total seconds including commit")
+    rows_per_second: float = Field(..., description="Overall throughput")
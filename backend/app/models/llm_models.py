@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Literal
 
 
 class Message(BaseModel):
@@ -14,6 +14,13 @@ class ChatRequest(BaseModel):
     max_tokens: Optional[int] = Field(default=1000, gt=0, description="Maximum tokens to generate")
     stream: Optional[bool] = Field(default=False, description="Whether to stream the response")
     provider: str = Field(default="openai", description="LLM provider (openai, anthropic, etc.)")
+    priority: Literal["high", "normal", "low"] = Field(default="normal", description="Scheduling priority when requests are queued")
+    cache: Optional[Literal["use", "refresh", "skip"]] = Field(default=None, description="Response cache control (None = cache only deterministic requests)")
+    cache_ttl: Optional[float] = Field(default=None, gt=0, description="Seconds to keep this response cached")
+    user: Optional[str] = Field(default=None, description="Caller identifier for usage and cost accounting")
+    prompt_cache: Optional[bool] = Field(default=None, description="Mark stable prompt prefixes cacheable on Anthropic (None = LLM_PROMPT_CACHE_ENABLED)")
+    compaction: Optional[Literal["off", "truncate", "summarize"]] = Field(default=None, description="How to fit long conversations into context_budget (None = LLM_COMPACTION_MODE)")
+    context_budget: Optional[int] = Field(default=None, gt=0, description="Token budget for conversation turns when compacting")
 
 
 class ChatResponse(BaseModel):
@@ -21,8 +28,162 @@ class ChatResponse(BaseModel):
     model: str = Field(..., description="Model used for generation")
     usage: Optional[Dict[str, Any]] = Field(default=None, description="Token usage information")
     provider: str = Field(..., description="LLM provider used")
+    cached: bool = Field(default=False, description="Whether the response was served from the cache")
+
+
+class LLMCacheStatsResponse(BaseModel):
+    enabled: bool = Field(..., description="Whether deterministic requests are cached by default")
+    entries: int = Field(..., description="Completions held in memory")
+    bytes: int = Field(..., description="Memory used by cached completions")
+    max_bytes: int = Field(..., description="Memory budget for cached completions")
+    disk_enabled: bool = Field(..., description="Whether the SQLite tier is active")
+    disk_entries: Optional[int] = Field(default=None, description="Completions stored on disk")
+    memory_hits: int = Field(..., description="Hits served from memory")
+    disk_hits: int = Field(..., description="Hits served from disk")
+    misses: int = Field(..., description="Lookups that reached the provider")
+    hit_rate: float = Field(..., description="(memory_hits + disk_hits) / lookups")
+    stores: int = Field(..., description="Completions written to the cache")
+    evictions: int = Field(..., description="Entries evicted from memory to stay under max_bytes")
+
+
+class LLMPoolStatsResponse(BaseModel):
+    connections: int = Field(..., description="Open provider connections (idle + active)")
+    idle: int = Field(..., description="Keep-alive connections ready for reuse")
+    active: int = Field(..., description="Connections serving a request")
+    waiting: int = Field(..., description="Requests queued for a free connection")
+    origins: Dict[str, int] = Field(..., description="Open connections per provider origin")
+    max_connections: Optional[int] = Field(default=None, description="Configured connection limit")
+    max_keepalive_connections: Optional[int] = Field(default=None, description="Configured idle connection limit")
+    keepalive_expiry: Optional[float] = Field(default=None, description="Seconds an idle connection stays open")
+    http2: bool = Field(..., description="Whether HTTP/2 is negotiated")
+    requests_total: int = Field(..., description="Requests sent through the pool")
+    peak_active: int = Field(..., description="Most connections seen active at once")
+    peak_waiting: int = Field(..., description="Most requests seen queued at once")
+
+
+class SchedulerProviderStats(BaseModel):
+    in_flight: int = Field(..., description="Requests currently running")
+    concurrency: int = Field(..., description="Concurrency cap (0 = unlimited)")
+    in_flight_by_model: Dict[str, int] = Field(..., description="Running requests per model")
+    queued: int = Field(..., description="Requests waiting for this provider")
+    requests_available: Optional[float] = Field(default=None, description="Remaining requests/min budget")
+    tokens_available: Optional[float] = Field(default=None, description="Remaining tokens/min budget")
+
+
+class LLMSchedulerStatsResponse(BaseModel):
+    queue_depth: int = Field(..., description="Requests waiting for a slot")
+    max_queue: int = Field(..., description="Queue size at which requests are rejected")
+    admitted_total: int = Field(..., description="Requests admitted")
+    queued_total: int = Field(..., description="Requests that had to wait")
+    rejected_total: int = Field(..., description="Requests rejected because the queue was full")
+    timeouts_total: int = Field(..., description="Requests that gave up waiting")
+    wait_time_total: float = Field(..., description="Cumulative queue wait in seconds")
+    wait_time_avg: float = Field(..., description="Average queue wait in seconds")
+    wait_time_p95: float = Field(..., description="95th percentile of recent queue waits in seconds")
+    wait_time_max: float = Field(..., description="Longest queue wait in seconds")
+    providers: Dict[str, SchedulerProviderStats] = Field(..., description="Per-provider occupancy")
+
+
+class ChatBatchRequest(BaseModel):
+    requests: List[ChatRequest] = Field(..., min_length=1, description="Chat requests to complete (stream is ignored)")
+    concurrency: Optional[int] = Field(default=None, gt=0, description="Requests in flight at once (capped by the server)")
+    background: bool = Field(default=False, description="Run as a background job and poll for results")
+
+
+class ChatBatchResult(BaseModel):
+    index: int = Field(..., description="Position of the request in the batch")
+    status: Literal["completed", "failed"] = Field(..., description="Outcome of this request")
+    response: Optional[ChatResponse] = Field(default=None, description="Completion, when successful")
+    error: Optional[str] = Field(default=None, description="Error message, when failed")
+    status_code: int = Field(..., description="HTTP status the request would have returned on /chat")
+    duration: float = Field(..., description="Seconds spent on this request")
+
+
+class ChatBatchJobResponse(BaseModel):
+    job_id: str = Field(..., description="Batch job identifier")
+    status: Literal["pending", "running", "completed", "failed", "cancelled"] = Field(..., description="Job state")
+    total: int = Field(..., description="Requests in the batch")
+    concurrency: int = Field(..., description="Requests run in parallel")
+    finished: int = Field(..., description="Requests finished so far")
+    succeeded: int = Field(..., description="Requests completed successfully")
+    failed: int = Field(..., description="Requests that failed")
+    tokens: int = Field(..., description="Total tokens reported by successful requests")
+    elapsed: float = Field(..., description="Seconds since the job started")
+    requests_per_second: float = Field(..., description="Throughput so far")
+    created_at: float = Field(..., description="Unix time the job was created")
+    started_at: Optional[float] = Field(default=None, description="Unix time the job started")
+    finished_at: Optional[float] = Field(default=None, description="Unix time the job finished")
+    error: Optional[str] = Field(default=None, description="Error message if the job failed")
+    results: Optional[List[ChatBatchResult]] = Field(default=None, description="Results in completion order, from the requested offset")
+
+
+class ChatBatchJobsResponse(BaseModel):
+    jobs: List[ChatBatchJobResponse] = Field(..., description="Known batch jobs, newest first")
+
+
+class ChatSessionCreateRequest(BaseModel):
+    messages: List[Message] = Field(default_factory=list, description="Initial history, e.g. a system prompt")
+    model: str = Field(default="gpt-3.5-turbo", description="LLM model to use")
+    provider: str = Field(default="openai", description="LLM provider (openai, anthropic, etc.)")
+    temperature: Optional[float] = Field(default=0.7, ge=0, le=2, description="Sampling temperature")
+    max_tokens: Optional[int] = Field(default=1000, gt=0, description="Maximum tokens to generate")
+    priority: Literal["high", "normal", "low"] = Field(default="normal", description="Scheduling priority when requests are queued")
+    user: Optional[str] = Field(default=None, description="Caller identifier for usage and cost accounting")
+    prompt_cache: Optional[bool] = Field(default=None, description="Mark stable prompt prefixes cacheable on Anthropic (None = LLM_PROMPT_CACHE_ENABLED)")
+    compaction: Optional[Literal["off", "truncate", "summarize"]] = Field(default=None, description="How to fit long conversations into context_budget (None = LLM_COMPACTION_MODE)")
+    context_budget: Optional[int] = Field(default=None, gt=0, description="Token budget for conversation turns when compacting")
+
+
+class ChatSessionAppendRequest(BaseModel):
+    messages: List[Message] = Field(..., min_length=1, description="Messages to add to the history without a completion")
+
+
+class ChatSessionMessageRequest(BaseModel):
+    message: Message = Field(..., description="The new message, usually from the user")
+    stream: bool = Field(default=False, description="Whether to stream the response")
+    temperature: Optional[float] = Field(default=None, ge=0, le=2, description="Override the session's sampling temperature")
+    max_tokens: Optional[int] = Field(default=None, gt=0, description="Override the session's max_tokens")
+    priority: Optional[Literal["high", "normal", "low"]] = Field(default=None, description="Override the session's priority")
+    cache: Optional[Literal["use", "refresh", "skip"]] = Field(default=None, description="Response cache control for this turn")
+
+
+class ChatSessionResponse(BaseModel):
+    session_id: str = Field(..., description="Session identifier")
+    options: Dict[str, Any] = Field(..., description="Request options applied to every turn")
+    message_count: int = Field(..., description="Messages in the history")
+    tokens: int = Field(..., description="Estimated tokens in the history")
+    turns: int = Field(..., description="Assistant replies in the history")
+    created_at: float = Field(..., description="Unix time the session was created")
+    updated_at: float = Field(..., description="Unix time of the last change")
+    messages: Optional[List[Message]] = Field(default=None, description="History, when requested")
 
 
 class ErrorResponse(BaseModel):
     error: str = Field(..., description="Error message")
     detail: Optional[str] = Field(default=None, description="Detailed error information")
+
+
+class LLMUsageStats(BaseModel):
+    calls: int = Field(..., description="Calls recorded, including failures and cache hits")
+    errors: int = Field(..., description="Calls that failed or were cancelled")
+    cached: int = Field(..., description="Calls answered from the response cache")
+    input_tokens: int = Field(..., description="Prompt tokens (estimated where the provider reported none)")
+    output_tokens: int = Field(..., description="Completion tokens (estimated where the provider reported none)")
+    cache_read_tokens: int = Field(..., description="Prompt tokens read from the provider's prompt cache")
+    cost: float = Field(..., description="Estimated cost in USD")
+    cost_per_call: float = Field(..., description="Average estimated cost per call in USD")
+    latency_p50: Optional[float] = Field(default=None, description="Median latency of successful provider calls")
+    latency_p95: Optional[float] = Field(default=None, description="95th percentile latency")
+    latency_p99: Optional[float] = Field(default=None, description="99th percentile latency")
+    ttft_p50: Optional[float] = Field(default=None, description="Median time to first token of streams")
+    ttft_p95: Optional[float] = Field(default=None, description="95th percentile time to first token")
+    ttft_p99: Optional[float] = Field(default=None, description="99th percentile time to first token")
+
+
+class LLMUsageStatsResponse(BaseModel):
+    since: float = Field(..., description="Unix time the aggregates start from")
+    group_by: Literal["model", "user"] = Field(..., description="Grouping of the aggregates")
+    totals: Dict[str, Any] = Field(..., description="Call, token and cost totals across all groups")
+    groups: Dict[str, LLMUsageStats] = Field(..., description="Aggregates per provider:model or per user")
+    pending_flush: int = Field(..., description="Records not yet written to the telemetry store")
+    flushed_total: int = Field(..., description="Records written to the telemetry store")
@@ -1,35 +1,234 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse, FileResponse, PlainTextResponse
 from app.models.database_models import (
     QueryRequest,
     TableQueryRequest,
     QueryResponse,
     TablesResponse,
     TableSchemaResponse,
-    ConnectionTestResponse
+    ConnectionTestResponse,
+    PoolStatsResponse,
+    CacheStatsResponse,
+    QueryStatsResponse,
+    CacheInvalidateRequest,
+    CacheInvalidateResponse,
+    CatalogResponse,
+    CatalogRefreshResponse,
+    ExportRequest,
+    ExportJobResponse,
+    ExportJobsResponse,
+    BatchRequest,
+    BatchResponse
 )
-from app.services.database_service import database_service
+from app.services.database_service import database_service, QueryTimeoutError
+from app.services.arrow_encoder import columnar_encoder, format_from_accept
+from app.services.export_service import export_service, file_extension
+from typing import Any, AsyncIterator, Awaitable, List, Optional, Tuple, TypeVar
+from datetime import date, datetime, time
+from decimal import Decimal
+from uuid import UUID
+import asyncio
+import base64
+import json
+import os
 import traceback
 
 router = APIRouter(prefix="/api/database", tags=["Database"])
 
+T = TypeVar("T")
+
+# How often to check whether the client has gone away while a query runs
+DISCONNECT_POLL_INTERVAL = 0.5
+
+
+async def run_until_disconnect(http_request: Request, awaitable: Awaitable[T]) -> T:
+    """
+    Await a database call, cancelling it if the client disconnects first
+    """
+    task = asyncio.ensure_future(awaitable)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=DISCONNECT_POLL_INTERVAL)
+            if done:
+                return task.result()
+            if await http_request.is_disconnected():
+                task.cancel()
+                raise HTTPException(status_code=499, detail="Client disconnected")
+    finally:
+        if not task.done():
+            task.cancel()
+
+
+def _json_default(value: Any) -> Any:
+    """Encode database values that the json module does not handle natively"""
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, UUID):
+        return str(value)
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return base64.b64encode(bytes(value)).decode("ascii")
+    return str(value)
+
+
+async def stream_rows(
+    first_batch: Tuple[List[tuple], List[Any]],
+    batches: AsyncIterator[Tuple[List[tuple], List[Any]]],
+    stream_format: str
+) -> AsyncIterator[str]:
+    """
+    Generator function for streaming query results batch by batch
+
+    ndjson: one JSON object per row per line, plus an {"error": ...} line on failure
+    json:   {"columns": [...], "data": [...], "row_count": N} written incrementally
+    """
+    description, rows = first_batch
+    columns = [column[0] for column in description]
+    row_count = 0
+    error = None
+
+    if stream_format == "json":
+        yield f'{{"columns": {json.dumps(columns)}, "data": ['
+
+    try:
+        while True:
+            if rows:
+                encoded = [json.dumps(dict(zip(columns, row)), default=_json_default) for row in rows]
+                if stream_format == "json":
+                    yield ("," if row_count else "") + ",".join(encoded)
+                else:
+                    yield "\n".join(encoded) + "\n"
+                row_count += len(rows)
+
+            try:
+                _, rows = await batches.__anext__()
+            except StopAsyncIteration:
+                break
+    except Exception as e:
+        print(f"Exception: {e}")
+        traceback.print_exc()
+        error = str(e)
+    finally:
+        await batches.aclose()
+
+    if stream_format == "json":
+        tail = f'], "row_count": {row_count}'
+        if error:
+            tail += f', "error": {json.dumps(error)}'
+        yield tail + "}"
+    elif error:
+        yield json.dumps({"error": error}) + "\n"
+
+
+def resolve_result_format(requested: Optional[str], http_request: Request) -> str:
+    """Pick the result format from the request body, then the Accept header"""
+    return requested or format_from_accept(http_request.headers.get("accept")) or "json"
+
+
+async def stream_columnar(
+    encoder: Any,
+    first_batch: Tuple[List[tuple], List[Any]],
+    batches: AsyncIterator[Tuple[List[tuple], List[Any]]]
+) -> AsyncIterator[bytes]:
+    """
+    Generator function for Arrow IPC / Parquet responses
+
+    A failure mid-stream truncates the body (no end-of-stream marker or
+    Parquet footer), which Arrow and Parquet readers report as an error.
+    """
+    _, rows = first_batch
+    try:
+        yield encoder.begin()
+        while True:
+            if rows:
+                yield encoder.encode(rows)
+            try:
+                _, rows = await batches.__anext__()
+            except StopAsyncIteration:
+                break
+        yield encoder.end()
+    except Exception as e:
+        print(f"Exception: {e}")
+        traceback.print_exc()
+    finally:
+        await batches.aclose()
+
+
+async def streaming_response(
+    http_request: Request,
+    batches: AsyncIterator[Tuple[List[tuple], List[Any]]],
+    result_format: str,
+    stream_format: str
+) -> StreamingResponse:
+    """
+    Start a streamed query and wrap it in a StreamingResponse
+
+    The first batch is fetched before responding so connection and SQL
+    errors still produce a proper HTTP status code.
+    """
+    first_batch = await run_until_disconnect(http_request, batches.__anext__())
+
+    if result_format != "json":
+        try:
+            encoder = columnar_encoder(result_format, first_batch[0])
+        except Exception:
+            await batches.aclose()
+            raise
+        return StreamingResponse(
+            stream_columnar(encoder, first_batch, batches),
+            media_type=encoder.media_type
+        )
+
+    return StreamingResponse(
+        stream_rows(first_batch, batches, stream_format),
+        media_type="application/x-ndjson" if stream_format == "ndjson" else "application/json"
+    )
+
 
 @router.post("/query", response_model=QueryResponse)
-async def execute_query(request: QueryRequest):
+async def execute_query(request: QueryRequest, http_request: Request):
     """
     Execute a custom SQL query
 
-    Supports parameterized queries for security
+    Supports parameterized queries for security. Set stream=true to receive
+    rows as NDJSON (or chunked JSON) while they are fetched, or request
+    format=arrow/parquet (or the matching Accept header) for columnar output.
     """
     try:
         # Convert list params to tuple if provided
         params = tuple(request.params) if request.params else None
+        result_format = resolve_result_format(request.format, http_request)
 
-        results = database_service.execute_query(request.query, params)
+        if request.stream or result_format != "json":
+            return await streaming_response(
+                http_request,
+                database_service.stream_query_async(
+                    request.query, params, batch_size=request.batch_size, timeout=request.timeout
+                ),
+                result_format,
+                request.stream_format
+            )
+
+        results = await run_until_disconnect(
+            http_request,
+            database_service.execute_query_async(
+                request.query,
+                params,
+                timeout=request.timeout,
+                cache_mode=request.cache,
+                cache_ttl=request.cache_ttl
+            )
+        )
 
         return QueryResponse(
             data=results,
             row_count=len(results)
         )
+    except HTTPException:
+        raise
+    except QueryTimeoutError as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except ValueError as e:
         print(f"ValueError: {e}")
         traceback.print_exc()
@@ -40,25 +239,126 @@ async def execute_query(request: QueryRequest):
         raise HTTPException(status_code=500, detail=f"Query execution failed: {str(e)}")
 
 
+@router.post("/batch", response_model=BatchResponse)
+async def execute_batch(request: BatchRequest, http_request: Request):
+    """
+    Run many statements, or one statement over many parameter rows,
+    on a single connection inside one transaction
+    """
+    try:
+        statements = [
+            (item.query, tuple(item.params) if item.params else None)
+            for item in request.statements
+        ] if request.statements else None
+        param_rows = [tuple(row) for row in request.param_rows] if request.param_rows else None
+
+        result = await run_until_disconnect(
+            http_request,
+            database_service.execute_batch_async(
+                statements=statements,
+                statement=request.statement,
+                param_rows=param_rows,
+                chunk_size=request.chunk_size,
+                timeout=request.timeout
+            )
+        )
+        return BatchResponse(**result)
+    except HTTPException:
+        raise
+    except QueryTimeoutError as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except ValueError as e:
+        print(f"ValueError: {e}")
+        traceback.print_exc()
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        print(f"Exception: {e}")
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=f"Batch execution failed: {str(e)}")
+
+
 @router.post("/table", response_model=QueryResponse)
-async def get_table_data(request: TableQueryRequest):
+async def get_table_data(request: TableQueryRequest, http_request: Request):
     """
     Fetch data from a specific table
 
-    Provides a simplified interface for common table queries
+    Provides a simplified interface for common table queries. Set stream=true
+    to stream rows, format=arrow/parquet for columnar output, or page_size to
+    fetch one page plus a continuation token.
     """
     try:
-        results = database_service.get_table_data(
-            table_name=request.table_name,
-            columns=request.columns,
-            where_clause=request.where_clause,
-            limit=request.limit
+        result_format = resolve_result_format(request.format, http_request)
+        streamed = request.stream or result_format != "json"
+        filters = [(f.column, f.op, f.value) for f in request.filters] if request.filters else None
+        order_by = [(o.column, o.direction) for o in request.order_by] if request.order_by else None
+
+        if streamed and request.page_size:
+            raise ValueError("page_size cannot be combined with streaming or columnar formats")
+
+        if streamed:
+            batches = await run_until_disconnect(
+                http_request,
+                database_service.stream_table_data_async(
+                    table_name=request.table_name,
+                    columns=request.columns,
+                    where_clause=request.where_clause,
+                    limit=request.limit,
+                    order_by=order_by,
+                    filters=filters,
+                    batch_size=request.batch_size,
+                    timeout=request.timeout
+                )
+            )
+            return await streaming_response(
+                http_request,
+                batches,
+                result_format,
+                request.stream_format
+            )
+
+        if request.page_size:
+            rows, next_token = await run_until_disconnect(
+                http_request,
+                database_service.get_table_page_async(
+                    table_name=request.table_name,
+                    page_size=request.page_size,
+                    columns=request.columns,
+                    where_clause=request.where_clause,
+                    order_by=order_by,
+                    key_column=request.key_column,
+                    offset=request.offset,
+                    continuation_token=request.continuation_token,
+                    filters=filters,
+                    timeout=request.timeout
+                )
+            )
+            return QueryResponse(
+                data=rows,
+                row_count=len(rows),
+                next_token=next_token
+            )
+
+        results = await run_until_disconnect(
+            http_request,
+            database_service.get_table_data_async(
+                table_name=request.table_name,
+                columns=request.columns,
+                where_clause=request.where_clause,
+                limit=request.limit,
+                order_by=order_by,
+                filters=filters,
+                timeout=request.timeout
+            )
         )
 
         return QueryResponse(
             data=results,
             row_count=len(results)
         )
+    except HTTPException:
+        raise
+    except QueryTimeoutError as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except ValueError as e:
         print(f"ValueError: {e}")
         traceback.print_exc()
@@ -70,13 +370,17 @@ async def get_table_data(request: TableQueryRequest):
 
 
 @router.get("/tables", response_model=TablesResponse)
-async def list_tables():
+async def list_tables(http_request: Request):
     """
     Get list of all tables in the database
     """
     try:
-        tables = database_service.get_tables()
+        tables = await run_until_disconnect(http_request, database_service.get_tables_async())
         return TablesResponse(tables=tables)
+    except HTTPException:
+        raise
+    except QueryTimeoutError as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         print(f"Exception: {e}")
         traceback.print_exc()
@@ -84,31 +388,261 @@ async def list_tables():
 
 
 @router.get("/schema/{table_name}", response_model=TableSchemaResponse)
-async def get_table_schema(table_name: str):
+async def get_table_schema(table_name: str, http_request: Request):
     """
     Get schema information for a specific table
     """
     try:
-        columns = database_service.get_table_schema(table_name)
+        columns = await run_until_disconnect(
+            http_request,
+            database_service.get_table_schema_async(table_name)
+        )
         return TableSchemaResponse(
             table_name=table_name,
             columns=columns
         )
+    except HTTPException:
+        raise
+    except QueryTimeoutError as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         print(f"Exception: {e}")
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=f"Failed to fetch schema: {str(e)}")
 
 
+@router.get("/catalog", response_model=CatalogResponse)
+async def get_catalog(http_request: Request):
+    """
+    Get every table and its columns in one response (served from memory)
+    """
+    try:
+        catalog = await run_until_disconnect(http_request, database_service.get_catalog_async())
+        return CatalogResponse(**catalog)
+    except HTTPException:
+        raise
+    except QueryTimeoutError as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except Exception as e:
+        print(f"Exception: {e}")
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=f"Failed to fetch catalog: {str(e)}")
+
+
+@router.post("/catalog/refresh", response_model=CatalogRefreshResponse)
+async def refresh_catalog(http_request: Request):
+    """
+    Reload the schema catalog from the database now
+    """
+    try:
+        result = await run_until_disconnect(http_request, database_service.refresh_catalog_async())
+        return CatalogRefreshResponse(**result)
+    except HTTPException:
+        raise
+    except QueryTimeoutError as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except Exception as e:
+        print(f"Exception: {e}")
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=f"Failed to refresh catalog: {str(e)}")
+
+
 @router.get("/test", response_model=ConnectionTestResponse)
-async def test_connection():
+async def test_connection(http_request: Request):
     """
     Test database connection and return connection info
     """
     try:
-        result = database_service.test_connection()
+        result = await run_until_disconnect(http_request, database_service.test_connection_async())
         return ConnectionTestResponse(**result)
+    except HTTPException:
+        raise
+    except QueryTimeoutError as e:
+        return ConnectionTestResponse(connected=False, error=str(e))
     except Exception as e:
         print(f"Exception: {e}")
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=f"Connection test failed: {str(e)}")
+
+
+@router.get("/pool", response_model=PoolStatsResponse)
+async def get_pool_stats():
+    """
+    Get connection pool size and wait-time statistics
+    """
+    return PoolStatsResponse(**database_service.pool_stats())
+
+
+@router.get("/stats", response_model=QueryStatsResponse)
+async def get_query_stats(limit: Optional[int] = None, sort: str = "total_time"):
+    """
+    Get per-query timing, row-count and phase statistics
+
+    Queries are grouped by fingerprint (normalized text with literals
+    replaced) and sorted by the given field, descending.
+    """
+    try:
+        return QueryStatsResponse(**database_service.query_stats(limit=limit, sort=sort))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.delete("/stats")
+async def reset_query_stats():
+    """
+    Reset accumulated query statistics
+    """
+    database_service.reset_query_stats()
+    return {"message": "Query statistics reset"}
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """
+    Query, pool and cache metrics in the Prometheus text exposition format
+    """
+    return PlainTextResponse(
+        database_service.prometheus_metrics(),
+        media_type="text/plain; version=0.0.4"
+    )
+
+
+@router.get("/cache", response_model=CacheStatsResponse)
+async def get_cache_stats():
+    """
+    Get query result cache occupancy and hit/miss counters
+    """
+    return CacheStatsResponse(**database_service.cache_stats())
+
+
+@router.post("/cache/invalidate", response_model=CacheInvalidateResponse)
+async def invalidate_cache(request: CacheInvalidateRequest):
+    """
+    Invalidate cached query results
+
+    Drops results tagged with any of the given tables and/or the exact
+    query+params; with an empty body the whole cache is cleared.
+    """
+    params = tuple(request.params) if request.params else None
+    invalidated = database_service.invalidate_cache(
+        tables=request.tables,
+        query=request.query,
+        params=params
+    )
+    return CacheInvalidateResponse(invalidated=invalidated)
+
+
+@router.post("/export")
+async def export_data(request: ExportRequest, http_request: Request):
+    """
+    Export a table or query result to compressed CSV or Parquet
+
+    destination=stream sends the file straight to the client;
+    destination=file writes it under the export directory as a background
+    job whose progress is reported by GET /export/{job_id}.
+    """
+    try:
+        params = tuple(request.params) if request.params else None
+
+        if request.table_name:
+            # Table exports validate identifiers against the schema catalog
+            await database_service.ensure_catalog_async()
+
+        if request.destination == "file":
+            job = export_service.start_file_export(
+                table_name=request.table_name,
+                columns=request.columns,
+                where_clause=request.where_clause,
+                query=request.query,
+                params=params,
+                export_format=request.format,
+                compression=request.compression,
+                batch_size=request.batch_size,
+                partition_column=request.partition_column,
+                partitions=request.partitions
+            )
+            return ExportJobResponse(**job.to_dict())
+
+        if request.partitions > 1:
+            raise ValueError("Partitioned exports require destination=file")
+
+        job, encoder, body = await run_until_disconnect(
+            http_request,
+            export_service.stream_export(
+                table_name=request.table_name,
+                columns=request.columns,
+                where_clause=request.where_clause,
+                query=request.query,
+                params=params,
+                export_format=request.format,
+                compression=request.compression,
+                batch_size=request.batch_size,
+                timeout=request.timeout
+            )
+        )
+        filename = f"{request.table_name or 'export'}{file_extension(request.format, request.compression)}"
+        return StreamingResponse(
+            body,
+            media_type=encoder.media_type,
+            headers={
+                "Content-Disposition": f'attachment; filename="{filename}"',
+                "X-Export-Job-Id": job.id
+            }
+        )
+    except HTTPException:
+        raise
+    except QueryTimeoutError as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except ValueError as e:
+        print(f"ValueError: {e}")
+        traceback.print_exc()
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        print(f"Exception: {e}")
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=f"Export failed: {str(e)}")
+
+
+@router.get("/export/jobs", response_model=ExportJobsResponse)
+async def list_export_jobs():
+    """
+    List recent export jobs with progress and throughput
+    """
+    return ExportJobsResponse(jobs=export_service.list_jobs())
+
+
+@router.get("/export/{job_id}", response_model=ExportJobResponse)
+async def get_export_job(job_id: str):
+    """
+    Get progress and throughput of an export job
+    """
+    job = export_service.get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail=f"Export job not found: {job_id}")
+    return ExportJobResponse(**job.to_dict())
+
+
+@router.delete("/export/{job_id}", response_model=ExportJobResponse)
+async def cancel_export_job(job_id: str):
+    """
+    Cancel a running export job
+    """
+    job = export_service.cancel_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail=f"Export job not found: {job_id}")
+    return ExportJobResponse(**job.to_dict())
+
+
+@router.get("/export/{job_id}/download")
+async def download_export(job_id: str):
+    """
+    Download the output of a completed single-file export job
+    """
+    job = export_service.get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail=f"Export job not found: {job_id}")
+    if job.destination != "file" or job.status != "completed":
+        raise HTTPException(status_code=400, detail=f"Export job is not a completed file export (status: {job.status})")
+    if len(job.files) != 1:
+        raise HTTPException(status_code=400, detail="Partitioned exports have several files; read them from the export directory")
+    return FileResponse(job.files[0], filename=os.path.basename(job.files[0]))
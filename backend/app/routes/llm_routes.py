@@ -1,8 +1,31 @@
 from fastapi import APIRouter, HTTPException
-from fastapi.responses import StreamingResponse
-from app.models.llm_models import ChatRequest, ChatResponse, ErrorResponse
+from fastapi.responses import StreamingResponse, PlainTextResponse
+from app.models.llm_models import (
+    ChatRequest,
+    ChatResponse,
+    ErrorResponse,
+    LLMCacheStatsResponse,
+    LLMPoolStatsResponse,
+    LLMSchedulerStatsResponse,
+    LLMUsageStatsResponse,
+    ChatBatchRequest,
+    ChatBatchJobResponse,
+    ChatBatchJobsResponse,
+    ChatSessionCreateRequest,
+    ChatSessionAppendRequest,
+    ChatSessionMessageRequest,
+    ChatSessionResponse
+)
+from app.config import settings
 from app.services.llm_service import llm_service
+from app.services.llm_batch_service import llm_batch_service
+from app.services.llm_session_service import llm_session_service, SESSION_OPTIONS
+from app.services.llm_scheduler import SchedulerRejected
+from app.services.llm_streaming import StreamStats, coalesce, sse_frame, sse_event, DONE_FRAME
+from typing import AsyncIterator, Literal
 import json
+import math
+import time
 import traceback
 
 router = APIRouter(prefix="/api/llm", tags=["LLM"])
@@ -19,13 +42,21 @@ async def chat_completion(request: ChatRequest):
     """
     try:
         if request.stream:
+            stats = StreamStats(request.provider.lower(), request.model, started=time.monotonic())
+            chunks = await start_stream(llm_service.stream_chat_completion(request))
             return StreamingResponse(
-                stream_response(request),
+                stream_response(chunks, stats),
                 media_type="text/event-stream"
             )
         else:
             response = await llm_service.chat_completion(request)
             return response
+    except SchedulerRejected as e:
+        raise HTTPException(
+            status_code=429,
+            detail=str(e),
+            headers={"Retry-After": str(math.ceil(e.retry_after))}
+        )
     except ValueError as e:
         print(f"ValueError: {e}")
         traceback.print_exc()
@@ -36,17 +67,297 @@ async def chat_completion(request: ChatRequest):
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
 
-async def stream_response(request: ChatRequest):
+async def start_stream(chunks: AsyncIterator[str]) -> AsyncIterator[str]:
+    """
+    Wait for the first chunk before the response starts
+
+    Queue rejections and request errors then surface as HTTP status codes
+    instead of an error event inside a 200 stream.
+    """
+    try:
+        first = await chunks.__anext__()
+    except StopAsyncIteration:
+        first = None
+
+    async def resumed() -> AsyncIterator[str]:
+        if first is not None:
+            yield first
+            async for chunk in chunks:
+                yield chunk
+
+    return resumed()
+
+
+async def stream_response(chunks: AsyncIterator[str], stats: StreamStats):
     """
     Generator function for streaming responses
+
+    Deltas are coalesced into fewer SSE frames. If the client disconnects,
+    Starlette cancels this generator and the provider stream is cancelled
+    with it.
     """
     try:
-        async for chunk in llm_service.stream_chat_completion(request):
-            yield f"data: {json.dumps({'content': chunk})}\n\n"
-        yield "data: [DONE]\n\n"
+        async for text in coalesce(
+            chunks,
+            stats,
+            window=settings.LLM_STREAM_COALESCE_MS / 1000.0,
+            max_bytes=settings.LLM_STREAM_COALESCE_BYTES,
+            buffer_size=settings.LLM_STREAM_BUFFER
+        ):
+            stats.frames += 1
+            yield sse_frame(text)
+        stats.finish("completed")
+        if settings.LLM_STREAM_STATS_EVENT:
+            yield sse_event("stats", stats.to_dict())
+        yield DONE_FRAME
     except Exception as e:
+        stats.finish("failed")
         error_data = {"error": str(e)}
         yield f"data: {json.dumps(error_data)}\n\n"
+    finally:
+        stats.finish("disconnected")
+        llm_service.stream_metrics.record(stats)
+
+
+@router.post("/batch")
+async def batch_completion(request: ChatBatchRequest):
+    """
+    Complete many chat requests with bounded parallelism
+
+    By default results stream back as NDJSON, one line per request in
+    completion order (each carries its index, response or error, and
+    duration). With background=true the batch runs as a job whose progress
+    and results are polled via GET /batch/{job_id}.
+    """
+    if len(request.requests) > settings.LLM_BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Batch exceeds {settings.LLM_BATCH_MAX_ITEMS} requests"
+        )
+
+    if request.background:
+        job = llm_batch_service.start_job(request.requests, request.concurrency)
+        return ChatBatchJobResponse(**job.to_dict())
+
+    async def ndjson() -> AsyncIterator[str]:
+        async for result in llm_batch_service.run(request.requests, request.concurrency):
+            yield json.dumps(result, default=str) + "\n"
+
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+
+@router.get("/batch/jobs", response_model=ChatBatchJobsResponse)
+async def list_batch_jobs():
+    """
+    List background batch jobs, newest first
+    """
+    return ChatBatchJobsResponse(jobs=llm_batch_service.list_jobs())
+
+
+@router.get("/batch/{job_id}", response_model=ChatBatchJobResponse)
+async def get_batch_job(job_id: str, offset: int = 0):
+    """
+    Get batch job progress and its results from offset onward (completion order)
+    """
+    job = llm_batch_service.get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail=f"Batch job not found: {job_id}")
+    return ChatBatchJobResponse(**job.to_dict(offset=max(0, offset)))
+
+
+@router.delete("/batch/{job_id}", response_model=ChatBatchJobResponse)
+async def cancel_batch_job(job_id: str):
+    """
+    Cancel a running batch job; finished results are kept
+    """
+    job = llm_batch_service.cancel_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail=f"Batch job not found: {job_id}")
+    return ChatBatchJobResponse(**job.to_dict())
+
+
+@router.post("/sessions", response_model=ChatSessionResponse)
+async def create_session(request: ChatSessionCreateRequest):
+    """
+    Start a server-side conversation
+
+    The options (model, provider, sampling, compaction...) apply to every
+    turn; turns then send only the new message to /sessions/{session_id}/chat.
+    """
+    try:
+        session = await llm_session_service.create(
+            request.model_dump(include=set(SESSION_OPTIONS)),
+            request.messages
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return ChatSessionResponse(**session.to_dict(include_messages=True))
+
+
+@router.get("/sessions")
+async def get_session_stats():
+    """
+    Get session store occupancy and counters
+    """
+    return llm_session_service.stats()
+
+
+async def _get_session(session_id: str):
+    session = await llm_session_service.get(session_id)
+    if not session:
+        raise HTTPException(status_code=404, detail=f"Session not found: {session_id}")
+    return session
+
+
+@router.get("/sessions/{session_id}", response_model=ChatSessionResponse)
+async def get_session(session_id: str, messages: bool = False):
+    """
+    Get a session's options and, with messages=true, its history
+    """
+    session = await _get_session(session_id)
+    return ChatSessionResponse(**session.to_dict(include_messages=messages))
+
+
+@router.delete("/sessions/{session_id}")
+async def delete_session(session_id: str):
+    """
+    Delete a session and its history
+    """
+    if not await llm_session_service.delete(session_id):
+        raise HTTPException(status_code=404, detail=f"Session not found: {session_id}")
+    return {"deleted": session_id}
+
+
+@router.post("/sessions/{session_id}/messages", response_model=ChatSessionResponse)
+async def append_session_messages(session_id: str, request: ChatSessionAppendRequest):
+    """
+    Add messages to a session's history without requesting a completion
+    """
+    session = await _get_session(session_id)
+    try:
+        async with session.lock:
+            await llm_session_service.append(session, request.messages)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return ChatSessionResponse(**session.to_dict())
+
+
+@router.post("/sessions/{session_id}/chat", response_model=ChatResponse)
+async def session_chat(session_id: str, request: ChatSessionMessageRequest):
+    """
+    Complete the session's history plus one new message
+
+    The message and the reply are added to the history once the completion
+    (or stream) finishes successfully.
+    """
+    session = await _get_session(session_id)
+    overrides = request.model_dump(
+        include={"temperature", "max_tokens", "priority", "cache"},
+        exclude_none=True
+    )
+    try:
+        if request.stream:
+            stats = StreamStats(session.options["provider"].lower(), session.options["model"], started=time.monotonic())
+            chunks = await start_stream(llm_session_service.stream(session, request.message, overrides))
+            return StreamingResponse(
+                stream_response(chunks, stats),
+                media_type="text/event-stream"
+            )
+        else:
+            return await llm_session_service.complete(session, request.message, overrides)
+    except SchedulerRejected as e:
+        raise HTTPException(
+            status_code=429,
+            detail=str(e),
+            headers={"Retry-After": str(math.ceil(e.retry_after))}
+        )
+    except ValueError as e:
+        print(f"ValueError: {e}")
+        traceback.print_exc()
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        print(f"Exception: {e}")
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+
+@router.get("/cache", response_model=LLMCacheStatsResponse)
+async def get_cache_stats():
+    """
+    Get response cache occupancy and hit rates
+    """
+    return LLMCacheStatsResponse(**await llm_service.cache_stats())
+
+
+@router.delete("/cache")
+async def clear_cache():
+    """
+    Drop all cached completions
+    """
+    cleared = await llm_service.clear_cache()
+    return {"cleared": cleared}
+
+
+@router.get("/pool", response_model=LLMPoolStatsResponse)
+async def get_pool_stats():
+    """
+    Get provider connection pool occupancy and limits
+    """
+    return LLMPoolStatsResponse(**llm_service.pool_stats())
+
+
+@router.get("/scheduler", response_model=LLMSchedulerStatsResponse)
+async def get_scheduler_stats():
+    """
+    Get request queue depth, wait times and per-provider concurrency
+    """
+    return LLMSchedulerStatsResponse(**llm_service.scheduler_stats())
+
+
+@router.get("/resilience")
+async def get_resilience_stats():
+    """
+    Get retry, hedge and failover counters with per-model latency percentiles
+    """
+    return llm_service.resilience_stats()
+
+
+@router.get("/streams")
+async def get_stream_stats():
+    """
+    Get time-to-first-token, tokens/sec and coalescing ratio of recent streams
+    """
+    return llm_service.stream_stats()
+
+
+@router.get("/mock")
+async def get_mock_stats():
+    """
+    Get mock provider settings and counters (injected failures, generated tokens)
+    """
+    stats = llm_service.mock_stats()
+    if stats is None:
+        raise HTTPException(status_code=404, detail="Mock provider not enabled")
+    return stats
+
+
+@router.get("/stats", response_model=LLMUsageStatsResponse)
+async def get_usage_stats(group_by: Literal["model", "user"] = "model"):
+    """
+    Get token usage, estimated cost and latency/TTFT percentiles per provider:model or per user
+    """
+    return LLMUsageStatsResponse(**llm_service.usage_stats(group_by))
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """
+    Scheduler, connection pool, usage and cache metrics in the Prometheus text exposition format
+    """
+    return PlainTextResponse(
+        await llm_service.prometheus_metrics(),
+        media_type="text/plain; version=0.0.4"
+    )
 
 
 @router.get("/health")
@@ -60,6 +371,7 @@ async def health_check():
         "providers": {
             "openai": llm_service.openai_client is not None,
             "anthropic": llm_service.anthropic_client is not None,
+            "mock": llm_service.mock is not None,
         }
     }
 
@@ -80,6 +392,9 @@ async def list_models():
             "claude-3-opus-20240229",
             "claude-3-sonnet-20240229",
             "claude-3-haiku-20240307",
+        ],
+        "mock": [
+            "mock",
         ]
     }
 
@@ -88,5 +403,7 @@ async def list_models():
         available_models["openai"] = models["openai"]
     if llm_service.anthropic_client:
         available_models["anthropic"] = models["anthropic"]
+    if llm_service.mock:
+        available_models["mock"] = models["mock"]
 
     return {"models": available_models}
@@ -1,36 +1,29 @@
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
-from app.services.streamlit_service import streamlit_service
+from app.services.streamlit_service import streamlit_service, StreamlitCapacityError, DEFAULT_SESSION
 
 router = APIRouter(prefix="/api/streamlit", tags=["Streamlit"])
 
 
 class StreamlitRunRequest(BaseModel):
     code: str
+    restart: bool = False  # start a fresh process even if the app is running
 
 
 @router.post("/run")
 async def run_streamlit(request: StreamlitRunRequest):
     """
-    Save and run a Streamlit app
+    Save and run a Streamlit app (in the default session)
     """
-    try:
-        result = streamlit_service.run(request.code)
-        return result
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    return await run_session(DEFAULT_SESSION, request)
 
 
 @router.post("/stop")
 async def stop_streamlit():
     """
-    Stop the running Streamlit app
+    Stop the running Streamlit app (in the default session)
     """
-    try:
-        result = streamlit_service.stop()
-        return result
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    return await stop_session(DEFAULT_SESSION)
 
 
 @router.post("/save")
@@ -40,16 +33,82 @@ async def save_streamlit_code(request: StreamlitRunRequest):
     Streamlit's file watcher will detect the change and auto-reload.
     This enables hot-reloading functionality.
     """
+    return await save_session_code(DEFAULT_SESSION, request)
+
+
+@router.get("/status")
+async def get_status():
+    """
+    Get the status of the Streamlit app (in the default session)
+    """
+    return streamlit_service.status()
+
+
+@router.post("/sessions")
+async def create_session():
+    """
+    Create an isolated app session with its own process, directory and port
+    """
+    session = streamlit_service.create_session()
+    return session.to_dict()
+
+
+@router.get("/sessions")
+async def list_sessions():
+    """
+    List app sessions
+    """
+    return {"sessions": streamlit_service.list_sessions()}
+
+
+def _get_session(session_id: str):
+    session = streamlit_service.get_session(session_id)
+    if not session:
+        raise HTTPException(status_code=404, detail=f"Streamlit session not found: {session_id}")
+    return session
+
+
+@router.post("/sessions/{session_id}/run")
+async def run_session(session_id: str, request: StreamlitRunRequest):
+    """
+    Save and run a session's app
+    """
+    _get_session(session_id)
+    try:
+        return await streamlit_service.run(request.code, session_id, restart=request.restart)
+    except StreamlitCapacityError as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/sessions/{session_id}/stop")
+async def stop_session(session_id: str):
+    """
+    Stop a session's app; the session can be run again
+    """
+    _get_session(session_id)
+    try:
+        return await streamlit_service.stop(session_id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/sessions/{session_id}/save")
+async def save_session_code(session_id: str, request: StreamlitRunRequest):
+    """
+    Save code to a running session's app.py without restarting Streamlit
+    """
+    session = _get_session(session_id)
     try:
         # Only save if Streamlit is running
-        status = streamlit_service.status()
-        if not status.get("running"):
+        if not session.running:
             raise HTTPException(
                 status_code=400,
                 detail="Streamlit is not running. Use /run endpoint first."
             )
 
-        streamlit_service.save_code(request.code)
+        streamlit_service.save_code(request.code, session_id)
         return {
             "status": "saved",
             "message": "Code saved. Streamlit will auto-reload."
@@ -60,9 +119,44 @@ async def save_streamlit_code(request: StreamlitRunRequest):
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@router.get("/status")
-async def get_status():
+@router.get("/sessions/{session_id}/status")
+async def get_session_status(session_id: str):
     """
-    Get the status of the Streamlit app
+    Get the status of a session's app (also keeps the session from being reaped as idle)
     """
-    return streamlit_service.status()
+    _get_session(session_id)
+    return streamlit_service.status(session_id)
+
+
+@router.delete("/sessions/{session_id}")
+async def delete_session(session_id: str):
+    """
+    Stop a session's app and remove the session
+    """
+    if not await streamlit_service.delete_session(session_id):
+        raise HTTPException(status_code=404, detail=f"Streamlit session not found: {session_id}")
+    return {"deleted": session_id}
+
+
+@router.get("/pool")
+async def get_pool_stats():
+    """
+    Get warm worker pool occupancy, warm/cold start counts and session totals
+    """
+    return streamlit_service.pool_stats()
+
+
+@router.get("/packages")
+async def get_package_stats():
+    """
+    Get wheel cache size, pip run counts, recently failed package installs and import analysis cache counts
+    """
+    return streamlit_service.package_stats()
+
+
+@router.delete("/packages/failures")
+async def clear_package_failures():
+    """
+    Forget failed package installs so the next run retries them
+    """
+    return {"cleared": streamlit_service.installer.forget_failures()}
@@ -0,0 +1,159 @@
+"""
+Column-wise Apache Arrow / Parquet encoding of pyodbc result batches
+"""
+import datetime
+import decimal
+import io
+from typing import Any, List, Optional, Sequence
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+ARROW_STREAM_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+PARQUET_MEDIA_TYPE = "application/vnd.apache.parquet"
+
+# Accept header values that select each columnar format
+ACCEPT_FORMATS = {
+    ARROW_STREAM_MEDIA_TYPE: "arrow",
+    PARQUET_MEDIA_TYPE: "parquet",
+    "application/x-parquet": "parquet",
+}
+
+# IPC end-of-stream marker: continuation token followed by a zero length
+_IPC_EOS = b"\xff\xff\xff\xff\x00\x00\x00\x00"
+
+
+def _require_pyarrow() -> None:
+    if pa is None:
+        raise ValueError("pyarrow is not installed; Arrow and Parquet formats are unavailable")
+
+
+def format_from_accept(accept: Optional[str]) -> Optional[str]:
+    """Return 'arrow' or 'parquet' if the Accept header asks for one, else None"""
+    if not accept:
+        return None
+    for part in accept.split(","):
+        media_type = part.split(";")[0].strip().lower()
+        if media_type in ACCEPT_FORMATS:
+            return ACCEPT_FORMATS[media_type]
+    return None
+
+
+def _arrow_type(type_code: Any, precision: Optional[int], scale: Optional[int]) -> "pa.DataType":
+    """Map a pyodbc cursor.description type code to an Arrow type"""
+    if type_code is bool:
+        return pa.bool_()
+    if type_code is int:
+        return pa.int64()
+    if type_code is float:
+        return pa.float64()
+    if type_code is decimal.Decimal and precision and 0 < precision <= 38:
+        return pa.decimal128(precision, scale or 0)
+    if type_code is datetime.datetime:
+        return pa.timestamp("us")
+    if type_code is datetime.date:
+        return pa.date32()
+    if type_code is datetime.time:
+        return pa.time64("us")
+    if type_code in (bytes, bytearray):
+        return pa.binary()
+    return pa.string()
+
+
+def arrow_schema(description: Sequence[tuple]) -> "pa.Schema":
+    """Build an Arrow schema from a pyodbc cursor.description"""
+    _require_pyarrow()
+    return pa.schema([
+        pa.field(column[0], _arrow_type(column[1], column[4], column[5]), nullable=True)
+        for column in description
+    ])
+
+
+def record_batch(schema: "pa.Schema", rows: List[Any]) -> "pa.RecordBatch":
+    """Transpose a fetchmany() chunk into columns and build one RecordBatch"""
+    columns = list(zip(*rows)) if rows else [()] * len(schema)
+    arrays = []
+    for field, values in zip(schema, columns):
+        if pa.types.is_string(field.type):
+            values = [v if v is None or isinstance(v, str) else str(v) for v in values]
+        arrays.append(pa.array(values, type=field.type))
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+class ArrowStreamEncoder:
+    """Encode result batches as an Arrow IPC stream, one message per batch"""
+
+    media_type = ARROW_STREAM_MEDIA_TYPE
+
+    def __init__(self, description: Sequence[tuple]) -> None:
+        self.schema = arrow_schema(description)
+
+    def begin(self) -> bytes:
+        return self.schema.serialize().to_pybytes()
+
+    def encode(self, rows: List[Any]) -> bytes:
+        return record_batch(self.schema, rows).serialize().to_pybytes()
+
+    def end(self) -> bytes:
+        return _IPC_EOS
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file object that buffers bytes until drained"""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data: Any) -> int:
+        chunk = bytes(data)
+        self._chunks.append(chunk)
+        self._position += len(chunk)
+        return len(chunk)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+class ParquetEncoder:
+    """Encode result batches as a Parquet file, one row group per batch"""
+
+    media_type = PARQUET_MEDIA_TYPE
+
+    def __init__(self, description: Sequence[tuple], compression: str = "snappy") -> None:
+        self.schema = arrow_schema(description)
+        self._sink = _ChunkSink()
+        self._writer = pq.ParquetWriter(self._sink, self.schema, compression=compression)
+
+    def begin(self) -> bytes:
+        return self._sink.drain()
+
+    def encode(self, rows: List[Any]) -> bytes:
+        self._writer.write_batch(record_batch(self.schema, rows))
+        return self._sink.drain()
+
+    def end(self) -> bytes:
+        self._writer.close()
+        return self._sink.drain()
+
+
+def columnar_encoder(result_format: str, description: Sequence[tuple]):
+    """Create the encoder for 'arrow' or 'parquet'"""
+    if result_format == "arrow":
+        return ArrowStreamEncoder(description)
+    if result_format == "parquet":
+        return ParquetEncoder(description)
+    raise ValueError(f"Unsupported result format: {result_format}")
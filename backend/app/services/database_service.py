@@ -1,11 +1,492 @@
 import pyodbc
-from typing import List, Dict, Any, Optional
+import asyncio
+import base64
+import contextvars
+import datetime
+import decimal
+import functools
+import json
+import re
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import (
+    List, Dict, Any, Optional, Deque, Iterator, AsyncIterator, ContextManager, Callable, Tuple, TypeVar
+)
 from app.config import settings
+from app.services.query_cache import QueryCache, extract_tables, is_cacheable
+from app.services.query_metrics import QueryMetrics, QueryTimer
+from app.services.schema_catalog import SchemaCatalog, CatalogTable, split_table_name
+
+T = TypeVar("T")
+
+# Loads every base table with its columns in a single round trip
+CATALOG_QUERY = """
+SELECT
+    t.TABLE_SCHEMA,
+    t.TABLE_NAME,
+    c.COLUMN_NAME,
+    c.DATA_TYPE,
+    c.IS_NULLABLE,
+    c.CHARACTER_MAXIMUM_LENGTH
+FROM INFORMATION_SCHEMA.TABLES t
+LEFT JOIN INFORMATION_SCHEMA.COLUMNS c
+    ON c.TABLE_SCHEMA = t.TABLE_SCHEMA AND c.TABLE_NAME = t.TABLE_NAME
+WHERE t.TABLE_TYPE = 'BASE TABLE'
+ORDER BY t.TABLE_SCHEMA, t.TABLE_NAME, c.ORDINAL_POSITION
+"""
+
+_SCHEMA_CHANGE = re.compile(r"^\s*(?:CREATE|ALTER|DROP)\s+TABLE\b|\bsp_rename\b", re.IGNORECASE)
+
+
+class QueryTimeoutError(Exception):
+    """Raised when a query exceeds its per-request timeout"""
+
+
+class QueryCancelledError(Exception):
+    """Raised when a query is cancelled before or while it runs"""
+
+
+class CancelToken:
+    """
+    Links an async caller to the pyodbc cursor running its query
+
+    The worker thread binds its active cursor; the event loop calls cancel()
+    on timeout or client disconnect, which issues SQLCancel on that cursor.
+    """
+
+    def __init__(self) -> None:
+        self.cancelled = False
+        self._cursor: Optional[pyodbc.Cursor] = None
+        self._lock = threading.Lock()
+
+    def bind(self, cursor: pyodbc.Cursor) -> None:
+        with self._lock:
+            if self.cancelled:
+                raise QueryCancelledError("Query was cancelled")
+            self._cursor = cursor
+
+    def unbind(self) -> None:
+        with self._lock:
+            self._cursor = None
+
+    def cancel(self) -> None:
+        with self._lock:
+            self.cancelled = True
+            cursor = self._cursor
+        if cursor is not None:
+            try:
+                cursor.cancel()
+            except pyodbc.Error:
+                pass
+
+
+# Cancel token for the query running in the current worker thread
+_cancel_token: contextvars.ContextVar[Optional[CancelToken]] = contextvars.ContextVar(
+    "mssql_cancel_token", default=None
+)
+
+
+def encode_continuation_token(state: Dict[str, Any]) -> str:
+    """Encode pagination state as an opaque URL-safe token"""
+    payload = json.dumps(state, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(payload).decode("ascii")
+
+
+# Key value types JSON cannot represent, tagged so tokens decode to the same type
+_KEY_ENCODERS: Dict[type, Tuple[str, Callable[[Any], str]]] = {
+    decimal.Decimal: ("decimal", str),
+    datetime.datetime: ("datetime", datetime.datetime.isoformat),
+    datetime.date: ("date", datetime.date.isoformat),
+    datetime.time: ("time", datetime.time.isoformat),
+    bytes: ("bytes", lambda value: base64.b64encode(value).decode("ascii")),
+    bytearray: ("bytes", lambda value: base64.b64encode(value).decode("ascii")),
+    uuid.UUID: ("uuid", str),
+}
+_KEY_DECODERS: Dict[str, Callable[[str], Any]] = {
+    "decimal": decimal.Decimal,
+    "datetime": datetime.datetime.fromisoformat,
+    "date": datetime.date.fromisoformat,
+    "time": datetime.time.fromisoformat,
+    "bytes": base64.b64decode,
+    "uuid": uuid.UUID,
+}
+
+
+def encode_key_value(value: Any) -> Any:
+    """Keyset position as a JSON value, type-tagged unless JSON keeps its type"""
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    encoder = _KEY_ENCODERS.get(type(value))
+    if encoder is None:
+        raise ValueError(f"key_column values of type {type(value).__name__} cannot be used for keyset pagination")
+    tag, to_text = encoder
+    return {"type": tag, "value": to_text(value)}
+
+
+def decode_key_value(value: Any) -> Any:
+    """Inverse of encode_key_value"""
+    if not isinstance(value, dict):
+        return value
+    decoder = _KEY_DECODERS.get(value.get("type"))
+    if decoder is None or not isinstance(value.get("value"), str):
+        raise ValueError("Invalid continuation token")
+    try:
+        return decoder(value["value"])
+    except (ValueError, decimal.InvalidOperation):
+        raise ValueError("Invalid continuation token")
+
+
+def decode_continuation_token(token: str) -> Dict[str, Any]:
+    """Decode a token produced by encode_continuation_token"""
+    try:
+        state = json.loads(base64.urlsafe_b64decode(token.encode("ascii")))
+    except (ValueError, UnicodeError):
+        raise ValueError("Invalid continuation token")
+    if not isinstance(state, dict):
+        raise ValueError("Invalid continuation token")
+    return state
+
+
+# Structured filter operators that take a single value
+_COMPARISON_OPERATORS = {
+    "eq": "=",
+    "ne": "<>",
+    "lt": "<",
+    "le": "<=",
+    "gt": ">",
+    "ge": ">=",
+    "like": "LIKE",
+    "not_like": "NOT LIKE",
+}
+
+
+def quote_identifier(name: str) -> str:
+    """Quote a SQL Server identifier with brackets"""
+    return "[" + name.replace("]", "]]") + "]"
+
+
+def compile_filter(column_sql: str, op: str, value: Any) -> Tuple[str, List[Any]]:
+    """
+    Compile one (column, operator, value) predicate to parameterized SQL
+
+    Returns:
+        Tuple of (condition text, parameters)
+    """
+    if op in _COMPARISON_OPERATORS:
+        if value is None:
+            raise ValueError(f"Filter on {column_sql} with '{op}' needs a value (use is_null for NULL)")
+        return f"{column_sql} {_COMPARISON_OPERATORS[op]} ?", [value]
+    if op in ("in", "not_in"):
+        if not isinstance(value, list) or not value:
+            raise ValueError(f"Filter on {column_sql} with '{op}' needs a non-empty list")
+        markers = ", ".join("?" for _ in value)
+        return f"{column_sql} {'NOT IN' if op == 'not_in' else 'IN'} ({markers})", list(value)
+    if op == "between":
+        if not isinstance(value, list) or len(value) != 2:
+            raise ValueError(f"Filter on {column_sql} with 'between' needs [low, high]")
+        return f"{column_sql} BETWEEN ? AND ?", list(value)
+    if op == "is_null":
+        return f"{column_sql} IS NULL", []
+    if op == "is_not_null":
+        return f"{column_sql} IS NOT NULL", []
+    raise ValueError(f"Unsupported filter operator: {op}")
+
+
+@contextmanager
+def _cancellable(cursor: pyodbc.Cursor) -> Iterator[pyodbc.Cursor]:
+    """Bind cursor to the current cancel token (if any) for the duration of the block"""
+    token = _cancel_token.get()
+    if token is None:
+        yield cursor
+        return
+    token.bind(cursor)
+    try:
+        yield cursor
+    finally:
+        token.unbind()
+
+
+def _report_close_error(future: Future) -> None:
+    """Surface errors from releasing a stream's cursor and connection in the background"""
+    if future.cancelled():
+        return
+    error = future.exception()
+    if error is not None:
+        print(f"Warning: Failed to close query stream: {error}")
+
+
+class PooledConnection:
+    """A pyodbc connection tracked by the pool"""
+
+    __slots__ = ("connection", "created_at", "last_used_at")
+
+    def __init__(self, connection: pyodbc.Connection) -> None:
+        self.connection = connection
+        self.created_at = time.monotonic()
+        self.last_used_at = self.created_at
+
+
+class ConnectionPool:
+    """
+    Thread-safe pool of reusable pyodbc connections
+
+    Connections are handed out LIFO so a small set stays hot, validated on
+    checkout, and recycled once they exceed the idle timeout or max lifetime.
+    """
+
+    def __init__(
+        self,
+        connection_string: str,
+        min_size: int = 1,
+        max_size: int = 10,
+        idle_timeout: float = 300.0,
+        max_lifetime: float = 1800.0,
+        acquire_timeout: float = 30.0,
+        pre_ping: bool = True
+    ) -> None:
+        if max_size < 1:
+            raise ValueError("Pool max_size must be at least 1")
+
+        self.connection_string = connection_string
+        self.min_size = max(0, min(min_size, max_size))
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.max_lifetime = max_lifetime
+        self.acquire_timeout = acquire_timeout
+        self.pre_ping = pre_ping
+
+        self._idle: Deque[PooledConnection] = deque()
+        self._size = 0
+        self._waiting = 0
+        self._closed = False
+        self._condition = threading.Condition()
+
+        # Statistics
+        self._acquired_total = 0
+        self._created_total = 0
+        self._discarded_total = 0
+        self._timeouts_total = 0
+        self._wait_time_total = 0.0
+        self._wait_time_max = 0.0
+
+    def _connect(self) -> PooledConnection:
+        """Open a new physical connection"""
+        try:
+            connection = pyodbc.connect(self.connection_string)
+        except pyodbc.Error as e:
+            raise Exception(f"Failed to connect to database: {str(e)}")
+        return PooledConnection(connection)
+
+    def _is_expired(self, pooled: PooledConnection, now: float) -> bool:
+        if self.max_lifetime and now - pooled.created_at > self.max_lifetime:
+            return True
+        if self.idle_timeout and now - pooled.last_used_at > self.idle_timeout:
+            return True
+        return False
+
+    def _is_healthy(self, pooled: PooledConnection) -> bool:
+        """Run a trivial query to make sure the connection is still usable"""
+        try:
+            cursor = pooled.connection.cursor()
+            cursor.execute("SELECT 1")
+            cursor.fetchone()
+            cursor.close()
+            return True
+        except pyodbc.Error:
+            return False
+
+    def _close_physical(self, pooled: PooledConnection) -> None:
+        try:
+            pooled.connection.close()
+        except pyodbc.Error:
+            pass
+
+    def _prune_idle(self, now: float) -> List[PooledConnection]:
+        """Remove expired idle connections beyond min_size (caller holds the lock)"""
+        expired: List[PooledConnection] = []
+        kept: Deque[PooledConnection] = deque()
+        for pooled in self._idle:
+            if self._is_expired(pooled, now) and self._size - len(expired) > self.min_size:
+                expired.append(pooled)
+            else:
+                kept.append(pooled)
+        self._idle = kept
+        self._size -= len(expired)
+        self._discarded_total += len(expired)
+        return expired
+
+    def acquire(self) -> PooledConnection:
+        """Check out a connection, waiting up to acquire_timeout for one to free up"""
+        started = time.monotonic()
+        deadline = started + self.acquire_timeout
+
+        while True:
+            pooled: Optional[PooledConnection] = None
+            create = False
+
+            with self._condition:
+                if self._closed:
+                    raise Exception("Connection pool is closed")
+
+                expired = self._prune_idle(time.monotonic())
+
+                while not self._idle and self._size >= self.max_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._timeouts_total += 1
+                        raise Exception(
+                            f"Timed out after {self.acquire_timeout}s waiting for a database connection "
+                            f"(pool size {self.max_size})"
+                        )
+                    self._waiting += 1
+                    try:
+                        self._condition.wait(remaining)
+                    finally:
+                        self._waiting -= 1
+                    if self._closed:
+                        raise Exception("Connection pool is closed")
+
+                if self._idle:
+                    pooled = self._idle.pop()
+                else:
+                    self._size += 1
+                    create = True
+
+            for stale in expired:
+                self._close_physical(stale)
+
+            if create:
+                try:
+                    pooled = self._connect()
+                except Exception:
+                    with self._condition:
+                        self._size -= 1
+                        self._condition.notify()
+                    raise
+                with self._condition:
+                    self._created_total += 1
+            else:
+                assert pooled is not None
+                now = time.monotonic()
+                if self._is_expired(pooled, now) or (self.pre_ping and not self._is_healthy(pooled)):
+                    self._discard(pooled)
+                    continue
+
+            waited = time.monotonic() - started
+            with self._condition:
+                self._acquired_total += 1
+                self._wait_time_total += waited
+                self._wait_time_max = max(self._wait_time_max, waited)
+            return pooled
+
+    def release(self, pooled: PooledConnection) -> None:
+        """Return a connection to the pool, discarding it if it cannot be reset"""
+        try:
+            pooled.connection.rollback()
+        except pyodbc.Error:
+            self._discard(pooled)
+            return
+
+        pooled.last_used_at = time.monotonic()
+        with self._condition:
+            if self._closed:
+                self._size -= 1
+            else:
+                self._idle.append(pooled)
+                self._condition.notify()
+                return
+        self._close_physical(pooled)
+
+    def _discard(self, pooled: PooledConnection) -> None:
+        self._close_physical(pooled)
+        with self._condition:
+            self._size -= 1
+            self._discarded_total += 1
+            self._condition.notify()
+
+    @contextmanager
+    def connection(self) -> Iterator[pyodbc.Connection]:
+        """Context manager that checks a connection out and always returns it"""
+        pooled = self.acquire()
+        try:
+            yield pooled.connection
+        finally:
+            self.release(pooled)
+
+    def warm(self) -> None:
+        """Open connections until the pool holds min_size of them"""
+        while True:
+            with self._condition:
+                if self._closed or self._size >= self.min_size:
+                    return
+                self._size += 1
+            try:
+                pooled = self._connect()
+            except Exception:
+                with self._condition:
+                    self._size -= 1
+                raise
+            with self._condition:
+                self._created_total += 1
+                self._idle.append(pooled)
+                self._condition.notify()
+
+    def close(self) -> None:
+        """Close all idle connections and refuse further checkouts"""
+        with self._condition:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+            self._size -= len(idle)
+            self._condition.notify_all()
+        for pooled in idle:
+            self._close_physical(pooled)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return pool occupancy and wait-time statistics"""
+        with self._condition:
+            idle = len(self._idle)
+            return {
+                "size": self._size,
+                "idle": idle,
+                "in_use": self._size - idle,
+                "waiting": self._waiting,
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                "acquired_total": self._acquired_total,
+                "created_total": self._created_total,
+                "discarded_total": self._discarded_total,
+                "timeouts_total": self._timeouts_total,
+                "wait_time_total": round(self._wait_time_total, 6),
+                "wait_time_avg": round(self._wait_time_total / self._acquired_total, 6)
+                if self._acquired_total else 0.0,
+                "wait_time_max": round(self._wait_time_max, 6),
+            }
 
 
 class DatabaseService:
     def __init__(self) -> None:
         self.connection_string: Optional[str] = None
+        self.pool: Optional[ConnectionPool] = None
+        self.cache = QueryCache(
+            max_bytes=settings.MSSQL_QUERY_CACHE_MAX_BYTES,
+            default_ttl=settings.MSSQL_QUERY_CACHE_TTL,
+            max_entry_bytes=settings.MSSQL_QUERY_CACHE_MAX_ENTRY_BYTES
+        )
+        self.catalog = SchemaCatalog()
+        self.metrics = QueryMetrics(
+            slow_threshold=settings.MSSQL_SLOW_QUERY_THRESHOLD,
+            window=settings.MSSQL_METRICS_WINDOW,
+            max_fingerprints=settings.MSSQL_METRICS_MAX_FINGERPRINTS
+        )
+        self.executor = ThreadPoolExecutor(
+            max_workers=max(1, settings.MSSQL_EXECUTOR_WORKERS),
+            thread_name_prefix="mssql"
+        )
         self._build_connection_string()
 
     def _build_connection_string(self) -> None:
@@ -27,21 +508,126 @@ class DatabaseService:
             f"PWD={settings.MSSQL_PASSWORD}"
         )
 
-    def _get_connection(self) -> pyodbc.Connection:
-        """Get database connection"""
-        if not self.connection_string:
+        self.pool = ConnectionPool(
+            self.connection_string,
+            min_size=settings.MSSQL_POOL_MIN_SIZE,
+            max_size=settings.MSSQL_POOL_MAX_SIZE,
+            idle_timeout=settings.MSSQL_POOL_IDLE_TIMEOUT,
+            max_lifetime=settings.MSSQL_POOL_MAX_LIFETIME,
+            acquire_timeout=settings.MSSQL_POOL_ACQUIRE_TIMEOUT,
+            pre_ping=settings.MSSQL_POOL_PRE_PING
+        )
+
+    def _get_connection(self) -> ContextManager[pyodbc.Connection]:
+        """Check out a pooled database connection (use as a context manager)"""
+        if not self.pool:
             raise Exception("Database not configured. Please check MSSQL settings in .env")
 
-        try:
-            connection = pyodbc.connect(self.connection_string)
-            return connection
-        except pyodbc.Error as e:
-            raise Exception(f"Failed to connect to database: {str(e)}")
+        return self.pool.connection()
+
+    def warm_pool(self) -> None:
+        """Pre-open the minimum number of pooled connections"""
+        if self.pool:
+            self.pool.warm()
+
+    def close(self) -> None:
+        """Close all pooled connections and stop the worker threads"""
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        if self.pool:
+            self.pool.close()
+
+    def cache_stats(self) -> Dict[str, Any]:
+        """Return result cache statistics"""
+        return {"enabled": settings.MSSQL_QUERY_CACHE_ENABLED, **self.cache.stats()}
+
+    def invalidate_cache(
+        self,
+        tables: Optional[List[str]] = None,
+        query: Optional[str] = None,
+        params: Optional[tuple] = None
+    ) -> int:
+        """
+        Invalidate cached results
+
+        Drops the entry for query+params and/or every entry tagged with one of
+        tables; with neither argument the whole cache is cleared.
+
+        Returns:
+            Number of entries removed
+        """
+        if not tables and not query:
+            return self.cache.clear()
+
+        removed = 0
+        if query:
+            removed += int(self.cache.invalidate(self.cache.make_key(query, params)))
+        if tables:
+            removed += self.cache.invalidate_tables(tables)
+        return removed
+
+    def pool_stats(self) -> Dict[str, Any]:
+        """Return connection pool statistics"""
+        if not self.pool:
+            return {"configured": False}
+        return {"configured": True, **self.pool.stats()}
+
+    def query_stats(self, limit: Optional[int] = None, sort: str = "total_time") -> Dict[str, Any]:
+        """Return per-fingerprint query timings alongside pool and cache statistics"""
+        return {
+            **self.metrics.stats(limit=limit, sort=sort),
+            "pool": self.pool_stats(),
+            "cache": self.cache_stats(),
+        }
+
+    def reset_query_stats(self) -> None:
+        """Clear accumulated query timings"""
+        self.metrics.reset()
+
+    def prometheus_metrics(self) -> str:
+        """Render query, pool and cache metrics in the Prometheus text exposition format"""
+        lines = self.metrics.prometheus_lines()
+
+        pool = self.pool_stats()
+        if pool["configured"]:
+            for name, key, kind in (
+                ("mssql_pool_size", "size", "gauge"),
+                ("mssql_pool_idle", "idle", "gauge"),
+                ("mssql_pool_in_use", "in_use", "gauge"),
+                ("mssql_pool_waiting", "waiting", "gauge"),
+                ("mssql_pool_acquired_total", "acquired_total", "counter"),
+                ("mssql_pool_timeouts_total", "timeouts_total", "counter"),
+                ("mssql_pool_wait_seconds_total", "wait_time_total", "counter"),
+            ):
+                lines += [f"# TYPE {name} {kind}", f"{name} {pool[key]}"]
+
+        cache = self.cache.stats()
+        for name, key, kind in (
+            ("mssql_cache_entries", "entries", "gauge"),
+            ("mssql_cache_bytes", "bytes", "gauge"),
+            ("mssql_cache_hits_total", "hits", "counter"),
+            ("mssql_cache_misses_total", "misses", "counter"),
+            ("mssql_cache_evictions_total", "evictions", "counter"),
+        ):
+            lines += [f"# TYPE {name} {kind}", f"{name} {cache[key]}"]
+
+        return "\n".join(lines) + "\n"
+
+    def _cache_mode(self, query: str, cache_mode: Optional[str]) -> str:
+        """Resolve the effective cache mode ('use', 'refresh' or 'skip') for a query"""
+        if not is_cacheable(query):
+            return "skip"
+        if cache_mode is None:
+            return "use" if settings.MSSQL_QUERY_CACHE_ENABLED else "skip"
+        if cache_mode not in ("use", "refresh", "skip"):
+            raise ValueError(f"Unsupported cache mode: {cache_mode}")
+        return cache_mode
 
     def execute_query(
         self,
         query: str,
-        params: Optional[tuple] = None
+        params: Optional[tuple] = None,
+        cache_mode: Optional[str] = None,
+        cache_ttl: Optional[float] = None
     ) -> List[Dict[str, Any]]:
         """
         Execute a SELECT query and return results as list of dictionaries
@@ -49,46 +635,338 @@ class DatabaseService:
         Args:
             query: SQL query to execute
             params: Optional query parameters for parameterized queries
+            cache_mode: 'use' (read/write the result cache), 'refresh' (re-run
+                and overwrite), 'skip' (bypass); None follows MSSQL_QUERY_CACHE_ENABLED
+            cache_ttl: Seconds to keep this result cached (None = default TTL)
 
         Returns:
             List of dictionaries where keys are column names
         """
-        connection = self._get_connection()
+        mode = self._cache_mode(query, cache_mode)
+        if mode == "skip":
+            results = self._execute(query, params)
+            if not is_cacheable(query):
+                # Writes drop cached reads of the tables they touch
+                tables = extract_tables(query)
+                if tables:
+                    self.cache.invalidate_tables(tables)
+                if _SCHEMA_CHANGE.search(query):
+                    self.catalog.invalidate()
+            return results
+
+        key = self.cache.make_key(query, params)
+        if mode == "use":
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+
+        results = self._execute(query, params)
+        self.cache.put(key, results, extract_tables(query), ttl=cache_ttl)
+        return results
+
+    def _execute(self, query: str, params: Optional[tuple] = None) -> List[Dict[str, Any]]:
+        """Run a query on a pooled connection and convert rows to dictionaries"""
+        timer = QueryTimer()
+        row_count = 0
+        failed = True
         try:
-            cursor = connection.cursor()
+            with self._get_connection() as connection:
+                timer.lap("connect")
+                try:
+                    with _cancellable(connection.cursor()) as cursor:
+                        if params:
+                            cursor.execute(query, params)
+                        else:
+                            cursor.execute(query)
+                        timer.lap("execute")
 
-            if params:
-                cursor.execute(query, params)
-            else:
-                cursor.execute(query)
+                        # Get column names
+                        columns = [column[0] for column in cursor.description] if cursor.description else []
 
-            # Get column names
-            columns = [column[0] for column in cursor.description] if cursor.description else []
+                        # Fetch all rows
+                        rows = cursor.fetchall()
+                        timer.lap("fetch")
 
-            # Fetch all rows
-            rows = cursor.fetchall()
+                    # Convert to list of dictionaries
+                    results: List[Dict[str, Any]] = []
+                    for row in rows:
+                        row_dict: Dict[str, Any] = {}
+                        for i, column in enumerate(columns):
+                            row_dict[column] = row[i]
+                        results.append(row_dict)
+                    timer.lap("serialize")
 
-            # Convert to list of dictionaries
-            results: List[Dict[str, Any]] = []
-            for row in rows:
-                row_dict: Dict[str, Any] = {}
-                for i, column in enumerate(columns):
-                    row_dict[column] = row[i]
-                results.append(row_dict)
+                    row_count = len(results)
+                    failed = False
+                    return results
 
-            return results
+                except pyodbc.Error as e:
+                    raise Exception(f"Query execution failed: {str(e)}")
+        finally:
+            self.metrics.record(query, timer.phases, row_count, error=failed)
 
-        except pyodbc.Error as e:
-            raise Exception(f"Query execution failed: {str(e)}")
+    def execute_batch(
+        self,
+        statements: Optional[List[Tuple[str, Optional[tuple]]]] = None,
+        statement: Optional[str] = None,
+        param_rows: Optional[List[tuple]] = None,
+        chunk_size: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Run many statements on one connection inside a single transaction
+
+        Either runs each (query, params) in statements in order, or runs one
+        parameterized statement over param_rows with executemany in chunks of
+        chunk_size (using fast_executemany). Everything is committed at the
+        end; any failure rolls the whole batch back.
+
+        Returns:
+            Dictionary with per-batch timings and overall throughput
+        """
+        if bool(statements) == bool(statement):
+            raise ValueError("Provide either statements or statement with param_rows")
+        if statement and not param_rows:
+            raise ValueError("param_rows is required with statement")
+
+        chunk_size = chunk_size or settings.MSSQL_BATCH_CHUNK_SIZE
+        queries = [statement] if statement else [query for query, _ in statements]
+        timings: List[Dict[str, Any]] = []
+        started = time.monotonic()
+        batch_started = started
+        index = 0
+
+        with self._get_connection() as connection:
+            try:
+                with _cancellable(connection.cursor()) as cursor:
+                    if statement:
+                        cursor.fast_executemany = settings.MSSQL_FAST_EXECUTEMANY
+                        for index, start in enumerate(range(0, len(param_rows), chunk_size)):
+                            chunk = param_rows[start:start + chunk_size]
+                            batch_started = time.monotonic()
+                            cursor.executemany(statement, chunk)
+                            timings.append({
+                                "index": index,
+                                "rows": len(chunk),
+                                "rowcount": cursor.rowcount if cursor.rowcount >= 0 else None,
+                                "duration": round(time.monotonic() - batch_started, 6),
+                            })
+                    else:
+                        for index, (query, params) in enumerate(statements):
+                            batch_started = time.monotonic()
+                            if params:
+                                cursor.execute(query, params)
+                            else:
+                                cursor.execute(query)
+                            timings.append({
+                                "index": index,
+                                "rows": 1,
+                                "rowcount": cursor.rowcount if cursor.rowcount >= 0 else None,
+                                "duration": round(time.monotonic() - batch_started, 6),
+                            })
+                connection.commit()
+            except pyodbc.Error as e:
+                connection.rollback()
+                failed_query = statement or statements[index][0]
+                self.metrics.record(failed_query, {"execute": time.monotonic() - batch_started}, error=True)
+                raise Exception(f"Batch execution failed at batch {index}: {str(e)}")
+
+        if statement:
+            self.metrics.record(
+                statement,
+                {"execute": sum(timing["duration"] for timing in timings)},
+                sum(timing["rows"] for timing in timings)
+            )
+        else:
+            for (query, _), timing in zip(statements, timings):
+                self.metrics.record(query, {"execute": timing["duration"]}, timing["rowcount"] or 0)
+
+        # Committed writes drop cached reads and, for DDL, the schema catalog
+        tables = set().union(*(extract_tables(query) for query in queries))
+        if tables:
+            self.cache.invalidate_tables(tables)
+        if any(_SCHEMA_CHANGE.search(query) for query in queries):
+            self.catalog.invalidate()
+
+        duration = time.monotonic() - started
+        total_rows = sum(timing["rows"] for timing in timings)
+        return {
+            "batches": timings,
+            "total_rows": total_rows,
+            "duration": round(duration, 6),
+            "rows_per_second": round(total_rows / duration, 1) if duration else 0.0,
+        }
+
+    def iter_query_batches(
+        self,
+        query: str,
+        params: Optional[tuple] = None,
+        batch_size: Optional[int] = None
+    ) -> Iterator[Tuple[List[tuple], List[Any]]]:
+        """
+        Execute a query and yield its rows in fetchmany() batches
+
+        The pooled connection is held until the generator is exhausted or
+        closed. The first batch is always yielded (possibly empty) so callers
+        learn the result columns even for empty results.
+
+        Args:
+            query: SQL query to execute
+            params: Optional query parameters for parameterized queries
+            batch_size: Rows per batch (defaults to MSSQL_FETCH_BATCH_SIZE)
+
+        Returns:
+            Iterator of (cursor description, list of pyodbc rows) tuples
+        """
+        batch_size = batch_size or settings.MSSQL_FETCH_BATCH_SIZE
+        timer = QueryTimer()
+        row_count = 0
+        failed = True
+
+        try:
+            with self._get_connection() as connection:
+                timer.lap("connect")
+                try:
+                    with _cancellable(connection.cursor()) as cursor:
+                        if params:
+                            cursor.execute(query, params)
+                        else:
+                            cursor.execute(query)
+                        timer.lap("execute")
+
+                        if not cursor.description:
+                            failed = False
+                            yield [], []
+                            return
+
+                        description = [tuple(column) for column in cursor.description]
+
+                        # Time spent by the consumer between batches is not charged
+                        rows = cursor.fetchmany(batch_size)
+                        timer.lap("fetch")
+                        row_count += len(rows)
+                        yield description, rows
+                        while rows:
+                            timer.restart()
+                            rows = cursor.fetchmany(batch_size)
+                            timer.lap("fetch")
+                            if rows:
+                                row_count += len(rows)
+                                yield description, rows
+                        failed = False
+
+                except pyodbc.Error as e:
+                    raise Exception(f"Query execution failed: {str(e)}")
+        except GeneratorExit:
+            # Closed early by the consumer (limit reached, client went away)
+            failed = False
+            raise
         finally:
-            connection.close()
+            self.metrics.record(query, timer.phases, row_count, error=failed)
+
+    def _resolve_table(self, table_name: str) -> CatalogTable:
+        """Validate a table name against the schema catalog"""
+        self._ensure_catalog()
+        table = self.catalog.find_table(table_name)
+        if table is None:
+            raise ValueError(
+                f"Unknown table: {table_name} (refresh the catalog if it was created recently)"
+            )
+        return table
+
+    def _resolve_column(self, table: CatalogTable, column: str) -> str:
+        """Validate a column against the schema catalog and return its canonical name"""
+        for known in table.columns:
+            if known["COLUMN_NAME"].lower() == column.strip().strip("[]").lower():
+                return known["COLUMN_NAME"]
+        raise ValueError(f"Unknown column '{column}' in table {table.schema}.{table.name}")
+
+    def build_table_query(
+        self,
+        table_name: str,
+        columns: Optional[List[str]] = None,
+        where_clause: Optional[str] = None,
+        limit: Optional[int] = None,
+        order_by: Optional[List[Tuple[str, str]]] = None,
+        offset: Optional[int] = None,
+        key_column: Optional[str] = None,
+        after_key: Any = None,
+        filters: Optional[List[Tuple[str, str, Any]]] = None
+    ) -> Tuple[str, tuple]:
+        """
+        Build the parameterized SELECT statement used by the table endpoints
+
+        Table and column names are validated against the schema catalog and
+        emitted in canonical, quoted form; every value (including the row
+        limit) is a parameter, so equivalent requests share one SQL text and
+        SQL Server reuses its cached plan. Only the free-form where_clause
+        is inlined.
+
+        With key_column the rows are ordered by that column and, when
+        after_key is given, start strictly after it (keyset pagination);
+        it cannot be combined with order_by. With offset the rows are paged
+        with OFFSET/FETCH instead of TOP.
+        """
+        if key_column and order_by:
+            raise ValueError("order_by cannot be combined with key_column (keyset pages are in key order)")
+        table = self._resolve_table(table_name)
+
+        def column_sql(column: str) -> str:
+            return quote_identifier(self._resolve_column(table, column))
+
+        # Build SELECT clause
+        select_clause = ", ".join(column_sql(column) for column in columns) if columns else "*"
+
+        # Parameters must follow the order their markers appear in the text
+        top_params: List[Any] = []
+        where_params: List[Any] = []
+        tail_params: List[Any] = []
+
+        conditions: List[str] = []
+        if where_clause:
+            conditions.append(f"({where_clause})")
+        for column, op, value in filters or []:
+            condition, condition_params = compile_filter(column_sql(column), op, value)
+            conditions.append(condition)
+            where_params.extend(condition_params)
+        if key_column and after_key is not None:
+            conditions.append(f"{column_sql(key_column)} > ?")
+            where_params.append(after_key)
+
+        # Build query
+        top_clause = ""
+        if limit and offset is None:
+            top_clause = "TOP (?) "
+            top_params.append(limit)
+
+        query = f"SELECT {top_clause}{select_clause} FROM {quote_identifier(table.schema)}.{quote_identifier(table.name)}"
+
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+
+        order_clause = ", ".join(
+            f"{column_sql(column)} {direction.upper()}" for column, direction in order_by or []
+        )
+        if key_column:
+            query += f" ORDER BY {column_sql(key_column)}"
+        elif offset is not None:
+            query += f" ORDER BY {order_clause or '(SELECT NULL)'} OFFSET ? ROWS"
+            tail_params.append(offset)
+            if limit:
+                query += " FETCH NEXT ? ROWS ONLY"
+                tail_params.append(limit)
+        elif order_clause:
+            query += f" ORDER BY {order_clause}"
+
+        return query, tuple(top_params + where_params + tail_params)
 
     def get_table_data(
         self,
         table_name: str,
         columns: Optional[List[str]] = None,
         where_clause: Optional[str] = None,
-        limit: Optional[int] = None
+        limit: Optional[int] = None,
+        order_by: Optional[List[Tuple[str, str]]] = None,
+        filters: Optional[List[Tuple[str, str, Any]]] = None
     ) -> List[Dict[str, Any]]:
         """
         Fetch data from a specific table
@@ -98,47 +976,129 @@ class DatabaseService:
             columns: List of column names to fetch (None = all columns)
             where_clause: Optional WHERE clause (e.g., "age > 25")
             limit: Optional row limit
+            order_by: Optional (column, 'asc'|'desc') pairs
+            filters: Optional (column, operator, value) predicates
 
         Returns:
             List of dictionaries containing table data
         """
-        # Build SELECT clause
-        select_clause = ", ".join(columns) if columns else "*"
+        query, params = self.build_table_query(
+            table_name, columns, where_clause, limit, order_by=order_by, filters=filters
+        )
+        return self.execute_query(query, params or None)
 
-        # Build query
-        query = f"SELECT {select_clause} FROM {table_name}"
+    def get_table_page(
+        self,
+        table_name: str,
+        page_size: int,
+        columns: Optional[List[str]] = None,
+        where_clause: Optional[str] = None,
+        order_by: Optional[List[Tuple[str, str]]] = None,
+        key_column: Optional[str] = None,
+        offset: Optional[int] = None,
+        continuation_token: Optional[str] = None,
+        filters: Optional[List[Tuple[str, str, Any]]] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Fetch one page of table data
 
-        if where_clause:
-            query += f" WHERE {where_clause}"
+        Uses keyset pagination when key_column is given (stable and cheap on
+        large tables), otherwise OFFSET/FETCH pagination.
 
-        if limit:
-            query = f"SELECT TOP {limit} {select_clause} FROM {table_name}"
-            if where_clause:
-                query += f" WHERE {where_clause}"
+        Args:
+            table_name: Name of the table to query
+            page_size: Rows per page
+            columns: List of column names to fetch (None = all columns)
+            where_clause: Optional WHERE clause
+            order_by: (column, 'asc'|'desc') pairs for offset pagination
+            key_column: Unique, indexed column for keyset pagination (rows come in
+                key order; not combinable with order_by)
+            offset: Starting offset for the first page (offset pagination)
+            continuation_token: Token returned with the previous page
+            filters: Optional (column, operator, value) predicates
+
+        Returns:
+            Tuple of (rows, token for the next page or None on the last page)
+        """
+        state = decode_continuation_token(continuation_token) if continuation_token else {}
+
+        if key_column:
+            if order_by:
+                raise ValueError("order_by cannot be combined with key_column (keyset pages are in key order)")
+            table = self._resolve_table(table_name)
+            key_column = self._resolve_column(table, key_column)
+            if columns and key_column not in [self._resolve_column(table, column) for column in columns]:
+                raise ValueError(f"key_column '{key_column}' must be one of the selected columns")
+            if state and state.get("key") != key_column:
+                raise ValueError("Continuation token does not match key_column")
+
+            query, params = self.build_table_query(
+                table_name, columns, where_clause, page_size + 1,
+                key_column=key_column, after_key=decode_key_value(state.get("after")), filters=filters
+            )
+            rows = self.execute_query(query, params or None)
+            has_more = len(rows) > page_size
+            rows = rows[:page_size]
+            next_token = encode_continuation_token(
+                {"key": key_column, "after": encode_key_value(rows[-1][key_column])}
+            ) if has_more else None
+            return rows, next_token
 
-        return self.execute_query(query)
+        start = state.get("offset", offset or 0)
+        if not isinstance(start, int) or start < 0:
+            raise ValueError("Invalid continuation token")
+
+        query, params = self.build_table_query(
+            table_name, columns, where_clause, page_size + 1,
+            order_by=order_by, offset=start, filters=filters
+        )
+        rows = self.execute_query(query, params)
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        next_token = encode_continuation_token({"offset": start + page_size}) if has_more else None
+        return rows, next_token
+
+    def refresh_catalog(self) -> Dict[str, Any]:
+        """Reload the schema catalog with one bulk INFORMATION_SCHEMA query"""
+        started = time.monotonic()
+        rows = self._execute(CATALOG_QUERY)
+        self.catalog.load(rows, duration=time.monotonic() - started)
+        return {
+            "table_count": len(self.catalog.table_names()),
+            "loaded_at": self.catalog.loaded_at,
+            "load_duration": self.catalog.load_duration,
+        }
+
+    def _ensure_catalog(self) -> None:
+        if not self.catalog.fresh:
+            self.refresh_catalog()
+
+    def get_catalog(self) -> Dict[str, Any]:
+        """Get every table and its columns from the schema catalog"""
+        self._ensure_catalog()
+        return self.catalog.snapshot()
 
     def get_tables(self) -> List[str]:
         """Get list of all tables in the database"""
-        query = """
-        SELECT TABLE_NAME
-        FROM INFORMATION_SCHEMA.TABLES
-        WHERE TABLE_TYPE = 'BASE TABLE'
-        ORDER BY TABLE_NAME
-        """
-        results = self.execute_query(query)
-        return [row["TABLE_NAME"] for row in results]
+        self._ensure_catalog()
+        return self.catalog.table_names()
 
-    def get_table_schema(self, table_name: str) -> List[Dict[str, str]]:
+    def get_table_schema(self, table_name: str) -> List[Dict[str, Any]]:
         """
         Get schema information for a specific table
 
         Args:
-            table_name: Name of the table
+            table_name: Name of the table (optionally schema-qualified)
 
         Returns:
             List of dictionaries with column information (name, type, nullable)
         """
+        self._ensure_catalog()
+        columns = self.catalog.get_columns(table_name)
+        if columns is not None:
+            return columns
+
+        # Not in the catalog: the table may have been created since the last load
         query = """
         SELECT
             COLUMN_NAME,
@@ -149,25 +1109,22 @@ class DatabaseService:
         WHERE TABLE_NAME = ?
         ORDER BY ORDINAL_POSITION
         """
-        return self.execute_query(query, (table_name,))
+        _, name = split_table_name(table_name)
+        return self._execute(query, (name,))
 
     def test_connection(self) -> Dict[str, Any]:
         """Test database connection and return connection info"""
         try:
-            connection = self._get_connection()
-            cursor = connection.cursor()
+            with self._get_connection() as connection, _cancellable(connection.cursor()) as cursor:
+                # Get database version
+                cursor.execute("SELECT @@VERSION")
+                version_row = cursor.fetchone()
+                version = version_row[0] if version_row else "Unknown"
 
-            # Get database version
-            cursor.execute("SELECT @@VERSION")
-            version_row = cursor.fetchone()
-            version = version_row[0] if version_row else "Unknown"
-
-            # Get current database
-            cursor.execute("SELECT DB_NAME()")
-            db_row = cursor.fetchone()
-            database = db_row[0] if db_row else "Unknown"
-
-            connection.close()
+                # Get current database
+                cursor.execute("SELECT DB_NAME()")
+                db_row = cursor.fetchone()
+                database = db_row[0] if db_row else "Unknown"
 
             return {
                 "connected": True,
@@ -182,5 +1139,264 @@ class DatabaseService:
                 "error": str(e)
             }
 
+    # Async API: run the blocking calls above on the bounded worker executor
+
+    async def _run(
+        self,
+        func: Callable[..., T],
+        *args: Any,
+        timeout: Optional[float] = None,
+        **kwargs: Any
+    ) -> T:
+        """
+        Run a blocking DatabaseService call on the executor
+
+        On timeout or task cancellation (e.g. client disconnect) the running
+        statement is cancelled on the server via the cursor's cancel token.
+        """
+        loop = asyncio.get_running_loop()
+        token = CancelToken()
+        context = contextvars.copy_context()
+        context.run(_cancel_token.set, token)
+
+        future = loop.run_in_executor(
+            self.executor,
+            functools.partial(context.run, func, *args, **kwargs)
+        )
+
+        if timeout is None:
+            timeout = settings.MSSQL_QUERY_TIMEOUT
+
+        try:
+            return await asyncio.wait_for(future, timeout=timeout or None)
+        except asyncio.TimeoutError:
+            token.cancel()
+            raise QueryTimeoutError(f"Query exceeded timeout of {timeout}s")
+        except asyncio.CancelledError:
+            token.cancel()
+            raise
+
+    async def execute_query_async(
+        self,
+        query: str,
+        params: Optional[tuple] = None,
+        timeout: Optional[float] = None,
+        cache_mode: Optional[str] = None,
+        cache_ttl: Optional[float] = None
+    ) -> List[Dict[str, Any]]:
+        """Async version of execute_query (cache hits are served without a thread hop)"""
+        if self._cache_mode(query, cache_mode) == "use":
+            cached = self.cache.get(self.cache.make_key(query, params))
+            if cached is not None:
+                return cached
+            # Already counted as a miss; the worker refreshes the entry
+            cache_mode = "refresh"
+
+        return await self._run(
+            self.execute_query, query, params, cache_mode, cache_ttl, timeout=timeout
+        )
+
+    async def execute_batch_async(
+        self,
+        statements: Optional[List[Tuple[str, Optional[tuple]]]] = None,
+        statement: Optional[str] = None,
+        param_rows: Optional[List[tuple]] = None,
+        chunk_size: Optional[int] = None,
+        timeout: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """Async version of execute_batch"""
+        return await self._run(
+            self.execute_batch,
+            statements,
+            statement,
+            param_rows,
+            chunk_size,
+            timeout=timeout
+        )
+
+    async def get_table_data_async(
+        self,
+        table_name: str,
+        columns: Optional[List[str]] = None,
+        where_clause: Optional[str] = None,
+        limit: Optional[int] = None,
+        order_by: Optional[List[Tuple[str, str]]] = None,
+        filters: Optional[List[Tuple[str, str, Any]]] = None,
+        timeout: Optional[float] = None
+    ) -> List[Dict[str, Any]]:
+        """Async version of get_table_data"""
+        return await self._run(
+            self.get_table_data,
+            table_name,
+            columns,
+            where_clause,
+            limit,
+            order_by,
+            filters,
+            timeout=timeout
+        )
+
+    async def get_table_page_async(
+        self,
+        table_name: str,
+        page_size: int,
+        columns: Optional[List[str]] = None,
+        where_clause: Optional[str] = None,
+        order_by: Optional[List[Tuple[str, str]]] = None,
+        key_column: Optional[str] = None,
+        offset: Optional[int] = None,
+        continuation_token: Optional[str] = None,
+        filters: Optional[List[Tuple[str, str, Any]]] = None,
+        timeout: Optional[float] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Async version of get_table_page"""
+        return await self._run(
+            self.get_table_page,
+            table_name,
+            page_size,
+            columns=columns,
+            where_clause=where_clause,
+            order_by=order_by,
+            key_column=key_column,
+            offset=offset,
+            continuation_token=continuation_token,
+            filters=filters,
+            timeout=timeout
+        )
+
+    async def stream_query_async(
+        self,
+        query: str,
+        params: Optional[tuple] = None,
+        batch_size: Optional[int] = None,
+        timeout: Optional[float] = None
+    ) -> AsyncIterator[Tuple[List[tuple], List[Any]]]:
+        """
+        Async version of iter_query_batches
+
+        Each batch is fetched on the executor; the timeout applies to every
+        individual fetch rather than to the whole stream. Closing or
+        cancelling the iterator cancels the statement and returns the
+        connection to the pool.
+        """
+        loop = asyncio.get_running_loop()
+        token = CancelToken()
+        context = contextvars.copy_context()
+        context.run(_cancel_token.set, token)
+
+        batches = self.iter_query_batches(query, params, batch_size)
+        # Serializes fetching with closing, which may run on different threads
+        batches_lock = threading.Lock()
+
+        def next_batch() -> Optional[Tuple[List[tuple], List[Any]]]:
+            with batches_lock:
+                return next(batches, None)
+
+        def close_batches() -> None:
+            with batches_lock:
+                batches.close()
+
+        if timeout is None:
+            timeout = settings.MSSQL_QUERY_TIMEOUT
+
+        exhausted = False
+        try:
+            while True:
+                future = loop.run_in_executor(self.executor, context.run, next_batch)
+                try:
+                    batch = await asyncio.wait_for(future, timeout=timeout or None)
+                except asyncio.TimeoutError:
+                    raise QueryTimeoutError(f"Query exceeded timeout of {timeout}s")
+                if batch is None:
+                    exhausted = True
+                    return
+                yield batch
+        finally:
+            if not exhausted:
+                token.cancel()
+                # Release the connection without awaiting (we may be cancelled). A
+                # fetch still running on another thread may be inside `context`,
+                # so the close gets a context of its own.
+                try:
+                    closing = self.executor.submit(contextvars.copy_context().run, close_batches)
+                except RuntimeError:
+                    pass
+                else:
+                    closing.add_done_callback(_report_close_error)
+
+    async def stream_table_data_async(
+        self,
+        table_name: str,
+        columns: Optional[List[str]] = None,
+        where_clause: Optional[str] = None,
+        limit: Optional[int] = None,
+        order_by: Optional[List[Tuple[str, str]]] = None,
+        filters: Optional[List[Tuple[str, str, Any]]] = None,
+        batch_size: Optional[int] = None,
+        timeout: Optional[float] = None
+    ) -> AsyncIterator[Tuple[List[tuple], List[Any]]]:
+        """Stream table data in batches (see stream_query_async)"""
+        # Identifier validation needs the catalog; load it off the event loop
+        await self.ensure_catalog_async(timeout=timeout)
+        query, params = self.build_table_query(
+            table_name, columns, where_clause, limit, order_by=order_by, filters=filters
+        )
+        return self.stream_query_async(query, params or None, batch_size, timeout)
+
+    async def get_tables_async(self, timeout: Optional[float] = None) -> List[str]:
+        """Async version of get_tables (answered from memory when the catalog is loaded)"""
+        if self.catalog.fresh:
+            return self.catalog.table_names()
+        return await self._run(self.get_tables, timeout=timeout)
+
+    async def get_table_schema_async(
+        self,
+        table_name: str,
+        timeout: Optional[float] = None
+    ) -> List[Dict[str, Any]]:
+        """Async version of get_table_schema (answered from memory when the catalog is loaded)"""
+        if self.catalog.fresh:
+            columns = self.catalog.get_columns(table_name)
+            if columns is not None:
+                return columns
+        return await self._run(self.get_table_schema, table_name, timeout=timeout)
+
+    async def get_catalog_async(self, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Async version of get_catalog"""
+        if self.catalog.fresh:
+            return self.catalog.snapshot()
+        return await self._run(self.get_catalog, timeout=timeout)
+
+    async def ensure_catalog_async(self, timeout: Optional[float] = None) -> None:
+        """Load the schema catalog on the executor if it is missing or stale"""
+        if not self.catalog.fresh:
+            await self._run(self._ensure_catalog, timeout=timeout)
+
+    async def refresh_catalog_async(self, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Async version of refresh_catalog"""
+        return await self._run(self.refresh_catalog, timeout=timeout)
+
+    async def refresh_catalog_periodically(self) -> None:
+        """Background task: reload the catalog every MSSQL_CATALOG_REFRESH_INTERVAL seconds"""
+        if not self.pool:
+            return
+
+        interval = settings.MSSQL_CATALOG_REFRESH_INTERVAL
+        while True:
+            try:
+                await self.refresh_catalog_async(timeout=0)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Warning: Failed to refresh schema catalog: {e}")
+
+            if interval <= 0:
+                return
+            await asyncio.sleep(interval)
+
+    async def test_connection_async(self, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Async version of test_connection"""
+        return await self._run(self.test_connection, timeout=timeout)
+
 
 database_service = DatabaseService()
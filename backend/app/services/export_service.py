@@ -0,0 +1,496 @@
+"""
+Bulk export of tables and query results to compressed CSV or Parquet
+"""
+import csv
+import io
+import numbers
+import os
+import re
+import shutil
+import threading
+import time
+import uuid
+import zlib
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Sequence, Tuple, AsyncIterator
+from app.config import settings
+from app.services.arrow_encoder import ParquetEncoder
+from app.services.database_service import database_service, quote_identifier
+from app.services.query_cache import mask_literals, top_level
+
+
+_LEADING_CTE = re.compile(r"^\s*WITH\b", re.IGNORECASE)
+_ORDER_BY = re.compile(r"\bORDER\s+BY\b", re.IGNORECASE)
+_ROW_LIMIT = re.compile(r"\b(?:TOP|OFFSET)\b", re.IGNORECASE)
+
+
+def check_derived_table(query: str) -> None:
+    """
+    Raise ValueError if SQL Server cannot use the query as a derived table
+
+    Partitioned exports wrap the source in SELECT ... FROM (query), which
+    rejects a leading CTE, ORDER BY without TOP/OFFSET, and several
+    statements.
+    """
+    masked = mask_literals(query).strip().rstrip(";")
+    if ";" in masked:
+        raise ValueError("Partitioned exports need a single statement")
+    if _LEADING_CTE.match(masked):
+        raise ValueError("Partitioned exports cannot use a query starting with a CTE (WITH); inline it as a subquery")
+    outer = top_level(masked)
+    if _ORDER_BY.search(outer) and not _ROW_LIMIT.search(outer):
+        raise ValueError("Partitioned exports cannot use a query with ORDER BY (without TOP/OFFSET); drop the ORDER BY")
+
+
+class CsvEncoder:
+    """Encode result batches as CSV, optionally gzip-compressed"""
+
+    def __init__(self, description: Sequence[tuple], compression: str = "gzip") -> None:
+        if compression not in ("gzip", "none"):
+            raise ValueError(f"Unsupported CSV compression: {compression}")
+
+        self.columns = [column[0] for column in description]
+        # Binary columns are written as hex instead of Python bytes reprs
+        self._binary_columns = [
+            index for index, column in enumerate(description) if column[1] in (bytes, bytearray)
+        ]
+        # wbits=31 produces a gzip container so the output is a valid .gz file
+        self._compressor = zlib.compressobj(wbits=31) if compression == "gzip" else None
+        self.media_type = "application/gzip" if self._compressor else "text/csv"
+
+    def _encode_rows(self, rows: List[Any]) -> bytes:
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        data = buffer.getvalue().encode("utf-8")
+        return self._compressor.compress(data) if self._compressor else data
+
+    def begin(self) -> bytes:
+        return self._encode_rows([self.columns])
+
+    def encode(self, rows: List[Any]) -> bytes:
+        if self._binary_columns:
+            converted = []
+            for row in rows:
+                values = list(row)
+                for index in self._binary_columns:
+                    if values[index] is not None:
+                        values[index] = bytes(values[index]).hex()
+                converted.append(values)
+            rows = converted
+        return self._encode_rows(rows)
+
+    def end(self) -> bytes:
+        return self._compressor.flush() if self._compressor else b""
+
+
+def create_encoder(export_format: str, compression: Optional[str], description: Sequence[tuple]):
+    """Create the encoder for an export format"""
+    if export_format == "csv":
+        return CsvEncoder(description, compression or "gzip")
+    if export_format == "parquet":
+        return ParquetEncoder(description, compression=compression or "snappy")
+    raise ValueError(f"Unsupported export format: {export_format}")
+
+
+def file_extension(export_format: str, compression: Optional[str]) -> str:
+    """File name suffix for an export format"""
+    if export_format == "csv":
+        return ".csv" if compression == "none" else ".csv.gz"
+    return ".parquet"
+
+
+class ExportCancelled(Exception):
+    """Raised inside an export when its job has been cancelled"""
+
+
+class ExportJob:
+    """Progress and throughput of a single export"""
+
+    def __init__(self, destination: str, export_format: str, compression: Optional[str], partitions: int) -> None:
+        self.id = uuid.uuid4().hex
+        self.destination = destination
+        self.format = export_format
+        self.compression = compression
+        self.partitions = partitions
+        self.status = "pending"
+        self.rows = 0
+        self.bytes = 0
+        self.files: List[str] = []
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.cancel_requested = False
+        self._lock = threading.Lock()
+
+    def start(self) -> None:
+        self.status = "running"
+        self.started_at = time.time()
+
+    def add(self, rows: int, nbytes: int) -> None:
+        if self.cancel_requested:
+            raise ExportCancelled("Export was cancelled")
+        with self._lock:
+            self.rows += rows
+            self.bytes += nbytes
+
+    def finish(self, status: str, error: Optional[str] = None) -> None:
+        self.status = status
+        self.error = error
+        self.finished_at = time.time()
+
+    @property
+    def done(self) -> bool:
+        return self.status in ("completed", "failed", "cancelled")
+
+    def to_dict(self) -> Dict[str, Any]:
+        end = self.finished_at or time.time()
+        elapsed = end - self.started_at if self.started_at else 0.0
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "destination": self.destination,
+            "format": self.format,
+            "compression": self.compression,
+            "partitions": self.partitions,
+            "rows": self.rows,
+            "bytes": self.bytes,
+            "files": list(self.files),
+            "elapsed": round(elapsed, 3),
+            "rows_per_second": round(self.rows / elapsed, 1) if elapsed else 0.0,
+            "bytes_per_second": round(self.bytes / elapsed, 1) if elapsed else 0.0,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "error": self.error,
+        }
+
+
+class ExportService:
+    def __init__(self) -> None:
+        self.export_dir = Path(settings.EXPORT_DIR)
+        self.jobs: "OrderedDict[str, ExportJob]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(
+            max_workers=max(1, settings.EXPORT_MAX_WORKERS),
+            thread_name_prefix="export"
+        )
+
+    def close(self) -> None:
+        """Cancel running exports and stop the worker threads"""
+        with self._lock:
+            for job in self.jobs.values():
+                job.cancel_requested = True
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    # Job registry
+
+    def _register(self, job: ExportJob) -> None:
+        with self._lock:
+            self.jobs[job.id] = job
+            # Forget the oldest finished jobs beyond the history limit
+            finished = [job_id for job_id, j in self.jobs.items() if j.done]
+            for job_id in finished[:max(0, len(self.jobs) - settings.EXPORT_JOB_HISTORY)]:
+                del self.jobs[job_id]
+
+    def get_job(self, job_id: str) -> Optional[ExportJob]:
+        with self._lock:
+            return self.jobs.get(job_id)
+
+    def list_jobs(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            jobs = list(self.jobs.values())
+        return [job.to_dict() for job in reversed(jobs)]
+
+    def cancel_job(self, job_id: str) -> Optional[ExportJob]:
+        job = self.get_job(job_id)
+        if job and not job.done:
+            job.cancel_requested = True
+        return job
+
+    # Source queries
+
+    def _source_query(
+        self,
+        table_name: Optional[str],
+        columns: Optional[List[str]],
+        where_clause: Optional[str],
+        query: Optional[str],
+        params: Optional[tuple]
+    ) -> Tuple[str, Optional[tuple]]:
+        if bool(table_name) == bool(query):
+            raise ValueError("Provide exactly one of table_name or query")
+        if query:
+            return query, params
+        table_query, table_params = database_service.build_table_query(table_name, columns, where_clause)
+        return table_query, table_params or None
+
+    def _source_column(self, query: str, params: Optional[tuple], column: str) -> str:
+        """Match a column of the query's result set and return its quoted name"""
+        batches = database_service.iter_query_batches(
+            f"SELECT TOP 0 * FROM ({query}) AS export_source", params
+        )
+        try:
+            description, _ = next(batches)
+        finally:
+            batches.close()
+        wanted = column.strip().strip("[]").lower()
+        for known in description:
+            if known[0].lower() == wanted:
+                return quote_identifier(known[0])
+        raise ValueError(f"Unknown partition_column '{column}' (not a column of the export source)")
+
+    def _partition_ranges(
+        self,
+        query: str,
+        params: Optional[tuple],
+        column: str,
+        partitions: int
+    ) -> List[Tuple[str, tuple]]:
+        """Split a query into range predicates over a numeric column of its result"""
+        column_sql = self._source_column(query, params, column)
+        bounds = database_service.execute_query(
+            f"SELECT MIN({column_sql}) AS low, MAX({column_sql}) AS high FROM ({query}) AS export_source",
+            params,
+            cache_mode="skip"
+        )
+        low, high = bounds[0]["low"], bounds[0]["high"]
+        base_params = tuple(params or ())
+
+        if low is None:
+            return [(query, base_params)]
+        if isinstance(low, bool) or not isinstance(low, numbers.Number) or not isinstance(high, numbers.Number):
+            raise ValueError(f"partition_column '{column}' must be numeric")
+
+        integral = isinstance(low, int) and isinstance(high, int)
+        if integral:
+            # Never create more partitions than distinct integer values
+            partitions = min(partitions, high - low + 1)
+        step = (high - low) / partitions
+
+        ranges = []
+        for index in range(partitions):
+            start = low + step * index
+            end = low + step * (index + 1)
+            if integral:
+                start, end = int(start), int(end)
+            last = index == partitions - 1
+            condition = f"{column_sql} >= ? AND {column_sql} {'<=' if last else '<'} ?"
+            if index == 0:
+                # Range predicates never match NULL; the first part carries those rows
+                condition = f"({condition}) OR {column_sql} IS NULL"
+            ranges.append((
+                f"SELECT * FROM ({query}) AS export_source WHERE {condition}",
+                base_params + (start, high if last else end)
+            ))
+        return ranges
+
+    # File exports (background jobs)
+
+    def start_file_export(
+        self,
+        table_name: Optional[str] = None,
+        columns: Optional[List[str]] = None,
+        where_clause: Optional[str] = None,
+        query: Optional[str] = None,
+        params: Optional[tuple] = None,
+        export_format: str = "csv",
+        compression: Optional[str] = None,
+        batch_size: Optional[int] = None,
+        partition_column: Optional[str] = None,
+        partitions: int = 1
+    ) -> ExportJob:
+        """
+        Start exporting to files under EXPORT_DIR in the background
+
+        With partition_column and partitions > 1 the source is split into
+        numeric ranges read in parallel, one part file per range. The source
+        query is then wrapped as a derived table, so it must be a single
+        statement without a leading CTE or an ORDER BY lacking TOP/OFFSET.
+        """
+        source_query, source_params = self._source_query(table_name, columns, where_clause, query, params)
+        if partitions > 1 and not partition_column:
+            raise ValueError("partition_column is required when partitions > 1")
+        if partitions > 1:
+            check_derived_table(source_query)
+        partitions = min(partitions, settings.EXPORT_MAX_PARTITIONS)
+
+        job = ExportJob("file", export_format, compression, partitions)
+        self._register(job)
+        self.executor.submit(
+            self._run_file_export,
+            job,
+            source_query,
+            source_params,
+            batch_size or settings.EXPORT_BATCH_SIZE,
+            partition_column if partitions > 1 else None
+        )
+        return job
+
+    def _write_file(
+        self,
+        job: ExportJob,
+        query: str,
+        params: Optional[tuple],
+        path: Path,
+        batch_size: int
+    ) -> None:
+        """Stream one query into one file, writing to a temporary name first"""
+        temp_path = path.with_name(path.name + ".part")
+        try:
+            with open(temp_path, "wb") as output:
+                encoder = None
+                for description, rows in database_service.iter_query_batches(query, params, batch_size):
+                    if encoder is None:
+                        encoder = create_encoder(job.format, job.compression, description)
+                        output.write(encoder.begin())
+                    data = encoder.encode(rows) if rows else b""
+                    output.write(data)
+                    job.add(len(rows), len(data))
+                if encoder is not None:
+                    data = encoder.end()
+                    output.write(data)
+                    job.add(0, len(data))
+            os.replace(temp_path, path)
+        except BaseException:
+            temp_path.unlink(missing_ok=True)
+            raise
+
+    @staticmethod
+    def _part_workers() -> int:
+        """Parallel part reads per job, so concurrent jobs together stay within the connection pool"""
+        return max(1, settings.MSSQL_POOL_MAX_SIZE // max(1, settings.EXPORT_MAX_WORKERS))
+
+    def _run_file_export(
+        self,
+        job: ExportJob,
+        query: str,
+        params: Optional[tuple],
+        batch_size: int,
+        partition_column: Optional[str]
+    ) -> None:
+        job.start()
+        try:
+            self.export_dir.mkdir(parents=True, exist_ok=True)
+            extension = file_extension(job.format, job.compression)
+
+            if not partition_column:
+                path = self.export_dir / f"{job.id}{extension}"
+                self._write_file(job, query, params, path, batch_size)
+                job.files.append(str(path))
+            else:
+                ranges = self._partition_ranges(query, params, partition_column, job.partitions)
+                # Small integer ranges can yield fewer parts than requested
+                job.partitions = len(ranges)
+                job_dir = self.export_dir / job.id
+                job_dir.mkdir(exist_ok=True)
+                paths = [job_dir / f"part-{index:05d}{extension}" for index in range(len(ranges))]
+
+                try:
+                    with ThreadPoolExecutor(
+                        max_workers=min(len(ranges), self._part_workers()),
+                        thread_name_prefix="export-part"
+                    ) as parts:
+                        futures = [
+                            parts.submit(self._write_file, job, range_query, range_params, path, batch_size)
+                            for (range_query, range_params), path in zip(ranges, paths)
+                        ]
+                        try:
+                            for future in futures:
+                                future.result()
+                        except BaseException:
+                            # Stop the remaining partitions promptly
+                            job.cancel_requested = True
+                            raise
+                except BaseException:
+                    # Parts of an incomplete export are useless
+                    shutil.rmtree(job_dir, ignore_errors=True)
+                    raise
+                job.files.extend(str(path) for path in paths)
+
+            job.finish("completed")
+        except ExportCancelled:
+            job.finish("cancelled")
+        except Exception as e:
+            print(f"Export {job.id} failed: {e}")
+            job.finish("failed", str(e))
+
+    # Streamed exports
+
+    async def stream_export(
+        self,
+        table_name: Optional[str] = None,
+        columns: Optional[List[str]] = None,
+        where_clause: Optional[str] = None,
+        query: Optional[str] = None,
+        params: Optional[tuple] = None,
+        export_format: str = "csv",
+        compression: Optional[str] = None,
+        batch_size: Optional[int] = None,
+        timeout: Optional[float] = None
+    ) -> Tuple[ExportJob, Any, AsyncIterator[bytes]]:
+        """
+        Start exporting straight to the client
+
+        The first batch is fetched before returning so SQL errors surface as
+        exceptions rather than a truncated download.
+
+        Returns:
+            Tuple of (job, encoder, async iterator of encoded bytes)
+        """
+        source_query, source_params = self._source_query(table_name, columns, where_clause, query, params)
+        batches = database_service.stream_query_async(
+            source_query,
+            source_params,
+            batch_size or settings.EXPORT_BATCH_SIZE,
+            timeout
+        )
+
+        job = ExportJob("stream", export_format, compression, 1)
+        self._register(job)
+        job.start()
+
+        try:
+            description, rows = await batches.__anext__()
+            encoder = create_encoder(export_format, compression, description)
+        except BaseException as e:
+            await batches.aclose()
+            job.finish("failed", str(e))
+            raise
+
+        async def encoded() -> AsyncIterator[bytes]:
+            current_rows = rows
+            try:
+                data = encoder.begin()
+                job.add(0, len(data))
+                yield data
+                while True:
+                    if current_rows:
+                        data = encoder.encode(current_rows)
+                        job.add(len(current_rows), len(data))
+                        yield data
+                    try:
+                        _, current_rows = await batches.__anext__()
+                    except StopAsyncIteration:
+                        break
+                data = encoder.end()
+                job.add(0, len(data))
+                yield data
+                job.finish("completed")
+            except ExportCancelled:
+                job.finish("cancelled")
+            except Exception as e:
+                print(f"Export {job.id} failed: {e}")
+                job.finish("failed", str(e))
+            finally:
+                if not job.done:
+                    # Client disconnected mid-download
+                    job.finish("cancelled")
+                await batches.aclose()
+
+        return job, encoder, encoded()
+
+
+export_service = ExportService()
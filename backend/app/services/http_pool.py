@@ -0,0 +1,120 @@
+"""
+Shared httpx connection pool for LLM provider clients
+"""
+import asyncio
+import importlib.util
+from typing import List, Dict, Any, Optional
+import httpx
+from app.config import settings
+
+
+def http_timeout() -> httpx.Timeout:
+    """Provider request timeouts from settings"""
+    return httpx.Timeout(
+        connect=settings.LLM_HTTP_CONNECT_TIMEOUT,
+        read=settings.LLM_HTTP_READ_TIMEOUT,
+        write=settings.LLM_HTTP_WRITE_TIMEOUT,
+        pool=settings.LLM_HTTP_POOL_TIMEOUT
+    )
+
+
+class ProviderHTTPPool:
+    """
+    One keep-alive httpx.AsyncClient shared by every provider SDK client
+
+    httpx keeps a separate set of connections per origin inside the pool, so
+    sharing a client caps total sockets while each provider still reuses its
+    own warm TLS connections.
+    """
+
+    def __init__(self) -> None:
+        http2 = settings.LLM_HTTP2
+        if http2 and importlib.util.find_spec("h2") is None:
+            print("Warning: LLM_HTTP2 is enabled but the h2 package is not installed; using HTTP/1.1")
+            http2 = False
+
+        self.http2 = http2
+        self.limits = httpx.Limits(
+            max_connections=settings.LLM_HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.LLM_HTTP_MAX_KEEPALIVE,
+            keepalive_expiry=settings.LLM_HTTP_KEEPALIVE_EXPIRY
+        )
+
+        # Statistics
+        self._requests_total = 0
+        self._peak_active = 0
+        self._peak_waiting = 0
+
+        self.client = httpx.AsyncClient(
+            http2=http2,
+            limits=self.limits,
+            timeout=http_timeout(),
+            event_hooks={"request": [self._on_request]}
+        )
+
+    async def _on_request(self, request: httpx.Request) -> None:
+        self._requests_total += 1
+        snapshot = self._snapshot()
+        self._peak_active = max(self._peak_active, snapshot["active"])
+        self._peak_waiting = max(self._peak_waiting, snapshot["waiting"])
+
+    def _snapshot(self) -> Dict[str, Any]:
+        """Inspect the underlying httpcore pool (internals, so read defensively)"""
+        pool = getattr(self.client, "_transport", None)
+        pool = getattr(pool, "_pool", None)
+        connections = list(getattr(pool, "connections", []) or [])
+        requests = list(getattr(pool, "_requests", []) or [])
+
+        idle = sum(1 for connection in connections if connection.is_idle())
+        origins: Dict[str, int] = {}
+        for connection in connections:
+            origin = getattr(connection, "_origin", None)
+            key = str(origin) if origin is not None else "unknown"
+            origins[key] = origins.get(key, 0) + 1
+
+        return {
+            "connections": len(connections),
+            "idle": idle,
+            "active": len(connections) - idle,
+            "waiting": sum(1 for request in requests if request.is_queued()),
+            "origins": origins,
+        }
+
+    async def warm(self, urls: List[str], connections: Optional[int] = None) -> int:
+        """
+        Open keep-alive connections to each URL's origin ahead of traffic
+
+        Concurrent HEAD requests force separate TLS handshakes; the response
+        status does not matter, only that the connection returns to the pool.
+
+        Returns:
+            Number of connections successfully opened
+        """
+        count = settings.LLM_HTTP_WARM_CONNECTIONS if connections is None else connections
+        if count <= 0 or not urls:
+            return 0
+
+        results = await asyncio.gather(
+            *(self.client.head(url) for url in urls for _ in range(count)),
+            return_exceptions=True
+        )
+        for result in results:
+            if isinstance(result, Exception):
+                print(f"Warning: Failed to warm provider connection: {result}")
+        return sum(1 for result in results if not isinstance(result, Exception))
+
+    def stats(self) -> Dict[str, Any]:
+        """Return pool occupancy, configured limits and peaks"""
+        return {
+            **self._snapshot(),
+            "max_connections": self.limits.max_connections,
+            "max_keepalive_connections": self.limits.max_keepalive_connections,
+            "keepalive_expiry": self.limits.keepalive_expiry,
+            "http2": self.http2,
+            "requests_total": self._requests_total,
+            "peak_active": self._peak_active,
+            "peak_waiting": self._peak_waiting,
+        }
+
+    async def close(self) -> None:
+        await self.client.aclose()
@@ -0,0 +1,200 @@
+"""
+Bounded parallel fan-out of chat completions, streamed or as background jobs
+"""
+import asyncio
+import time
+import uuid
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, AsyncIterator
+from app.config import settings
+from app.models.llm_models import ChatRequest
+from app.services.llm_scheduler import SchedulerRejected
+from app.services.llm_service import llm_service, usage_tokens
+
+
+def _error_status(error: Exception) -> int:
+    if isinstance(error, SchedulerRejected):
+        return 429
+    if isinstance(error, ValueError):
+        return 400
+    return getattr(error, "status_code", None) or 500
+
+
+class BatchJob:
+    """Progress and results of a background batch"""
+
+    def __init__(self, total: int, concurrency: int) -> None:
+        self.id = uuid.uuid4().hex
+        self.total = total
+        self.concurrency = concurrency
+        self.status = "pending"
+        self.results: List[Dict[str, Any]] = []
+        self.succeeded = 0
+        self.failed = 0
+        self.tokens = 0
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.task: Optional[asyncio.Task] = None
+
+    def add(self, result: Dict[str, Any]) -> None:
+        self.results.append(result)
+        if result["status"] == "completed":
+            self.succeeded += 1
+            self.tokens += usage_tokens(result["response"].get("usage")) or 0
+        else:
+            self.failed += 1
+
+    def finish(self, status: str, error: Optional[str] = None) -> None:
+        self.status = status
+        self.error = error
+        self.finished_at = time.time()
+
+    @property
+    def done(self) -> bool:
+        return self.status in ("completed", "failed", "cancelled")
+
+    def to_dict(self, offset: Optional[int] = None) -> Dict[str, Any]:
+        """Job summary; with offset, also the results from that position on"""
+        end = self.finished_at or time.time()
+        elapsed = end - self.started_at if self.started_at else 0.0
+        finished = self.succeeded + self.failed
+        data = {
+            "job_id": self.id,
+            "status": self.status,
+            "total": self.total,
+            "concurrency": self.concurrency,
+            "finished": finished,
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "tokens": self.tokens,
+            "elapsed": round(elapsed, 3),
+            "requests_per_second": round(finished / elapsed, 2) if elapsed else 0.0,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "error": self.error,
+        }
+        if offset is not None:
+            data["results"] = self.results[offset:]
+        return data
+
+
+class LLMBatchService:
+    def __init__(self) -> None:
+        self.jobs: "OrderedDict[str, BatchJob]" = OrderedDict()
+
+    def resolve_concurrency(self, concurrency: Optional[int]) -> int:
+        """Requested parallelism capped by LLM_BATCH_MAX_CONCURRENCY"""
+        limit = max(1, settings.LLM_BATCH_MAX_CONCURRENCY)
+        return min(concurrency, limit) if concurrency else limit
+
+    async def _complete(self, index: int, request: ChatRequest) -> Dict[str, Any]:
+        started = time.monotonic()
+        try:
+            response = await llm_service.chat_completion(request)
+        except Exception as e:
+            return {
+                "index": index,
+                "status": "failed",
+                "response": None,
+                "error": str(e),
+                "status_code": _error_status(e),
+                "duration": round(time.monotonic() - started, 4),
+            }
+        return {
+            "index": index,
+            "status": "completed",
+            "response": response.model_dump(),
+            "error": None,
+            "status_code": 200,
+            "duration": round(time.monotonic() - started, 4),
+        }
+
+    async def run(self, requests: List[ChatRequest], concurrency: Optional[int] = None) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Complete requests with at most `concurrency` in flight, yielding results as they finish
+
+        Each item runs through LLMService.chat_completion (cache, scheduler,
+        retries); items that do not set a priority are scheduled as "low" so
+        bulk work yields to interactive chat. Failures are reported per item
+        and never stop the batch. Closing the iterator cancels the remaining work.
+        """
+        requests = [
+            request if "priority" in request.model_fields_set else request.model_copy(update={"priority": "low"})
+            for request in requests
+        ]
+        workers = min(self.resolve_concurrency(concurrency), len(requests)) or 1
+        pending: "asyncio.Queue[int]" = asyncio.Queue()
+        for index in range(len(requests)):
+            pending.put_nowait(index)
+        results: "asyncio.Queue[Dict[str, Any]]" = asyncio.Queue()
+
+        async def worker() -> None:
+            while True:
+                try:
+                    index = pending.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                await results.put(await self._complete(index, requests[index]))
+
+        tasks = [asyncio.create_task(worker()) for _ in range(workers)]
+        try:
+            for _ in range(len(requests)):
+                yield await results.get()
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    # Background jobs
+
+    def _register(self, job: BatchJob) -> None:
+        self.jobs[job.id] = job
+        # Forget the oldest finished jobs beyond the history limit
+        finished = [job_id for job_id, j in self.jobs.items() if j.done]
+        for job_id in finished[:max(0, len(self.jobs) - settings.LLM_BATCH_JOB_HISTORY)]:
+            del self.jobs[job_id]
+
+    def start_job(self, requests: List[ChatRequest], concurrency: Optional[int] = None) -> BatchJob:
+        """Run a batch in the background; poll get_job() for progress and results"""
+        job = BatchJob(total=len(requests), concurrency=self.resolve_concurrency(concurrency))
+        self._register(job)
+        job.task = asyncio.create_task(self._run_job(job, requests))
+        return job
+
+    async def _run_job(self, job: BatchJob, requests: List[ChatRequest]) -> None:
+        job.status = "running"
+        job.started_at = time.time()
+        try:
+            async for result in self.run(requests, job.concurrency):
+                job.add(result)
+        except asyncio.CancelledError:
+            job.finish("cancelled")
+            raise
+        except Exception as e:
+            print(f"Batch job {job.id} failed: {e}")
+            job.finish("failed", str(e))
+            return
+        job.finish("completed")
+
+    def get_job(self, job_id: str) -> Optional[BatchJob]:
+        return self.jobs.get(job_id)
+
+    def list_jobs(self) -> List[Dict[str, Any]]:
+        return [job.to_dict() for job in reversed(list(self.jobs.values()))]
+
+    def cancel_job(self, job_id: str) -> Optional[BatchJob]:
+        job = self.get_job(job_id)
+        if job and not job.done and job.task:
+            job.task.cancel()
+        return job
+
+    def close(self) -> None:
+        """Cancel running batch jobs"""
+        for job in self.jobs.values():
+            if job.task and not job.done:
+                job.task.cancel()
+
+
+llm_batch_service = LLMBatchService()
@@ -0,0 +1,209 @@
+"""
+Content-addressed cache for LLM chat completions
+"""
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+from app.models.llm_models import ChatRequest
+
+
+def make_cache_key(request: ChatRequest) -> str:
+    """Hash of everything that determines a completion: provider, model, messages, sampling"""
+    payload = {
+        "provider": request.provider.lower(),
+        "model": request.model,
+        "messages": [{"role": msg.role, "content": msg.content} for msg in request.messages],
+        "temperature": request.temperature,
+        "max_tokens": request.max_tokens,
+    }
+    encoded = json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    """
+    Two-tier completion cache: a memory-bounded LRU in front of an optional SQLite file
+
+    Values are plain dicts (the ChatResponse fields plus the streamed chunks),
+    stored as JSON so both tiers hold the same bytes. Disk hits are promoted
+    into memory; disk I/O runs in a worker thread.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int,
+        default_ttl: float,
+        db_path: Optional[str] = None
+    ) -> None:
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.db_path = db_path
+
+        self._entries: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()
+
+        # Statistics
+        self._memory_hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+        self._stores = 0
+        self._evictions = 0
+
+        if db_path:
+            self._open_db()
+
+    def _open_db(self) -> None:
+        try:
+            directory = os.path.dirname(self.db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS completions ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._db.execute("DELETE FROM completions WHERE expires_at <= ?", (time.time(),))
+            self._db.commit()
+        except sqlite3.Error as e:
+            print(f"Warning: LLM cache database unavailable, using memory only: {e}")
+            self._db = None
+
+    def _memory_get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at <= time.time():
+                self._entries.pop(key)
+                self._bytes -= len(value)
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def _memory_put(self, key: str, value: str, expires_at: float) -> None:
+        size = len(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= len(previous[0])
+            while self._entries and self._bytes + size > self.max_bytes:
+                _, (evicted, _) = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+                self._evictions += 1
+            self._entries[key] = (value, expires_at)
+            self._bytes += size
+
+    def _disk_get(self, key: str) -> Optional[Tuple[str, float]]:
+        with self._db_lock:
+            row = self._db.execute(
+                "SELECT value, expires_at FROM completions WHERE key = ? AND expires_at > ?",
+                (key, time.time())
+            ).fetchone()
+        return (row[0], row[1]) if row else None
+
+    def _disk_put(self, key: str, value: str, expires_at: float) -> None:
+        with self._db_lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO completions (key, value, created_at, expires_at) VALUES (?, ?, ?, ?)",
+                (key, value, time.time(), expires_at)
+            )
+            self._db.commit()
+
+    def _disk_clear(self) -> int:
+        with self._db_lock:
+            removed = self._db.execute("DELETE FROM completions").rowcount
+            self._db.commit()
+            return removed
+
+    def _disk_count(self) -> int:
+        with self._db_lock:
+            return self._db.execute("SELECT COUNT(*) FROM completions").fetchone()[0]
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return a cached completion, or None on a miss"""
+        value = self._memory_get(key)
+        if value is not None:
+            with self._lock:
+                self._memory_hits += 1
+            return json.loads(value)
+
+        if self._db is not None:
+            try:
+                found = await asyncio.to_thread(self._disk_get, key)
+            except sqlite3.Error as e:
+                print(f"Warning: LLM cache read failed: {e}")
+                found = None
+            if found is not None:
+                value, expires_at = found
+                self._memory_put(key, value, expires_at)
+                with self._lock:
+                    self._disk_hits += 1
+                return json.loads(value)
+
+        with self._lock:
+            self._misses += 1
+        return None
+
+    async def put(self, key: str, entry: Dict[str, Any], ttl: Optional[float] = None) -> None:
+        """Store a completion in memory and, if configured, on disk"""
+        value = json.dumps(entry, ensure_ascii=False)
+        expires_at = time.time() + (self.default_ttl if ttl is None else ttl)
+        self._memory_put(key, value, expires_at)
+
+        if self._db is not None:
+            try:
+                await asyncio.to_thread(self._disk_put, key, value, expires_at)
+            except sqlite3.Error as e:
+                print(f"Warning: LLM cache write failed: {e}")
+
+        with self._lock:
+            self._stores += 1
+
+    async def clear(self) -> int:
+        """Drop every cached completion from both tiers"""
+        with self._lock:
+            removed = len(self._entries)
+            self._entries.clear()
+            self._bytes = 0
+        if self._db is not None:
+            removed = max(removed, await asyncio.to_thread(self._disk_clear))
+        return removed
+
+    async def stats(self) -> Dict[str, Any]:
+        """Return occupancy and per-tier hit counters"""
+        disk_entries = await asyncio.to_thread(self._disk_count) if self._db is not None else None
+        with self._lock:
+            hits = self._memory_hits + self._disk_hits
+            lookups = hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "disk_enabled": self._db is not None,
+                "disk_entries": disk_entries,
+                "memory_hits": self._memory_hits,
+                "disk_hits": self._disk_hits,
+                "misses": self._misses,
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+                "stores": self._stores,
+                "evictions": self._evictions,
+            }
+
+    def close(self) -> None:
+        if self._db is not None:
+            with self._db_lock:
+                self._db.close()
+            self._db = None
@@ -0,0 +1,124 @@
+"""
+Anthropic prompt-cache breakpoints and conversation compaction
+"""
+from typing import List, Dict, Any, Optional, Tuple
+from app.models.llm_models import Message
+
+EPHEMERAL = {"type": "ephemeral"}
+
+SUMMARY_PROMPT = (
+    "Summarize the conversation below so it can replace the original turns as context. "
+    "Keep facts, decisions, code identifiers and open questions; omit pleasantries. "
+    "Reply with the summary only."
+)
+
+
+def message_tokens(message: Message) -> int:
+    """Rough token count of one message (~4 characters per token plus framing)"""
+    return len(message.content) // 4 + 4
+
+
+def _text_block(text: str, cache: bool) -> Dict[str, Any]:
+    block: Dict[str, Any] = {"type": "text", "text": text}
+    if cache:
+        block["cache_control"] = EPHEMERAL
+    return block
+
+
+def anthropic_payload(
+    messages: List[Message],
+    cache_breakpoints: bool,
+    min_tokens: int
+) -> Tuple[Optional[Any], List[Dict[str, Any]]]:
+    """
+    Convert messages to Anthropic's (system, messages) arguments
+
+    System messages are joined into the system prompt. With cache_breakpoints,
+    the system prompt and the last two user turns are marked cacheable once
+    the prefix ending there reaches min_tokens (shorter prefixes cannot be
+    cached, and each write is billed at a premium): the final user turn writes
+    the prefix for the next request, and the previous one reads what the last
+    request wrote.
+    """
+    system_parts = [msg.content for msg in messages if msg.role == "system"]
+    turns = [msg for msg in messages if msg.role != "system"]
+    system_text = "\n\n".join(system_parts) if system_parts else None
+
+    if not cache_breakpoints:
+        return system_text, [{"role": msg.role, "content": msg.content} for msg in turns]
+
+    prefix = sum(len(part) // 4 for part in system_parts)
+    # Tokens up to and including each turn; at most three markers of the four allowed
+    ends = []
+    total = prefix
+    for msg in turns:
+        total += message_tokens(msg)
+        ends.append(total)
+    user_turns = [index for index, msg in enumerate(turns) if msg.role == "user"]
+    marked = {index for index in user_turns[-2:] if ends[index] >= min_tokens}
+
+    system: Optional[Any] = system_text
+    if system_text and prefix >= min_tokens:
+        system = [_text_block(system_text, cache=True)]
+
+    payload = [
+        {"role": msg.role, "content": [_text_block(msg.content, cache=True)]} if index in marked
+        else {"role": msg.role, "content": msg.content}
+        for index, msg in enumerate(turns)
+    ]
+    return system, payload
+
+
+def _boundaries(turns: List[Message], step: int) -> List[int]:
+    """User turns at which a new span of at least `step` tokens starts, counted from the first turn"""
+    boundaries = []
+    consumed = 0
+    last_boundary = 0
+    for index, msg in enumerate(turns):
+        if index and msg.role == "user" and consumed - last_boundary >= step:
+            boundaries.append(index)
+            last_boundary = consumed
+        consumed += message_tokens(msg)
+    return boundaries
+
+
+def compaction_cut(turns: List[Message], budget: int) -> int:
+    """
+    Index of the first turn to keep so the kept turns fit the token budget
+
+    Candidate cut points are user turns spaced about budget/2 tokens apart,
+    counted from the start of the conversation, so the cut (and the prefix
+    that replaces the dropped turns) stays the same from one request to the
+    next until the conversation has grown by another half budget. The final
+    user turn is always kept. Returns 0 when no compaction is needed.
+    """
+    sizes = [message_tokens(msg) for msg in turns]
+    remaining = sum(sizes)
+    if remaining <= budget:
+        return 0
+
+    start = 0
+    for boundary in _boundaries(turns, max(1, budget // 2)):
+        remaining -= sum(sizes[start:boundary])
+        start = boundary
+        if remaining <= budget:
+            return boundary
+
+    # Even the latest boundary leaves too much: keep from the final user turn
+    last_user = max((index for index, msg in enumerate(turns) if msg.role == "user"), default=0)
+    return max(start, last_user)
+
+
+def compaction_segments(turns: List[Message], budget: int, cut: int) -> List[Tuple[int, int]]:
+    """
+    Split the dropped turns[:cut] into the same stable spans as compaction_cut
+
+    Each span is summarised together with the summary of the spans before it,
+    so earlier summaries are reused from the response cache.
+    """
+    starts = [0] + _boundaries(turns[:cut], max(1, budget // 2))
+    return list(zip(starts, starts[1:] + [cut]))
+
+
+def transcript(messages: List[Message]) -> str:
+    return "\n\n".join(f"{msg.role}: {msg.content}" for msg in messages)
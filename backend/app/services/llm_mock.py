@@ -0,0 +1,140 @@
+"""
+Offline mock LLM provider for load testing the proxy
+"""
+import asyncio
+import math
+import random
+import time
+from typing import Dict, Any, Optional, AsyncIterator
+from app.models.llm_models import ChatRequest, ChatResponse
+
+_WORDS = (
+    "the", "proxy", "streams", "tokens", "from", "a", "mock", "model", "so", "load",
+    "tests", "measure", "scheduling", "framing", "and", "validation", "overhead", "only",
+)
+
+
+class MockProviderError(Exception):
+    """Injected provider failure; status_code drives the same retry logic as real API errors"""
+
+    def __init__(self, message: str, status_code: int) -> None:
+        super().__init__(message)
+        self.status_code = status_code
+        self.response = None
+
+
+class MockProvider:
+    """
+    Generates placeholder completions with provider-like timing
+
+    Time to first token is drawn from a log-normal distribution with median
+    latency_ms (sigma 0 makes it constant); output then arrives at
+    tokens_per_second, one word per token. failure_rate fails requests
+    before the first token with failure_status; stream_abort_rate breaks
+    streams part way through.
+    """
+
+    def __init__(
+        self,
+        latency_ms: float,
+        latency_sigma: float,
+        tokens_per_second: float,
+        output_tokens: int,
+        failure_rate: float,
+        failure_status: int,
+        stream_abort_rate: float,
+        seed: Optional[int] = None
+    ) -> None:
+        self.latency_ms = latency_ms
+        self.latency_sigma = latency_sigma
+        self.tokens_per_second = tokens_per_second
+        self.output_tokens = output_tokens
+        self.failure_rate = failure_rate
+        self.failure_status = failure_status
+        self.stream_abort_rate = stream_abort_rate
+        self._random = random.Random(seed)
+
+        # Statistics
+        self._requests_total = 0
+        self._failures_total = 0
+        self._aborts_total = 0
+        self._tokens_total = 0
+
+    def _latency(self) -> float:
+        """Seconds until the first token"""
+        if self.latency_ms <= 0:
+            return 0.0
+        if self.latency_sigma <= 0:
+            return self.latency_ms / 1000.0
+        return self._random.lognormvariate(math.log(self.latency_ms / 1000.0), self.latency_sigma)
+
+    def _plan(self, request: ChatRequest) -> int:
+        """Count the request, inject a failure if due, and return the number of tokens to generate"""
+        self._requests_total += 1
+        if self.failure_rate and self._random.random() < self.failure_rate:
+            self._failures_total += 1
+            raise MockProviderError(f"Injected mock provider failure ({self.failure_status})", self.failure_status)
+        return min(self.output_tokens, request.max_tokens or self.output_tokens)
+
+    def _usage(self, request: ChatRequest, completion_tokens: int) -> Dict[str, Any]:
+        prompt_tokens = sum(len(msg.content) for msg in request.messages) // 4
+        return {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        }
+
+    def _word(self, index: int) -> str:
+        return (" " if index else "") + _WORDS[index % len(_WORDS)]
+
+    async def chat(self, request: ChatRequest) -> ChatResponse:
+        tokens = self._plan(request)
+        delay = self._latency()
+        if self.tokens_per_second > 0:
+            delay += tokens / self.tokens_per_second
+        await asyncio.sleep(delay)
+
+        self._tokens_total += tokens
+        return ChatResponse(
+            message="".join(self._word(index) for index in range(tokens)),
+            model=request.model,
+            usage=self._usage(request, tokens),
+            provider="mock"
+        )
+
+    async def stream(self, request: ChatRequest, usage: Optional[Dict[str, Any]] = None) -> AsyncIterator[str]:
+        tokens = self._plan(request)
+        abort_at = None
+        if self.stream_abort_rate and self._random.random() < self.stream_abort_rate:
+            abort_at = self._random.randint(1, max(1, tokens - 1))
+
+        await asyncio.sleep(self._latency())
+        started = time.monotonic()
+        for index in range(tokens):
+            if index == abort_at:
+                self._aborts_total += 1
+                raise MockProviderError("Injected mock stream abort", 502)
+            if self.tokens_per_second > 0 and index:
+                # Pace against the schedule rather than sleeping per token, so
+                # high rates are not limited by timer resolution
+                ahead = started + index / self.tokens_per_second - time.monotonic()
+                if ahead > 0:
+                    await asyncio.sleep(ahead)
+            self._tokens_total += 1
+            yield self._word(index)
+
+        if usage is not None:
+            usage["tokens"] = self._usage(request, tokens)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "latency_ms": self.latency_ms,
+            "latency_sigma": self.latency_sigma,
+            "tokens_per_second": self.tokens_per_second,
+            "failure_rate": self.failure_rate,
+            "stream_abort_rate": self.stream_abort_rate,
+            "requests_total": self._requests_total,
+            "failures_total": self._failures_total,
+            "aborts_total": self._aborts_total,
+            "tokens_total": self._tokens_total,
+        }
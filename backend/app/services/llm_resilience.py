@@ -0,0 +1,304 @@
+"""
+Retries, hedged requests and provider failover for LLM calls
+"""
+import asyncio
+import email.utils
+import random
+import time
+from collections import deque
+from typing import List, Dict, Any, Optional, Deque, AsyncIterator, Awaitable, Callable
+import anthropic
+import httpx
+import openai
+from app.models.llm_models import ChatRequest, ChatResponse
+from app.services.llm_scheduler import SchedulerRejected
+
+RETRYABLE_STATUS = {408, 409, 429}
+_CONNECTION_ERRORS = (
+    openai.APIConnectionError,
+    anthropic.APIConnectionError,
+    httpx.TransportError,
+    asyncio.TimeoutError,
+)
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Rate limits, server errors, timeouts and dropped connections are worth another attempt"""
+    if isinstance(error, _CONNECTION_ERRORS):
+        return True
+    status = getattr(error, "status_code", None)
+    return status is not None and (status in RETRYABLE_STATUS or status >= 500)
+
+
+def retry_after(error: BaseException) -> Optional[float]:
+    """Seconds the provider asked us to wait (retry-after-ms / retry-after headers)"""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+
+    value = headers.get("retry-after-ms")
+    if value:
+        try:
+            return float(value) / 1000.0
+        except ValueError:
+            pass
+
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        parsed = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, parsed.timestamp() - time.time())
+
+
+def target_key(request: ChatRequest) -> str:
+    return f"{request.provider.lower()}:{request.model}"
+
+
+class TargetStats:
+    """Outcome counters and recent latencies for one provider:model"""
+
+    def __init__(self, window: int = 500) -> None:
+        # Full completion times; these drive hedging of non-streaming calls
+        self.latencies: Deque[float] = deque(maxlen=window)
+        # Stream time-to-first-chunk, far shorter and kept apart
+        self.first_chunk_latencies: Deque[float] = deque(maxlen=window)
+        self.successes = 0
+        self.failures = 0
+
+    def percentile(self, fraction: float, samples: Optional[Deque[float]] = None) -> float:
+        ordered = sorted(self.latencies if samples is None else samples)
+        if not ordered:
+            return 0.0
+        return ordered[min(len(ordered) - 1, int(fraction * (len(ordered) - 1)))]
+
+
+class LLMResilience:
+    """
+    Wraps single provider attempts with retry, hedging and failover
+
+    Each target (the requested provider:model, then its configured failovers)
+    gets up to max_attempts tries with full-jitter exponential backoff; a
+    Retry-After longer than max_delay skips straight to the next target.
+    Non-streaming attempts that run past the target's latency percentile are
+    hedged with one duplicate and the first success wins. Streams are only
+    retried before their first chunk arrives.
+    """
+
+    def __init__(
+        self,
+        max_attempts: int,
+        base_delay: float,
+        max_delay: float,
+        attempt_timeout: float,
+        first_chunk_timeout: float,
+        hedge_enabled: bool,
+        hedge_percentile: float,
+        hedge_min_samples: int,
+        hedge_min_delay: float,
+        failover: Optional[Dict[str, List[str]]] = None
+    ) -> None:
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.attempt_timeout = attempt_timeout
+        self.first_chunk_timeout = first_chunk_timeout
+        self.hedge_enabled = hedge_enabled
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+        self.hedge_min_delay = hedge_min_delay
+        self.failover = failover or {}
+
+        self._targets: Dict[str, TargetStats] = {}
+
+        # Statistics
+        self._retries_total = 0
+        self._hedges_total = 0
+        self._hedges_won = 0
+        self._failovers_total = 0
+
+    def _stats_for(self, key: str) -> TargetStats:
+        stats = self._targets.get(key)
+        if stats is None:
+            stats = self._targets[key] = TargetStats()
+        return stats
+
+    def plan(self, request: ChatRequest, available: Callable[[str], bool]) -> List[ChatRequest]:
+        """The request itself followed by its failover targets on configured providers"""
+        targets = [request]
+        for fallback in self.failover.get(target_key(request), []):
+            provider, _, model = fallback.partition(":")
+            if model and available(provider):
+                targets.append(request.model_copy(update={"provider": provider, "model": model}))
+        return targets
+
+    def _backoff(self, attempt: int, error: BaseException) -> Optional[float]:
+        """Delay before the next attempt, or None to give up on this target"""
+        if attempt + 1 >= self.max_attempts or not is_retryable(error):
+            return None
+        requested = retry_after(error)
+        if requested is not None:
+            return requested if requested <= self.max_delay else None
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    def _hedge_delay(self, key: str) -> Optional[float]:
+        if not self.hedge_enabled:
+            return None
+        stats = self._stats_for(key)
+        if len(stats.latencies) < self.hedge_min_samples:
+            return None
+        return round(max(self.hedge_min_delay, stats.percentile(self.hedge_percentile)), 4)
+
+    async def _timed(self, request: ChatRequest, attempt: Callable[[ChatRequest], Awaitable[ChatResponse]]) -> ChatResponse:
+        call = attempt(request)
+        if self.attempt_timeout:
+            return await asyncio.wait_for(call, timeout=self.attempt_timeout)
+        return await call
+
+    async def _hedged(self, request: ChatRequest, attempt: Callable[[ChatRequest], Awaitable[ChatResponse]]) -> ChatResponse:
+        """Run one attempt, adding a duplicate if it outlives the hedge delay"""
+        delay = self._hedge_delay(target_key(request))
+        if delay is None:
+            return await self._timed(request, attempt)
+
+        primary = asyncio.ensure_future(self._timed(request, attempt))
+        pending = {primary}
+        try:
+            done, pending = await asyncio.wait(pending, timeout=delay)
+            if done:
+                return primary.result()
+
+            self._hedges_total += 1
+            hedge = asyncio.ensure_future(self._timed(request, attempt))
+            pending.add(hedge)
+            error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            self._hedges_won += 1
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def call(
+        self,
+        request: ChatRequest,
+        attempt: Callable[[ChatRequest], Awaitable[ChatResponse]],
+        available: Callable[[str], bool]
+    ) -> ChatResponse:
+        """Complete a request, retrying and failing over as configured"""
+        error: Optional[BaseException] = None
+        for index, target in enumerate(self.plan(request, available)):
+            if index:
+                self._failovers_total += 1
+            key = target_key(target)
+            for attempt_number in range(self.max_attempts):
+                started = time.monotonic()
+                try:
+                    response = await self._hedged(target, attempt)
+                except SchedulerRejected as e:
+                    # Saturated locally: try the next target rather than waiting
+                    error = e
+                    break
+                except Exception as e:
+                    error = e
+                    self._stats_for(key).failures += 1
+                    delay = self._backoff(attempt_number, e)
+                    if delay is None:
+                        if not is_retryable(e):
+                            raise
+                        break
+                    self._retries_total += 1
+                    print(f"Warning: {key} attempt {attempt_number + 1} failed ({e}); retrying in {delay:.2f}s")
+                    await asyncio.sleep(delay)
+                    continue
+
+                stats = self._stats_for(key)
+                stats.successes += 1
+                stats.latencies.append(time.monotonic() - started)
+                return response
+        raise error
+
+    async def stream(
+        self,
+        request: ChatRequest,
+        attempt: Callable[[ChatRequest], AsyncIterator[str]],
+        available: Callable[[str], bool]
+    ) -> AsyncIterator[str]:
+        """Stream a request, retrying and failing over until the first chunk arrives"""
+        error: Optional[BaseException] = None
+        for index, target in enumerate(self.plan(request, available)):
+            if index:
+                self._failovers_total += 1
+            key = target_key(target)
+            for attempt_number in range(self.max_attempts):
+                chunks = attempt(target)
+                started = time.monotonic()
+                try:
+                    first = await asyncio.wait_for(
+                        chunks.__anext__(), timeout=self.first_chunk_timeout or None
+                    )
+                except StopAsyncIteration:
+                    return
+                except SchedulerRejected as e:
+                    error = e
+                    break
+                except Exception as e:
+                    await chunks.aclose()
+                    error = e
+                    self._stats_for(key).failures += 1
+                    delay = self._backoff(attempt_number, e)
+                    if delay is None:
+                        if not is_retryable(e):
+                            raise
+                        break
+                    self._retries_total += 1
+                    print(f"Warning: {key} stream attempt {attempt_number + 1} failed ({e}); retrying in {delay:.2f}s")
+                    await asyncio.sleep(delay)
+                    continue
+
+                stats = self._stats_for(key)
+                stats.successes += 1
+                stats.first_chunk_latencies.append(time.monotonic() - started)
+                try:
+                    yield first
+                    async for chunk in chunks:
+                        yield chunk
+                finally:
+                    await chunks.aclose()
+                return
+        raise error
+
+    def stats(self) -> Dict[str, Any]:
+        """Return retry/hedge/failover counters and per-target latency percentiles"""
+        return {
+            "retries_total": self._retries_total,
+            "hedges_total": self._hedges_total,
+            "hedges_won": self._hedges_won,
+            "failovers_total": self._failovers_total,
+            "targets": {
+                key: {
+                    "successes": stats.successes,
+                    "failures": stats.failures,
+                    "p50": round(stats.percentile(0.50), 4),
+                    "p95": round(stats.percentile(0.95), 4),
+                    "p99": round(stats.percentile(0.99), 4),
+                    "first_chunk_p50": round(stats.percentile(0.50, stats.first_chunk_latencies), 4),
+                    "first_chunk_p95": round(stats.percentile(0.95, stats.first_chunk_latencies), 4),
+                    "hedge_delay": self._hedge_delay(key),
+                }
+                for key, stats in self._targets.items()
+            },
+        }
@@ -0,0 +1,360 @@
+"""
+Admission control for LLM provider requests
+"""
+import asyncio
+import heapq
+import itertools
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import List, Dict, Any, Optional, Deque, AsyncIterator, Tuple
+
+PRIORITIES = {"high": 0, "normal": 1, "low": 2}
+
+
+class SchedulerRejected(Exception):
+    """Raised when a request cannot be admitted (queue full or wait timed out)"""
+
+    def __init__(self, message: str, retry_after: float) -> None:
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """Refilling budget of `per_minute` units with a burst of one minute's worth"""
+
+    def __init__(self, per_minute: float) -> None:
+        self.rate = per_minute / 60.0
+        self.capacity = float(per_minute)
+        self.level = float(per_minute)
+        self._updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until amount can be taken (0 if available now)"""
+        self._refill()
+        amount = min(amount, self.capacity)
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) / self.rate
+
+    def take(self, amount: float) -> None:
+        self._refill()
+        self.level -= min(amount, self.capacity)
+
+    def refund(self, amount: float) -> None:
+        self._refill()
+        self.level = min(self.capacity, self.level + amount)
+
+
+class ProviderLimits:
+    """Concurrency caps and rate buckets for one provider"""
+
+    def __init__(self, concurrency: int, model_concurrency: int, rpm: float, tpm: float) -> None:
+        self.concurrency = concurrency
+        self.model_concurrency = model_concurrency
+        self.requests = TokenBucket(rpm) if rpm > 0 else None
+        self.tokens = TokenBucket(tpm) if tpm > 0 else None
+        self.model_overrides: Dict[str, int] = {}
+        self.in_flight = 0
+        self.model_in_flight: Dict[str, int] = {}
+
+    def model_limit(self, model: str) -> int:
+        return self.model_overrides.get(model, self.model_concurrency)
+
+
+class _Waiter:
+    __slots__ = ("provider", "model", "tokens", "priority", "enqueued_at", "future")
+
+    def __init__(self, provider: str, model: str, tokens: int, priority: int, future: asyncio.Future) -> None:
+        self.provider = provider
+        self.model = model
+        self.tokens = tokens
+        self.priority = priority
+        self.enqueued_at = time.monotonic()
+        self.future = future
+
+
+class Permit:
+    """A granted slot; settle() corrects the token estimate once usage is known"""
+
+    def __init__(self, scheduler: "LLMScheduler", provider: str, model: str, tokens: int, wait_time: float) -> None:
+        self.scheduler = scheduler
+        self.provider = provider
+        self.model = model
+        self.tokens = tokens
+        self.wait_time = wait_time
+
+    def settle(self, actual_tokens: Optional[int]) -> None:
+        if actual_tokens is None:
+            return
+        limits = self.scheduler.limits_for(self.provider)
+        if limits.tokens is not None and actual_tokens < self.tokens:
+            limits.tokens.refund(self.tokens - actual_tokens)
+        self.tokens = actual_tokens
+
+
+class LLMScheduler:
+    """
+    Priority queue in front of the providers
+
+    A request is admitted when its provider and model are under their
+    concurrency caps and the provider's requests/min and tokens/min buckets
+    can cover it. Waiters are served in (priority, arrival) order; one that
+    is held back by a rate bucket reserves it, so small requests cannot
+    starve a large one. When the queue is full new requests are rejected
+    immediately instead of piling up.
+    """
+
+    def __init__(
+        self,
+        provider_concurrency: int,
+        model_concurrency: int,
+        requests_per_minute: float,
+        tokens_per_minute: float,
+        max_queue: int,
+        queue_timeout: float,
+        overrides: Optional[Dict[str, Dict[str, float]]] = None
+    ) -> None:
+        self.provider_concurrency = provider_concurrency
+        self.model_concurrency = model_concurrency
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.overrides = overrides or {}
+
+        self._limits: Dict[str, ProviderLimits] = {}
+        self._queue: List[Tuple[int, int, _Waiter]] = []
+        self._sequence = itertools.count()
+        self._wakeup: Optional[asyncio.TimerHandle] = None
+
+        # Statistics
+        self._admitted_total = 0
+        self._queued_total = 0
+        self._rejected_total = 0
+        self._timeouts_total = 0
+        self._wait_time_total = 0.0
+        self._wait_time_max = 0.0
+        self._recent_waits: Deque[float] = deque(maxlen=1000)
+
+    def limits_for(self, provider: str) -> ProviderLimits:
+        limits = self._limits.get(provider)
+        if limits is None:
+            override = self.overrides.get(provider, {})
+            limits = ProviderLimits(
+                concurrency=int(override.get("concurrency", self.provider_concurrency)),
+                model_concurrency=int(override.get("model_concurrency", self.model_concurrency)),
+                rpm=float(override.get("rpm", self.requests_per_minute)),
+                tpm=float(override.get("tpm", self.tokens_per_minute))
+            )
+            for key, value in self.overrides.items():
+                if key.startswith(f"{provider}:") and "concurrency" in value:
+                    limits.model_overrides[key.split(":", 1)[1]] = int(value["concurrency"])
+            self._limits[provider] = limits
+        return limits
+
+    def _blocked_for(self, waiter: _Waiter, reserved: set) -> Optional[float]:
+        """None if the waiter can run now, else seconds until a bucket frees up (0 = wait for a slot)"""
+        limits = self.limits_for(waiter.provider)
+        if limits.concurrency and limits.in_flight >= limits.concurrency:
+            return 0.0
+        model_limit = limits.model_limit(waiter.model)
+        if model_limit and limits.model_in_flight.get(waiter.model, 0) >= model_limit:
+            return 0.0
+        if waiter.provider in reserved:
+            return 0.0
+
+        delay = 0.0
+        if limits.requests is not None:
+            delay = max(delay, limits.requests.wait_time(1))
+        if limits.tokens is not None:
+            delay = max(delay, limits.tokens.wait_time(waiter.tokens))
+        return delay if delay > 0 else None
+
+    def _grant(self, waiter: _Waiter) -> None:
+        limits = self.limits_for(waiter.provider)
+        limits.in_flight += 1
+        limits.model_in_flight[waiter.model] = limits.model_in_flight.get(waiter.model, 0) + 1
+        if limits.requests is not None:
+            limits.requests.take(1)
+        if limits.tokens is not None:
+            limits.tokens.take(waiter.tokens)
+
+        wait_time = time.monotonic() - waiter.enqueued_at
+        self._admitted_total += 1
+        self._wait_time_total += wait_time
+        self._wait_time_max = max(self._wait_time_max, wait_time)
+        self._recent_waits.append(wait_time)
+        waiter.future.set_result(wait_time)
+
+    def _dispatch(self) -> None:
+        """Admit every waiter that fits, in priority order"""
+        if self._wakeup is not None:
+            self._wakeup.cancel()
+            self._wakeup = None
+
+        reserved: set = set()
+        next_check: Optional[float] = None
+        remaining: List[Tuple[int, int, _Waiter]] = []
+
+        for entry in sorted(self._queue):
+            waiter = entry[2]
+            if waiter.future.done():
+                continue
+            delay = self._blocked_for(waiter, reserved)
+            if delay is None:
+                self._grant(waiter)
+                continue
+            remaining.append(entry)
+            if delay > 0:
+                # Hold the provider's buckets for this waiter
+                reserved.add(waiter.provider)
+                next_check = delay if next_check is None else min(next_check, delay)
+
+        heapq.heapify(remaining)
+        self._queue = remaining
+
+        if next_check is not None:
+            self._wakeup = asyncio.get_running_loop().call_later(next_check, self._dispatch)
+
+    def _abandon(self, waiter: _Waiter) -> None:
+        """Drop a waiter whose wait ended without a slot, so it no longer counts as queued"""
+        waiter.future.cancel()
+        self._queue = [entry for entry in self._queue if entry[2] is not waiter]
+        heapq.heapify(self._queue)
+        # It may have been holding its provider's buckets for itself
+        if self._queue:
+            self._dispatch()
+
+    def _release(self, provider: str, model: str) -> None:
+        limits = self.limits_for(provider)
+        limits.in_flight -= 1
+        limits.model_in_flight[model] = limits.model_in_flight.get(model, 1) - 1
+        if self._queue:
+            self._dispatch()
+
+    async def acquire(
+        self,
+        provider: str,
+        model: str,
+        tokens: int,
+        priority: str = "normal"
+    ) -> Permit:
+        """Wait for a slot, raising SchedulerRejected if the queue is full or the wait times out"""
+        loop = asyncio.get_running_loop()
+        waiter = _Waiter(provider, model, tokens, PRIORITIES.get(priority, 1), loop.create_future())
+
+        if not self._queue and self._blocked_for(waiter, set()) is None:
+            self._grant(waiter)
+            return Permit(self, provider, model, tokens, 0.0)
+
+        if len(self._queue) >= self.max_queue:
+            self._rejected_total += 1
+            raise SchedulerRejected(
+                f"LLM request queue is full ({self.max_queue} waiting)",
+                retry_after=max(1.0, self._estimated_wait())
+            )
+
+        heapq.heappush(self._queue, (waiter.priority, next(self._sequence), waiter))
+        self._queued_total += 1
+        self._dispatch()
+
+        try:
+            wait_time = await asyncio.wait_for(asyncio.shield(waiter.future), timeout=self.queue_timeout or None)
+        except asyncio.TimeoutError:
+            if waiter.future.done():
+                return Permit(self, provider, model, tokens, waiter.future.result())
+            self._abandon(waiter)
+            self._timeouts_total += 1
+            raise SchedulerRejected(
+                f"Timed out after {self.queue_timeout}s waiting for an LLM request slot",
+                retry_after=max(1.0, self._estimated_wait())
+            )
+        except asyncio.CancelledError:
+            if waiter.future.done() and not waiter.future.cancelled():
+                self._release(provider, model)
+            else:
+                self._abandon(waiter)
+            raise
+
+        return Permit(self, provider, model, tokens, wait_time)
+
+    @asynccontextmanager
+    async def slot(
+        self,
+        provider: str,
+        model: str,
+        tokens: int,
+        priority: str = "normal"
+    ) -> AsyncIterator[Permit]:
+        """Hold a slot for the duration of the block"""
+        permit = await self.acquire(provider, model, tokens, priority)
+        try:
+            yield permit
+        finally:
+            self._release(provider, model)
+
+    def _estimated_wait(self) -> float:
+        if not self._recent_waits:
+            return 1.0
+        return sum(self._recent_waits) / len(self._recent_waits)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return queue depth, wait times and per-provider occupancy"""
+        waiting = [entry[2] for entry in self._queue if not entry[2].future.done()]
+        recent = sorted(self._recent_waits)
+        depth_by_provider: Dict[str, int] = {}
+        for waiter in waiting:
+            depth_by_provider[waiter.provider] = depth_by_provider.get(waiter.provider, 0) + 1
+
+        providers = {}
+        for name, limits in self._limits.items():
+            providers[name] = {
+                "in_flight": limits.in_flight,
+                "concurrency": limits.concurrency,
+                "in_flight_by_model": {model: count for model, count in limits.model_in_flight.items() if count},
+                "queued": depth_by_provider.get(name, 0),
+                "requests_available": round(limits.requests.level, 1) if limits.requests else None,
+                "tokens_available": round(limits.tokens.level, 1) if limits.tokens else None,
+            }
+
+        return {
+            "queue_depth": len(waiting),
+            "max_queue": self.max_queue,
+            "admitted_total": self._admitted_total,
+            "queued_total": self._queued_total,
+            "rejected_total": self._rejected_total,
+            "timeouts_total": self._timeouts_total,
+            "wait_time_total": round(self._wait_time_total, 6),
+            "wait_time_avg": round(self._wait_time_total / self._admitted_total, 6) if self._admitted_total else 0.0,
+            "wait_time_p95": round(recent[int(0.95 * (len(recent) - 1))], 6) if recent else 0.0,
+            "wait_time_max": round(self._wait_time_max, 6),
+            "providers": providers,
+        }
+
+    def prometheus_lines(self, prefix: str = "llm_scheduler") -> List[str]:
+        """Render queue and wait-time metrics in the Prometheus text format"""
+        stats = self.stats()
+        lines = []
+        for name, key, kind in (
+            ("queue_depth", "queue_depth", "gauge"),
+            ("admitted_total", "admitted_total", "counter"),
+            ("rejected_total", "rejected_total", "counter"),
+            ("timeouts_total", "timeouts_total", "counter"),
+            ("wait_seconds_total", "wait_time_total", "counter"),
+            ("wait_seconds_max", "wait_time_max", "gauge"),
+        ):
+            lines += [f"# TYPE {prefix}_{name} {kind}", f"{prefix}_{name} {stats[key]}"]
+
+        lines.append(f"# TYPE {prefix}_in_flight gauge")
+        for provider, data in stats["providers"].items():
+            lines.append(f'{prefix}_in_flight{{provider="{provider}"}} {data["in_flight"]}')
+        lines.append(f"# TYPE {prefix}_queued gauge")
+        for provider, data in stats["providers"].items():
+            lines.append(f'{prefix}_queued{{provider="{provider}"}} {data["queued"]}')
+        return lines
@@ -1,8 +1,42 @@
-from typing import Dict, Any, AsyncIterator
+import asyncio
+import functools
+import time
+from typing import Dict, Any, AsyncIterator, List, Optional
 from openai import AsyncOpenAI
 from anthropic import AsyncAnthropic
 from app.config import settings
-from app.models.llm_models import ChatRequest, ChatResponse
+from app.models.llm_models import ChatRequest, ChatResponse, Message
+from app.services.llm_cache import LLMResponseCache, make_cache_key
+from app.services.http_pool import ProviderHTTPPool, http_timeout
+from app.services.llm_scheduler import LLMScheduler
+from app.services.llm_resilience import LLMResilience
+from app.services.llm_streaming import StreamMetrics
+from app.services.llm_telemetry import LLMTelemetry
+from app.services.llm_mock import MockProvider
+from app.services.llm_context import (
+    SUMMARY_PROMPT,
+    anthropic_payload,
+    compaction_cut,
+    compaction_segments,
+    transcript
+)
+
+
+def estimate_tokens(request: ChatRequest) -> int:
+    """Rough token budget of a request: ~4 characters per prompt token plus max_tokens"""
+    prompt_chars = sum(len(msg.content) for msg in request.messages)
+    return prompt_chars // 4 + (request.max_tokens or 0)
+
+
+def usage_tokens(usage: Optional[Dict[str, Any]]) -> Optional[int]:
+    """Total tokens from an OpenAI or Anthropic usage block"""
+    if not usage:
+        return None
+    if usage.get("total_tokens") is not None:
+        return usage["total_tokens"]
+    if "input_tokens" in usage or "output_tokens" in usage:
+        return (usage.get("input_tokens") or 0) + (usage.get("output_tokens") or 0)
+    return None
 
 
 class LLMService:
@@ -10,25 +44,387 @@ class LLMService:
         self.openai_client = None
         self.anthropic_client = None
 
+        # Both SDK clients share one tuned keep-alive pool
+        self.http_pool = ProviderHTTPPool()
+
         if settings.OPENAI_API_KEY:
-            self.openai_client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
+            self.openai_client = AsyncOpenAI(
+                api_key=settings.OPENAI_API_KEY,
+                http_client=self.http_pool.client,
+                timeout=http_timeout(),
+                max_retries=0  # retries are handled by self.resilience
+            )
 
         if settings.ANTHROPIC_API_KEY:
-            self.anthropic_client = AsyncAnthropic(api_key=settings.ANTHROPIC_API_KEY)
+            self.anthropic_client = AsyncAnthropic(
+                api_key=settings.ANTHROPIC_API_KEY,
+                http_client=self.http_pool.client,
+                timeout=http_timeout(),
+                max_retries=0  # retries are handled by self.resilience
+            )
+
+        # Offline provider for load testing the proxy itself
+        self.mock = None
+        if settings.LLM_MOCK_ENABLED:
+            self.mock = MockProvider(
+                latency_ms=settings.LLM_MOCK_LATENCY_MS,
+                latency_sigma=settings.LLM_MOCK_LATENCY_SIGMA,
+                tokens_per_second=settings.LLM_MOCK_TOKENS_PER_SECOND,
+                output_tokens=settings.LLM_MOCK_OUTPUT_TOKENS,
+                failure_rate=settings.LLM_MOCK_FAILURE_RATE,
+                failure_status=settings.LLM_MOCK_FAILURE_STATUS,
+                stream_abort_rate=settings.LLM_MOCK_STREAM_ABORT_RATE,
+                seed=settings.LLM_MOCK_SEED
+            )
+
+        self.scheduler = LLMScheduler(
+            provider_concurrency=settings.LLM_MAX_CONCURRENCY_PER_PROVIDER,
+            model_concurrency=settings.LLM_MAX_CONCURRENCY_PER_MODEL,
+            requests_per_minute=settings.LLM_REQUESTS_PER_MINUTE,
+            tokens_per_minute=settings.LLM_TOKENS_PER_MINUTE,
+            max_queue=settings.LLM_QUEUE_MAX_SIZE,
+            queue_timeout=settings.LLM_QUEUE_TIMEOUT,
+            overrides=settings.LLM_SCHEDULER_OVERRIDES
+        )
+
+        self.resilience = LLMResilience(
+            max_attempts=settings.LLM_RETRY_MAX_ATTEMPTS,
+            base_delay=settings.LLM_RETRY_BASE_DELAY,
+            max_delay=settings.LLM_RETRY_MAX_DELAY,
+            attempt_timeout=settings.LLM_ATTEMPT_TIMEOUT,
+            first_chunk_timeout=settings.LLM_FIRST_CHUNK_TIMEOUT,
+            hedge_enabled=settings.LLM_HEDGE_ENABLED,
+            hedge_percentile=settings.LLM_HEDGE_PERCENTILE,
+            hedge_min_samples=settings.LLM_HEDGE_MIN_SAMPLES,
+            hedge_min_delay=settings.LLM_HEDGE_MIN_DELAY,
+            failover=settings.LLM_FAILOVER
+        )
+
+        self.stream_metrics = StreamMetrics()
+
+        self.telemetry = LLMTelemetry(
+            db_path=settings.LLM_TELEMETRY_DB_PATH,
+            flush_interval=settings.LLM_TELEMETRY_FLUSH_INTERVAL,
+            pricing=settings.LLM_PRICING
+        )
+
+        # Compaction statistics
+        self._compactions_total = 0
+        self._compaction_summaries_total = 0
+        self._compacted_turns_total = 0
+
+        self.cache = LLMResponseCache(
+            max_bytes=settings.LLM_CACHE_MAX_BYTES,
+            default_ttl=settings.LLM_CACHE_TTL,
+            db_path=settings.LLM_CACHE_DB_PATH
+        )
+
+    def _cache_mode(self, request: ChatRequest) -> str:
+        """Resolve the effective cache mode ('use', 'refresh' or 'skip') for a request"""
+        if request.cache is not None:
+            return request.cache
+        if not settings.LLM_CACHE_ENABLED:
+            return "skip"
+        temperature = request.temperature if request.temperature is not None else 1.0
+        return "use" if temperature <= settings.LLM_CACHE_MAX_TEMPERATURE else "skip"
+
+    def _prompt_cache(self, request: ChatRequest) -> bool:
+        """Whether Anthropic prompt-cache breakpoints are added for a request"""
+        if request.prompt_cache is not None:
+            return request.prompt_cache
+        return settings.LLM_PROMPT_CACHE_ENABLED
+
+    async def _compact(self, request: ChatRequest) -> ChatRequest:
+        """
+        Fit a long conversation into its token budget
+
+        'truncate' drops the oldest turns; 'summarize' replaces them with a
+        summary (falling back to truncation if summarizing fails). System
+        messages and the latest turns are always kept.
+        """
+        mode = request.compaction or settings.LLM_COMPACTION_MODE
+        if mode == "off":
+            return request
+
+        budget = request.context_budget or settings.LLM_CONTEXT_TOKEN_BUDGET
+        system = [msg for msg in request.messages if msg.role == "system"]
+        turns = [msg for msg in request.messages if msg.role != "system"]
+        cut = compaction_cut(turns, budget)
+        if not cut:
+            return request
+
+        if mode == "summarize":
+            try:
+                summary = await self._summarize(request, turns, budget, cut)
+            except Exception as e:
+                print(f"Warning: Failed to summarize conversation, truncating instead: {e}")
+            else:
+                system.append(Message(role="system", content=f"Summary of the earlier conversation:\n{summary}"))
+
+        self._compactions_total += 1
+        self._compacted_turns_total += cut
+        return request.model_copy(update={"messages": system + turns[cut:]})
+
+    async def _summarize(self, request: ChatRequest, turns: List[Message], budget: int, cut: int) -> str:
+        """
+        Summarize turns[:cut] span by span, each onto the summary before it
+
+        Summaries are deterministic and go through the response cache, so only
+        the newest span costs a provider call on later turns.
+        """
+        provider, model = request.provider, request.model
+        if settings.LLM_COMPACTION_SUMMARY_MODEL:
+            provider, _, model = settings.LLM_COMPACTION_SUMMARY_MODEL.partition(":")
+
+        summary = ""
+        for start, end in compaction_segments(turns, budget, cut):
+            content = transcript(turns[start:end])
+            if summary:
+                content = f"Summary so far:\n{summary}\n\nContinuation:\n{content}"
+            response = await self.chat_completion(ChatRequest(
+                messages=[Message(role="system", content=SUMMARY_PROMPT), Message(role="user", content=content)],
+                provider=provider,
+                model=model,
+                temperature=0,
+                max_tokens=settings.LLM_COMPACTION_SUMMARY_TOKENS,
+                priority=request.priority,
+                cache="use",
+                compaction="off",
+                user=request.user
+            ))
+            self._compaction_summaries_total += int(not response.cached)
+            summary = response.message
+        return summary
+
+    async def cache_stats(self) -> Dict[str, Any]:
+        """Return response cache statistics"""
+        return {"enabled": settings.LLM_CACHE_ENABLED, **await self.cache.stats()}
+
+    async def clear_cache(self) -> int:
+        """Drop all cached completions"""
+        return await self.cache.clear()
+
+    async def warm_connections(self) -> int:
+        """Open keep-alive connections to each configured provider"""
+        urls = [
+            str(client.base_url)
+            for client in (self.openai_client, self.anthropic_client)
+            if client is not None
+        ]
+        return await self.http_pool.warm(urls)
+
+    def pool_stats(self) -> Dict[str, Any]:
+        """Return provider connection pool statistics"""
+        return self.http_pool.stats()
+
+    def resilience_stats(self) -> Dict[str, Any]:
+        """Return retry, hedge and failover statistics"""
+        return self.resilience.stats()
+
+    def _record_call(
+        self,
+        request: ChatRequest,
+        started: float,
+        status: str,
+        provider: Optional[str] = None,
+        model: Optional[str] = None,
+        usage: Optional[Dict[str, Any]] = None,
+        output_chars: int = 0,
+        cached: bool = False,
+        stream: bool = False,
+        ttft: Optional[float] = None
+    ) -> None:
+        """
+        Record a finished call in telemetry
+
+        Token counts come from the provider's usage block; when it is missing
+        (OpenAI streams, failed or abandoned calls) they are estimated at
+        ~4 characters per token.
+        """
+        usage = usage or {}
+        input_tokens = usage.get("prompt_tokens", usage.get("input_tokens"))
+        output_tokens = usage.get("completion_tokens", usage.get("output_tokens"))
+        # Anthropic reports prompt-cache reads and writes separately from input_tokens
+        cache_read = usage.get("cache_read_input_tokens") or 0
+        cache_write = usage.get("cache_creation_input_tokens") or 0
+        estimated = input_tokens is None or output_tokens is None
+        if input_tokens is None:
+            input_tokens = sum(len(msg.content) for msg in request.messages) // 4
+        else:
+            input_tokens += cache_read + cache_write
+        if output_tokens is None:
+            output_tokens = round(output_chars / 4)
+
+        self.telemetry.record(
+            provider=provider or request.provider.lower(),
+            model=model or request.model,
+            user=request.user,
+            stream=stream,
+            status=status,
+            cached=cached,
+            input_tokens=input_tokens,
+            output_tokens=output_tokens,
+            estimated=estimated,
+            latency=time.monotonic() - started,
+            ttft=ttft,
+            cache_read_tokens=cache_read,
+            cache_write_tokens=cache_write
+        )
+
+    def usage_stats(self, group_by: str = "model") -> Dict[str, Any]:
+        """Return token, cost and latency aggregates grouped by model or user"""
+        return self.telemetry.stats(group_by)
+
+    def mock_stats(self) -> Optional[Dict[str, Any]]:
+        """Return mock provider settings and counters, or None when it is disabled"""
+        return self.mock.stats() if self.mock else None
+
+    def stream_stats(self) -> Dict[str, Any]:
+        """Return time-to-first-token and throughput of recent streams"""
+        return self.stream_metrics.stats()
+
+    def scheduler_stats(self) -> Dict[str, Any]:
+        """Return request queue and concurrency statistics"""
+        return self.scheduler.stats()
+
+    async def prometheus_metrics(self) -> str:
+        """Render scheduler, connection pool, usage and cache metrics in the Prometheus text format"""
+        lines = self.scheduler.prometheus_lines()
+
+        pool = self.http_pool.stats()
+        for name, key, kind in (
+            ("llm_http_connections", "connections", "gauge"),
+            ("llm_http_connections_idle", "idle", "gauge"),
+            ("llm_http_connections_active", "active", "gauge"),
+            ("llm_http_requests_waiting", "waiting", "gauge"),
+            ("llm_http_requests_total", "requests_total", "counter"),
+        ):
+            lines += [f"# TYPE {name} {kind}", f"{name} {pool[key]}"]
+
+        streams = self.stream_metrics
+        for name, value, kind in (
+            ("llm_streams_total", streams.streams_total, "counter"),
+            ("llm_streams_disconnected_total", streams.disconnected_total, "counter"),
+            ("llm_stream_ttft_seconds_total", round(streams.ttft_total, 6), "counter"),
+            ("llm_stream_tokens_total", streams.tokens_total, "counter"),
+            ("llm_stream_frames_total", streams.frames_total, "counter"),
+        ):
+            lines += [f"# TYPE {name} {kind}", f"{name} {value}"]
+
+        lines += self.telemetry.prometheus_lines()
+
+        for name, value in (
+            ("llm_compactions_total", self._compactions_total),
+            ("llm_compaction_summaries_total", self._compaction_summaries_total),
+            ("llm_compacted_turns_total", self._compacted_turns_total),
+        ):
+            lines += [f"# TYPE {name} counter", f"{name} {value}"]
+
+        cache = await self.cache.stats()
+        for name, key, kind in (
+            ("llm_cache_entries", "entries", "gauge"),
+            ("llm_cache_memory_hits_total", "memory_hits", "counter"),
+            ("llm_cache_disk_hits_total", "disk_hits", "counter"),
+            ("llm_cache_misses_total", "misses", "counter"),
+        ):
+            lines += [f"# TYPE {name} {kind}", f"{name} {cache[key]}"]
+
+        return "\n".join(lines) + "\n"
+
+    async def close(self) -> None:
+        """Close provider connections, the response cache and the telemetry store"""
+        await self.http_pool.close()
+        self.cache.close()
+        await self.telemetry.close()
 
     async def chat_completion(self, request: ChatRequest) -> ChatResponse:
         """
         Process chat completion request using specified LLM provider
+
+        Every call, including cache hits and failures, is recorded in telemetry.
+        """
+        started = time.monotonic()
+        try:
+            request = await self._compact(request)
+            response = await self._cached_completion(request)
+        except asyncio.CancelledError:
+            self._record_call(request, started, "cancelled")
+            raise
+        except Exception:
+            self._record_call(request, started, "error")
+            raise
+        self._record_call(
+            request,
+            started,
+            "ok",
+            provider=response.provider,
+            model=response.model,
+            usage=response.usage,
+            output_chars=len(response.message),
+            cached=response.cached
+        )
+        return response
+
+    async def _cached_completion(self, request: ChatRequest) -> ChatResponse:
+        """
+        Deterministic requests (or those with cache="use") are answered from
+        the response cache when the same request was completed before.
+        """
+        mode = self._cache_mode(request)
+        if mode == "skip":
+            return await self._complete(request)
+
+        key = make_cache_key(request)
+        if mode == "use":
+            cached = await self.cache.get(key)
+            if cached is not None:
+                cached.pop("chunks", None)
+                return ChatResponse(**cached, cached=True)
+
+        response = await self._complete(request)
+        entry = response.model_dump(exclude={"cached"})
+        entry["chunks"] = [response.message]
+        await self.cache.put(key, entry, ttl=request.cache_ttl)
+        return response
+
+    def _provider_available(self, provider: str) -> bool:
+        """Whether a provider has a configured client"""
+        if provider == "openai":
+            return self.openai_client is not None
+        if provider == "anthropic":
+            return self.anthropic_client is not None
+        if provider == "mock":
+            return self.mock is not None
+        return False
+
+    async def _complete(self, request: ChatRequest) -> ChatResponse:
+        """
+        Complete a request with retries, hedging and failover
+        """
+        return await self.resilience.call(request, self._attempt, self._provider_available)
+
+    async def _attempt(self, request: ChatRequest) -> ChatResponse:
+        """
+        Dispatch one chat completion attempt to the provider once the scheduler admits it
         """
         provider = request.provider.lower()
 
         if provider == "openai":
-            return await self._openai_chat(request)
+            handler = self._openai_chat
         elif provider == "anthropic":
-            return await self._anthropic_chat(request)
+            handler = self._anthropic_chat
+        elif provider == "mock":
+            handler = self._mock_chat
         else:
             raise ValueError(f"Unsupported provider: {provider}")
 
+        async with self.scheduler.slot(
+            provider, request.model, estimate_tokens(request), request.priority
+        ) as permit:
+            response = await handler(request)
+            permit.settle(usage_tokens(response.usage))
+        return response
+
     async def _openai_chat(self, request: ChatRequest) -> ChatResponse:
         """
         Handle OpenAI chat completion
@@ -59,15 +455,10 @@ class LLMService:
         if not self.anthropic_client:
             raise ValueError("Anthropic API key not configured")
 
-        # Convert messages to Anthropic format
-        system_message = None
-        messages = []
-
-        for msg in request.messages:
-            if msg.role == "system":
-                system_message = msg.content
-            else:
-                messages.append({"role": msg.role, "content": msg.content})
+        # Convert messages to Anthropic format, marking stable prefixes cacheable
+        system_message, messages = anthropic_payload(
+            request.messages, self._prompt_cache(request), settings.LLM_PROMPT_CACHE_MIN_TOKENS
+        )
 
         kwargs = {
             "model": request.model,
@@ -84,29 +475,120 @@ class LLMService:
         return ChatResponse(
             message=response.content[0].text,
             model=response.model,
-            usage={
-                "input_tokens": response.usage.input_tokens,
-                "output_tokens": response.usage.output_tokens,
-            } if hasattr(response, 'usage') else None,
+            # Includes cache_creation_input_tokens / cache_read_input_tokens when reported
+            usage=response.usage.model_dump(exclude_none=True) if hasattr(response, 'usage') else None,
             provider="anthropic"
         )
 
+    async def _mock_chat(self, request: ChatRequest) -> ChatResponse:
+        """
+        Handle mock provider chat completion
+        """
+        if not self.mock:
+            raise ValueError("Mock provider not enabled (set LLM_MOCK_ENABLED)")
+        return await self.mock.chat(request)
+
     async def stream_chat_completion(self, request: ChatRequest) -> AsyncIterator[str]:
         """
         Stream chat completion response
+
+        The call is recorded in telemetry when the stream ends, including
+        streams the client abandoned (their tokens are still billed).
+        """
+        started = time.monotonic()
+        first_chunk_at: Optional[float] = None
+        output_chars = 0
+        usage: Dict[str, Any] = {}
+        status = "cancelled"
+        try:
+            request = await self._compact(request)
+            async for chunk in self._cached_stream(request, usage):
+                if first_chunk_at is None:
+                    first_chunk_at = time.monotonic()
+                output_chars += len(chunk)
+                yield chunk
+            status = "ok"
+        except Exception:
+            status = "error"
+            raise
+        finally:
+            self._record_call(
+                request,
+                started,
+                status,
+                provider=usage.get("provider"),
+                model=usage.get("model"),
+                usage=usage.get("tokens"),
+                output_chars=output_chars,
+                cached=usage.get("cached", False),
+                stream=True,
+                ttft=first_chunk_at - started if first_chunk_at else None
+            )
+
+    async def _cached_stream(self, request: ChatRequest, usage: Dict[str, Any]) -> AsyncIterator[str]:
+        """
+        Cached completions are replayed chunk by chunk; a fresh stream is
+        cached only once it has been received in full.
+        """
+        mode = self._cache_mode(request)
+        if mode == "skip":
+            async for chunk in self._stream(request, usage):
+                yield chunk
+            return
+
+        key = make_cache_key(request)
+        if mode == "use":
+            cached = await self.cache.get(key)
+            if cached is not None:
+                usage.update(provider=cached["provider"], model=cached["model"], tokens=cached["usage"], cached=True)
+                for chunk in cached.get("chunks") or [cached["message"]]:
+                    yield chunk
+                return
+
+        chunks: List[str] = []
+        async for chunk in self._stream(request, usage):
+            chunks.append(chunk)
+            yield chunk
+
+        await self.cache.put(key, {
+            "message": "".join(chunks),
+            "model": usage.get("model", request.model),
+            "usage": usage.get("tokens"),
+            "provider": usage.get("provider", request.provider.lower()),
+            "chunks": chunks,
+        }, ttl=request.cache_ttl)
+
+    async def _stream(self, request: ChatRequest, usage: Dict[str, Any]) -> AsyncIterator[str]:
+        """
+        Stream a request with retries and failover before the first chunk
+        """
+        attempt = functools.partial(self._attempt_stream, usage=usage)
+        async for chunk in self.resilience.stream(request, attempt, self._provider_available):
+            yield chunk
+
+    async def _attempt_stream(self, request: ChatRequest, usage: Dict[str, Any]) -> AsyncIterator[str]:
+        """
+        Dispatch one streaming attempt to the provider once the scheduler admits it
+
+        The slot is held until the stream finishes or the consumer stops reading.
         """
         provider = request.provider.lower()
 
         if provider == "openai":
-            async for chunk in self._openai_stream(request):
-                yield chunk
+            handler = self._openai_stream
         elif provider == "anthropic":
-            async for chunk in self._anthropic_stream(request):
-                yield chunk
+            handler = self._anthropic_stream
+        elif provider == "mock":
+            handler = self._mock_stream
         else:
             raise ValueError(f"Unsupported provider: {provider}")
 
-    async def _openai_stream(self, request: ChatRequest) -> AsyncIterator[str]:
+        usage.update(provider=provider, model=request.model, tokens=None)
+        async with self.scheduler.slot(provider, request.model, estimate_tokens(request), request.priority):
+            async for chunk in handler(request, usage):
+                yield chunk
+
+    async def _openai_stream(self, request: ChatRequest, usage: Optional[Dict[str, Any]] = None) -> AsyncIterator[str]:
         """
         Stream OpenAI chat completion
         """
@@ -127,28 +609,22 @@ class LLMService:
             if chunk.choices[0].delta.content:
                 yield chunk.choices[0].delta.content
 
-    async def _anthropic_stream(self, request: ChatRequest) -> AsyncIterator[str]:
+    async def _anthropic_stream(self, request: ChatRequest, usage: Optional[Dict[str, Any]] = None) -> AsyncIterator[str]:
         """
         Stream Anthropic chat completion
         """
         if not self.anthropic_client:
             raise ValueError("Anthropic API key not configured")
 
-        system_message = None
-        messages = []
-
-        for msg in request.messages:
-            if msg.role == "system":
-                system_message = msg.content
-            else:
-                messages.append({"role": msg.role, "content": msg.content})
+        system_message, messages = anthropic_payload(
+            request.messages, self._prompt_cache(request), settings.LLM_PROMPT_CACHE_MIN_TOKENS
+        )
 
         kwargs = {
             "model": request.model,
             "messages": messages,
             "max_tokens": request.max_tokens,
             "temperature": request.temperature,
-            "stream": True,
         }
 
         if system_message:
@@ -158,5 +634,18 @@ class LLMService:
             async for text in stream.text_stream:
                 yield text
 
+            if usage is not None:
+                message = await stream.get_final_message()
+                usage["tokens"] = message.usage.model_dump(exclude_none=True)
+
+    async def _mock_stream(self, request: ChatRequest, usage: Optional[Dict[str, Any]] = None) -> AsyncIterator[str]:
+        """
+        Stream mock provider chat completion
+        """
+        if not self.mock:
+            raise ValueError("Mock provider not enabled (set LLM_MOCK_ENABLED)")
+        async for chunk in self.mock.stream(request, usage):
+            yield chunk
+
 
 llm_service = LLMService()
@@ -0,0 +1,311 @@
+"""
+Server-side conversation sessions, so clients send only the newest message
+"""
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, AsyncIterator
+from app.config import settings
+from app.models.llm_models import ChatRequest, ChatResponse, Message
+from app.services.llm_context import message_tokens
+from app.services.llm_service import llm_service
+
+# ChatRequest fields a session fixes for all of its turns
+SESSION_OPTIONS = (
+    "model", "provider", "temperature", "max_tokens", "priority",
+    "user", "prompt_cache", "compaction", "context_budget",
+)
+
+
+class ConversationSession:
+    """History and default request options of one conversation"""
+
+    def __init__(
+        self,
+        options: Dict[str, Any],
+        messages: Optional[List[Message]] = None,
+        session_id: Optional[str] = None,
+        created_at: Optional[float] = None,
+        updated_at: Optional[float] = None
+    ) -> None:
+        self.id = session_id or uuid.uuid4().hex
+        self.options = options
+        self.messages: List[Message] = []
+        self.tokens = 0
+        self.created_at = created_at or time.time()
+        self.updated_at = updated_at or self.created_at
+        # One turn at a time, so concurrent calls cannot interleave history
+        self.lock = asyncio.Lock()
+        for message in messages or []:
+            self._add(message)
+
+    def _add(self, message: Message) -> None:
+        self.messages.append(message)
+        # Token estimates are kept per session rather than recounted each turn
+        self.tokens += message_tokens(message)
+
+    def append(self, message: Message) -> None:
+        self._add(message)
+        self.updated_at = time.time()
+
+    def request(self, message: Message, overrides: Dict[str, Any]) -> ChatRequest:
+        """A ChatRequest for the history plus `message`; history messages are not revalidated"""
+        return ChatRequest(**{**self.options, **overrides}, messages=self.messages + [message])
+
+    def to_dict(self, include_messages: bool = False) -> Dict[str, Any]:
+        data = {
+            "session_id": self.id,
+            "options": self.options,
+            "message_count": len(self.messages),
+            "tokens": self.tokens,
+            "turns": sum(message.role == "assistant" for message in self.messages),
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+        }
+        if include_messages:
+            data["messages"] = [message.model_dump() for message in self.messages]
+        return data
+
+
+class LLMSessionService:
+    """
+    Bounded store of conversation sessions with an optional SQLite backend
+
+    Sessions live in an LRU capped at LLM_SESSION_MAX_SESSIONS and expire
+    after LLM_SESSION_TTL idle seconds. With LLM_SESSION_DB_PATH set, each
+    appended message is also written to disk, and sessions evicted from
+    memory (or surviving a restart) are reloaded on their next use.
+    """
+
+    def __init__(
+        self,
+        max_sessions: int,
+        ttl: float,
+        max_messages: int,
+        db_path: Optional[str] = None
+    ) -> None:
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.max_messages = max_messages
+        self.db_path = db_path
+
+        self.sessions: "OrderedDict[str, ConversationSession]" = OrderedDict()
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()
+
+        # Statistics
+        self._created_total = 0
+        self._expired_total = 0
+        self._evicted_total = 0
+        self._loaded_total = 0
+
+        if db_path:
+            self._open_db()
+
+    def _open_db(self) -> None:
+        try:
+            directory = os.path.dirname(self.db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS sessions ("
+                "id TEXT PRIMARY KEY, options TEXT NOT NULL, created_at REAL NOT NULL, updated_at REAL NOT NULL)"
+            )
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS session_messages ("
+                "session_id TEXT NOT NULL, seq INTEGER NOT NULL, role TEXT NOT NULL, content TEXT NOT NULL, "
+                "PRIMARY KEY (session_id, seq))"
+            )
+            self._db.commit()
+        except sqlite3.Error as e:
+            print(f"Warning: Session database unavailable, keeping sessions in memory only: {e}")
+            self._db = None
+
+    # Disk tier (runs in a worker thread)
+
+    def _db_write(self, session: ConversationSession, messages: List[Message]) -> None:
+        start = len(session.messages) - len(messages)
+        with self._db_lock:
+            self._db.execute(
+                "INSERT INTO sessions (id, options, created_at, updated_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(id) DO UPDATE SET updated_at = excluded.updated_at",
+                (session.id, json.dumps(session.options), session.created_at, session.updated_at)
+            )
+            self._db.executemany(
+                "INSERT OR REPLACE INTO session_messages (session_id, seq, role, content) VALUES (?, ?, ?, ?)",
+                [(session.id, start + offset, msg.role, msg.content) for offset, msg in enumerate(messages)]
+            )
+            self._db.commit()
+
+    def _db_load(self, session_id: str) -> Optional[ConversationSession]:
+        with self._db_lock:
+            row = self._db.execute(
+                "SELECT options, created_at, updated_at FROM sessions WHERE id = ?", (session_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            messages = self._db.execute(
+                "SELECT role, content FROM session_messages WHERE session_id = ? ORDER BY seq", (session_id,)
+            ).fetchall()
+        return ConversationSession(
+            options=json.loads(row[0]),
+            messages=[Message(role=role, content=content) for role, content in messages],
+            session_id=session_id,
+            created_at=row[1],
+            updated_at=row[2]
+        )
+
+    def _db_delete(self, session_id: str) -> bool:
+        with self._db_lock:
+            deleted = self._db.execute("DELETE FROM sessions WHERE id = ?", (session_id,)).rowcount
+            self._db.execute("DELETE FROM session_messages WHERE session_id = ?", (session_id,))
+            self._db.commit()
+        return deleted > 0
+
+    async def _persist(self, session: ConversationSession, messages: List[Message]) -> None:
+        if self._db is None:
+            return
+        try:
+            await asyncio.to_thread(self._db_write, session, messages)
+        except sqlite3.Error as e:
+            print(f"Warning: Failed to persist session {session.id}: {e}")
+
+    # Memory tier
+
+    def _expired(self, session: ConversationSession) -> bool:
+        return bool(self.ttl) and time.time() - session.updated_at > self.ttl
+
+    def _remember(self, session: ConversationSession) -> None:
+        self.sessions[session.id] = session
+        self.sessions.move_to_end(session.id)
+        while len(self.sessions) > self.max_sessions:
+            # Persisted sessions can be reloaded; in-memory ones are gone
+            self.sessions.popitem(last=False)
+            self._evicted_total += 1
+
+    async def create(self, options: Dict[str, Any], messages: List[Message]) -> ConversationSession:
+        if len(messages) > self.max_messages:
+            raise ValueError(f"Session exceeds {self.max_messages} messages")
+        await self.purge_expired()
+        session = ConversationSession(options=options, messages=messages)
+        self._created_total += 1
+        self._remember(session)
+        await self._persist(session, session.messages)
+        return session
+
+    async def get(self, session_id: str) -> Optional[ConversationSession]:
+        session = self.sessions.get(session_id)
+        if session is None and self._db is not None:
+            try:
+                session = await asyncio.to_thread(self._db_load, session_id)
+            except sqlite3.Error as e:
+                print(f"Warning: Failed to load session {session_id}: {e}")
+            if session is not None:
+                self._loaded_total += 1
+
+        if session is None:
+            return None
+        if self._expired(session):
+            await self.delete(session_id)
+            self._expired_total += 1
+            return None
+        self._remember(session)
+        return session
+
+    async def append(self, session: ConversationSession, messages: List[Message]) -> None:
+        """Add messages to a session's history"""
+        if len(session.messages) + len(messages) > self.max_messages:
+            raise ValueError(f"Session {session.id} would exceed {self.max_messages} messages")
+        for message in messages:
+            session.append(message)
+        await self._persist(session, messages)
+
+    async def delete(self, session_id: str) -> bool:
+        found = self.sessions.pop(session_id, None) is not None
+        if self._db is not None:
+            try:
+                found = await asyncio.to_thread(self._db_delete, session_id) or found
+            except sqlite3.Error as e:
+                print(f"Warning: Failed to delete session {session_id}: {e}")
+        return found
+
+    def _db_purge(self, cutoff: float) -> None:
+        with self._db_lock:
+            self._db.execute(
+                "DELETE FROM session_messages WHERE session_id IN (SELECT id FROM sessions WHERE updated_at < ?)",
+                (cutoff,)
+            )
+            self._db.execute("DELETE FROM sessions WHERE updated_at < ?", (cutoff,))
+            self._db.commit()
+
+    async def purge_expired(self) -> int:
+        """Drop sessions idle for longer than the TTL from memory and disk"""
+        if not self.ttl:
+            return 0
+        expired = [session_id for session_id, session in self.sessions.items() if self._expired(session)]
+        for session_id in expired:
+            del self.sessions[session_id]
+        self._expired_total += len(expired)
+        if self._db is not None:
+            try:
+                await asyncio.to_thread(self._db_purge, time.time() - self.ttl)
+            except sqlite3.Error as e:
+                print(f"Warning: Failed to purge expired sessions: {e}")
+        return len(expired)
+
+    # Turns
+
+    def _check_turn_room(self, session: ConversationSession) -> None:
+        """Refuse a turn before paying for its completion if the history could not keep it"""
+        if len(session.messages) + 2 > self.max_messages:
+            raise ValueError(f"Session {session.id} would exceed {self.max_messages} messages")
+
+    async def complete(self, session: ConversationSession, message: Message, overrides: Dict[str, Any]) -> ChatResponse:
+        """Complete the history plus `message`; both are kept only if the completion succeeds"""
+        async with session.lock:
+            self._check_turn_room(session)
+            response = await llm_service.chat_completion(session.request(message, overrides))
+            await self.append(session, [message, Message(role="assistant", content=response.message)])
+        return response
+
+    async def stream(self, session: ConversationSession, message: Message, overrides: Dict[str, Any]) -> AsyncIterator[str]:
+        """Stream a turn; the reply is added to the history once the stream completes"""
+        async with session.lock:
+            self._check_turn_room(session)
+            chunks: List[str] = []
+            async for chunk in llm_service.stream_chat_completion(session.request(message, overrides)):
+                chunks.append(chunk)
+                yield chunk
+            await self.append(session, [message, Message(role="assistant", content="".join(chunks))])
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "sessions": len(self.sessions),
+            "max_sessions": self.max_sessions,
+            "persistent": self._db is not None,
+            "created_total": self._created_total,
+            "expired_total": self._expired_total,
+            "evicted_total": self._evicted_total,
+            "loaded_total": self._loaded_total,
+        }
+
+    def close(self) -> None:
+        with self._db_lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+
+llm_session_service = LLMSessionService(
+    max_sessions=settings.LLM_SESSION_MAX_SESSIONS,
+    ttl=settings.LLM_SESSION_TTL,
+    max_messages=settings.LLM_SESSION_MAX_MESSAGES,
+    db_path=settings.LLM_SESSION_DB_PATH
+)
@@ -0,0 +1,212 @@
+"""
+Server-sent event framing, chunk coalescing and per-stream metrics
+"""
+import asyncio
+import json
+import time
+from collections import deque
+from json.encoder import encode_basestring_ascii
+from typing import List, Dict, Any, Optional, Deque, AsyncIterator
+
+DONE_FRAME = b"data: [DONE]\n\n"
+
+_END = object()
+
+
+def sse_frame(text: str) -> bytes:
+    """Encode a content delta; same bytes as json.dumps({'content': text}) without the dict round trip"""
+    return b'data: {"content": ' + encode_basestring_ascii(text).encode("ascii") + b"}\n\n"
+
+
+def sse_event(event: str, payload: Dict[str, Any]) -> bytes:
+    """A named event, ignored by clients that only handle unnamed messages"""
+    return f"event: {event}\ndata: {json.dumps(payload)}\n\n".encode("utf-8")
+
+
+class StreamStats:
+    """Timing of a single streamed completion"""
+
+    def __init__(self, provider: str, model: str, started: Optional[float] = None) -> None:
+        self.provider = provider
+        self.model = model
+        self.started = started or time.monotonic()
+        self.first_chunk_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.chunks = 0
+        self.characters = 0
+        self.frames = 0
+        self.status = "streaming"
+
+    def chunk(self, text: str) -> None:
+        if self.first_chunk_at is None:
+            self.first_chunk_at = time.monotonic()
+        self.chunks += 1
+        self.characters += len(text)
+
+    def finish(self, status: str) -> None:
+        if self.finished_at is None:
+            self.status = status
+            self.finished_at = time.monotonic()
+
+    @property
+    def ttft(self) -> Optional[float]:
+        return self.first_chunk_at - self.started if self.first_chunk_at else None
+
+    @property
+    def tokens(self) -> int:
+        """Estimated output tokens (~4 characters per token)"""
+        return max(self.chunks, round(self.characters / 4)) if self.chunks else 0
+
+    @property
+    def tokens_per_second(self) -> float:
+        """Output rate after the first token"""
+        end = self.finished_at or time.monotonic()
+        if self.first_chunk_at is None or end <= self.first_chunk_at:
+            return 0.0
+        return self.tokens / (end - self.first_chunk_at)
+
+    def to_dict(self) -> Dict[str, Any]:
+        end = self.finished_at or time.monotonic()
+        return {
+            "provider": self.provider,
+            "model": self.model,
+            "status": self.status,
+            "ttft": round(self.ttft, 4) if self.ttft is not None else None,
+            "duration": round(end - self.started, 4),
+            "chunks": self.chunks,
+            "frames": self.frames,
+            "tokens": self.tokens,
+            "tokens_per_second": round(self.tokens_per_second, 1),
+        }
+
+
+class StreamMetrics:
+    """Aggregate time-to-first-token and throughput over recent streams"""
+
+    def __init__(self, window: int = 1000) -> None:
+        self._ttft: Deque[float] = deque(maxlen=window)
+        self._rates: Deque[float] = deque(maxlen=window)
+        self.streams_total = 0
+        self.completed_total = 0
+        self.disconnected_total = 0
+        self.errors_total = 0
+        self.chunks_total = 0
+        self.frames_total = 0
+        self.tokens_total = 0
+        self.ttft_total = 0.0
+
+    def record(self, stats: StreamStats) -> None:
+        self.streams_total += 1
+        if stats.status == "completed":
+            self.completed_total += 1
+        elif stats.status == "disconnected":
+            self.disconnected_total += 1
+        else:
+            self.errors_total += 1
+        self.chunks_total += stats.chunks
+        self.frames_total += stats.frames
+        self.tokens_total += stats.tokens
+        if stats.ttft is not None:
+            self._ttft.append(stats.ttft)
+            self.ttft_total += stats.ttft
+        if stats.status == "completed" and stats.tokens_per_second:
+            self._rates.append(stats.tokens_per_second)
+
+    @staticmethod
+    def _percentile(values: List[float], fraction: float) -> float:
+        if not values:
+            return 0.0
+        ordered = sorted(values)
+        return ordered[min(len(ordered) - 1, int(fraction * (len(ordered) - 1)))]
+
+    def stats(self) -> Dict[str, Any]:
+        ttft = list(self._ttft)
+        rates = list(self._rates)
+        return {
+            "streams_total": self.streams_total,
+            "completed_total": self.completed_total,
+            "disconnected_total": self.disconnected_total,
+            "errors_total": self.errors_total,
+            "chunks_total": self.chunks_total,
+            "frames_total": self.frames_total,
+            "chunks_per_frame": round(self.chunks_total / self.frames_total, 2) if self.frames_total else 0.0,
+            "tokens_total": self.tokens_total,
+            "ttft_p50": round(self._percentile(ttft, 0.50), 4),
+            "ttft_p95": round(self._percentile(ttft, 0.95), 4),
+            "tokens_per_second_avg": round(sum(rates) / len(rates), 1) if rates else 0.0,
+        }
+
+
+async def coalesce(
+    chunks: AsyncIterator[str],
+    stats: StreamStats,
+    window: float,
+    max_bytes: int,
+    buffer_size: int
+) -> AsyncIterator[str]:
+    """
+    Merge provider deltas into larger pieces
+
+    The upstream is read by its own task into a bounded queue, so a slow
+    client applies backpressure to the provider read and closing this
+    iterator (e.g. on client disconnect) cancels the upstream immediately.
+    The first delta is passed through at once; later ones are merged until
+    `window` seconds have passed since the first buffered delta or
+    `max_bytes` characters are buffered (window 0 merges only deltas that
+    are already waiting).
+    """
+    queue: "asyncio.Queue[Any]" = asyncio.Queue(maxsize=max(1, buffer_size))
+
+    async def produce() -> None:
+        try:
+            async for chunk in chunks:
+                await queue.put(chunk)
+            await queue.put(_END)
+        except Exception as e:
+            await queue.put(e)
+        finally:
+            await chunks.aclose()
+
+    producer = asyncio.create_task(produce())
+    pending: List[str] = []
+    size = 0
+    deadline = 0.0
+    try:
+        while True:
+            if pending and window > 0:
+                try:
+                    item = await asyncio.wait_for(queue.get(), timeout=max(0.0, deadline - time.monotonic()))
+                except asyncio.TimeoutError:
+                    yield "".join(pending)
+                    pending, size = [], 0
+                    continue
+            else:
+                item = await queue.get()
+
+            if item is _END:
+                break
+            if isinstance(item, Exception):
+                if pending:
+                    yield "".join(pending)
+                    pending, size = [], 0
+                raise item
+
+            first = stats.first_chunk_at is None
+            stats.chunk(item)
+            if first or (window <= 0 and max_bytes <= 0):
+                yield item
+                continue
+
+            if not pending:
+                deadline = time.monotonic() + window
+            pending.append(item)
+            size += len(item)
+            # Without a time window, merge only what is already queued
+            if (max_bytes and size >= max_bytes) or (window <= 0 and queue.empty()):
+                yield "".join(pending)
+                pending, size = [], 0
+
+        if pending:
+            yield "".join(pending)
+    finally:
+        producer.cancel()
@@ -0,0 +1,295 @@
+"""
+Per-call token, cost and latency telemetry for LLM requests
+"""
+import asyncio
+import os
+import sqlite3
+import time
+from collections import deque
+from typing import List, Dict, Any, Optional, Deque, Tuple
+
+# USD per million tokens (input, output)
+DEFAULT_PRICING: Dict[str, Tuple[float, float]] = {
+    "gpt-4-turbo-preview": (10.0, 30.0),
+    "gpt-4": (30.0, 60.0),
+    "gpt-3.5-turbo": (0.5, 1.5),
+    "gpt-3.5-turbo-16k": (3.0, 4.0),
+    "claude-3-opus-20240229": (15.0, 75.0),
+    "claude-3-sonnet-20240229": (3.0, 15.0),
+    "claude-3-haiku-20240307": (0.25, 1.25),
+}
+
+# Prompt-cache reads and writes relative to the input price
+CACHE_READ_RATE = 0.1
+CACHE_WRITE_RATE = 1.25
+
+_COLUMNS = (
+    "timestamp", "provider", "model", "user", "stream", "status", "cached",
+    "input_tokens", "output_tokens", "estimated", "ttft", "latency", "cost", "cache_read_tokens",
+)
+
+
+def _percentile(values: List[float], fraction: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return round(ordered[min(len(ordered) - 1, int(fraction * (len(ordered) - 1)))], 4)
+
+
+class UsageAggregate:
+    """Running totals and recent latency samples for one group"""
+
+    def __init__(self, window: int) -> None:
+        self.calls = 0
+        self.errors = 0
+        self.cached = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.cache_read_tokens = 0
+        self.cost = 0.0
+        self.latencies: Deque[float] = deque(maxlen=window)
+        self.ttfts: Deque[float] = deque(maxlen=window)
+
+    def add(self, record: Dict[str, Any]) -> None:
+        self.calls += 1
+        self.errors += int(record["status"] != "ok")
+        self.cached += int(record["cached"])
+        self.input_tokens += record["input_tokens"]
+        self.output_tokens += record["output_tokens"]
+        self.cache_read_tokens += record["cache_read_tokens"]
+        self.cost += record["cost"]
+        if record["status"] == "ok" and not record["cached"]:
+            self.latencies.append(record["latency"])
+            if record["ttft"] is not None:
+                self.ttfts.append(record["ttft"])
+
+    def to_dict(self) -> Dict[str, Any]:
+        latencies = list(self.latencies)
+        ttfts = list(self.ttfts)
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "cached": self.cached,
+            "input_tokens": self.input_tokens,
+            "output_tokens": self.output_tokens,
+            "cache_read_tokens": self.cache_read_tokens,
+            "cost": round(self.cost, 6),
+            "cost_per_call": round(self.cost / self.calls, 6) if self.calls else 0.0,
+            "latency_p50": _percentile(latencies, 0.50),
+            "latency_p95": _percentile(latencies, 0.95),
+            "latency_p99": _percentile(latencies, 0.99),
+            "ttft_p50": _percentile(ttfts, 0.50),
+            "ttft_p95": _percentile(ttfts, 0.95),
+            "ttft_p99": _percentile(ttfts, 0.99),
+        }
+
+
+class LLMTelemetry:
+    """
+    Records every LLM call and aggregates it by provider/model and by user
+
+    Records are buffered in memory and appended to a SQLite table by
+    flush(), which the application runs periodically; aggregates cover
+    calls since startup (latency percentiles over the recent window).
+    """
+
+    def __init__(
+        self,
+        db_path: Optional[str],
+        flush_interval: float,
+        window: int = 1000,
+        pricing: Optional[Dict[str, List[float]]] = None
+    ) -> None:
+        self.db_path = db_path
+        self.flush_interval = flush_interval
+        self.window = window
+        self.pricing: Dict[str, Tuple[float, float]] = dict(DEFAULT_PRICING)
+        for model, prices in (pricing or {}).items():
+            self.pricing[model] = (float(prices[0]), float(prices[1]))
+
+        self.started_at = time.time()
+        self._pending: List[Dict[str, Any]] = []
+        self._by_model: Dict[str, UsageAggregate] = {}
+        self._by_user: Dict[str, UsageAggregate] = {}
+        self._db: Optional[sqlite3.Connection] = None
+        self.flushed_total = 0
+
+        if db_path:
+            self._open_db()
+
+    def _open_db(self) -> None:
+        try:
+            directory = os.path.dirname(self.db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS llm_calls ("
+                "timestamp REAL, provider TEXT, model TEXT, user TEXT, stream INTEGER, status TEXT, "
+                "cached INTEGER, input_tokens INTEGER, output_tokens INTEGER, estimated INTEGER, "
+                "ttft REAL, latency REAL, cost REAL, cache_read_tokens INTEGER)"
+            )
+            existing = {row[1] for row in self._db.execute("PRAGMA table_info(llm_calls)")}
+            if "cache_read_tokens" not in existing:
+                self._db.execute("ALTER TABLE llm_calls ADD COLUMN cache_read_tokens INTEGER")
+            self._db.execute("CREATE INDEX IF NOT EXISTS llm_calls_model ON llm_calls (provider, model, timestamp)")
+            self._db.commit()
+        except sqlite3.Error as e:
+            print(f"Warning: LLM telemetry database unavailable, keeping stats in memory only: {e}")
+            self._db = None
+
+    def cost(
+        self,
+        model: str,
+        input_tokens: int,
+        output_tokens: int,
+        cache_read_tokens: int = 0,
+        cache_write_tokens: int = 0
+    ) -> float:
+        """
+        Estimated USD cost; unknown models cost 0
+
+        input_tokens includes prompt-cache reads and writes, which are billed
+        at 10% and 125% of the input price.
+        """
+        prices = self.pricing.get(model)
+        if prices is None:
+            # Dated variants ("gpt-4-0613") fall back to their base model
+            prices = next((p for name, p in self.pricing.items() if model.startswith(name)), (0.0, 0.0))
+        uncached = input_tokens - cache_read_tokens - cache_write_tokens
+        prompt = uncached + cache_read_tokens * CACHE_READ_RATE + cache_write_tokens * CACHE_WRITE_RATE
+        return (prompt * prices[0] + output_tokens * prices[1]) / 1_000_000
+
+    def record(
+        self,
+        provider: str,
+        model: str,
+        user: Optional[str],
+        stream: bool,
+        status: str,
+        cached: bool,
+        input_tokens: int,
+        output_tokens: int,
+        estimated: bool,
+        latency: float,
+        ttft: Optional[float] = None,
+        cache_read_tokens: int = 0,
+        cache_write_tokens: int = 0
+    ) -> Dict[str, Any]:
+        """Record one call; cached responses and failed calls are free"""
+        record = {
+            "timestamp": time.time(),
+            "provider": provider,
+            "model": model,
+            "user": user,
+            "stream": stream,
+            "status": status,
+            "cached": cached,
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "cache_read_tokens": cache_read_tokens,
+            "estimated": estimated,
+            "ttft": round(ttft, 6) if ttft is not None else None,
+            "latency": round(latency, 6),
+            "cost": 0.0 if cached or status == "error" else self.cost(
+                model, input_tokens, output_tokens, cache_read_tokens, cache_write_tokens
+            ),
+        }
+
+        key = f"{provider}:{model}"
+        if key not in self._by_model:
+            self._by_model[key] = UsageAggregate(self.window)
+        self._by_model[key].add(record)
+
+        user_key = user or "anonymous"
+        if user_key not in self._by_user:
+            self._by_user[user_key] = UsageAggregate(self.window)
+        self._by_user[user_key].add(record)
+
+        if self._db is not None:
+            self._pending.append(record)
+        return record
+
+    def _write(self, records: List[Dict[str, Any]]) -> None:
+        self._db.executemany(
+            f"INSERT INTO llm_calls ({', '.join(_COLUMNS)}) VALUES ({', '.join('?' for _ in _COLUMNS)})",
+            [tuple(record[column] for column in _COLUMNS) for record in records]
+        )
+        self._db.commit()
+
+    async def flush(self) -> int:
+        """Append buffered records to the SQLite store"""
+        if self._db is None or not self._pending:
+            return 0
+        records, self._pending = self._pending, []
+        try:
+            await asyncio.to_thread(self._write, records)
+        except sqlite3.Error as e:
+            print(f"Warning: Failed to flush LLM telemetry: {e}")
+            self._pending = records + self._pending
+            return 0
+        self.flushed_total += len(records)
+        return len(records)
+
+    async def flush_periodically(self) -> None:
+        """Flush buffered records every flush_interval seconds until cancelled"""
+        if self._db is None or self.flush_interval <= 0:
+            return
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    def stats(self, group_by: str = "model") -> Dict[str, Any]:
+        """Aggregates since startup grouped by 'model' (provider:model) or 'user'"""
+        if group_by not in ("model", "user"):
+            raise ValueError(f"Unsupported group_by: {group_by}")
+        groups = self._by_model if group_by == "model" else self._by_user
+
+        totals = UsageAggregate(0)
+        for aggregate in groups.values():
+            totals.calls += aggregate.calls
+            totals.errors += aggregate.errors
+            totals.cached += aggregate.cached
+            totals.input_tokens += aggregate.input_tokens
+            totals.output_tokens += aggregate.output_tokens
+            totals.cache_read_tokens += aggregate.cache_read_tokens
+            totals.cost += aggregate.cost
+
+        summary = totals.to_dict()
+        for key in [key for key in summary if key.startswith(("latency_", "ttft_"))]:
+            del summary[key]
+
+        return {
+            "since": self.started_at,
+            "group_by": group_by,
+            "totals": summary,
+            "groups": {key: aggregate.to_dict() for key, aggregate in sorted(groups.items())},
+            "pending_flush": len(self._pending),
+            "flushed_total": self.flushed_total,
+        }
+
+    def prometheus_lines(self) -> List[str]:
+        """Per provider:model call, token and cost counters"""
+        lines = [
+            "# TYPE llm_calls_total counter",
+            "# TYPE llm_call_errors_total counter",
+            "# TYPE llm_tokens_total counter",
+            "# TYPE llm_cost_usd_total counter",
+        ]
+        for key, aggregate in sorted(self._by_model.items()):
+            provider, _, model = key.partition(":")
+            labels = f'provider="{provider}",model="{model}"'
+            lines += [
+                f"llm_calls_total{{{labels}}} {aggregate.calls}",
+                f"llm_call_errors_total{{{labels}}} {aggregate.errors}",
+                f'llm_tokens_total{{{labels},direction="input"}} {aggregate.input_tokens}',
+                f'llm_tokens_total{{{labels},direction="output"}} {aggregate.output_tokens}',
+                f"llm_cost_usd_total{{{labels}}} {round(aggregate.cost, 6)}",
+            ]
+        return lines
+
+    async def close(self) -> None:
+        await self.flush()
+        if self._db is not None:
+            self._db.close()
+            self._db = None
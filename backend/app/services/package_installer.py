@@ -0,0 +1,270 @@
+"""
+Installs the distributions generated apps import, with a local wheel cache
+"""
+import asyncio
+import importlib
+import importlib.metadata
+import importlib.util
+import json
+import os
+import sys
+import time
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Tuple
+
+# Import names whose distribution is named differently on PyPI
+IMPORT_TO_DISTRIBUTION: Dict[str, str] = {
+    "sklearn": "scikit-learn",
+    "skimage": "scikit-image",
+    "cv2": "opencv-python",
+    "PIL": "Pillow",
+    "yaml": "PyYAML",
+    "bs4": "beautifulsoup4",
+    "dateutil": "python-dateutil",
+    "dotenv": "python-dotenv",
+    "docx": "python-docx",
+    "pptx": "python-pptx",
+    "jwt": "PyJWT",
+    "Crypto": "pycryptodome",
+    "OpenSSL": "pyOpenSSL",
+    "fitz": "PyMuPDF",
+    "serial": "pyserial",
+    "usb": "pyusb",
+    "magic": "python-magic",
+    "attr": "attrs",
+    "Levenshtein": "python-Levenshtein",
+    "MySQLdb": "mysqlclient",
+    "psycopg2": "psycopg2-binary",
+    "sentence_transformers": "sentence-transformers",
+    "google.generativeai": "google-generativeai",
+    "google.genai": "google-genai",
+    "google.protobuf": "protobuf",
+    "streamlit_option_menu": "streamlit-option-menu",
+    "st_aggrid": "streamlit-aggrid",
+    "wordcloud": "wordcloud",
+    "win32api": "pywin32",
+}
+
+# Namespace packages: distributions install into these, so an import is only
+# identified by its name below them (google.cloud.storage, not google)
+NAMESPACE_PACKAGES = frozenset({
+    "google", "google.cloud", "azure", "azure.mgmt", "backports", "jaraco", "zope", "sphinxcontrib",
+})
+
+
+def import_root(module: str) -> str:
+    """Name identifying the distribution behind an import: the top-level module, or deeper below namespace packages"""
+    parts = module.split(".")
+    depth = 1
+    while depth < len(parts) and ".".join(parts[:depth]) in NAMESPACE_PACKAGES:
+        depth += 1
+    return ".".join(parts[:depth])
+
+
+class PackageInstaller:
+    """
+    Resolves import names to distributions and installs the missing ones
+
+    Already importable modules cost no pip call at all. Missing
+    distributions are installed in one pip invocation from the local
+    wheelhouse (offline); anything not cached yet is first built into the
+    wheelhouse, in parallel per distribution if the batch fails.
+    Distributions that failed recently are not retried until failure_ttl
+    passes; failures are remembered in the wheelhouse across restarts.
+    """
+
+    def __init__(
+        self,
+        wheel_dir: Path,
+        pip_timeout: float,
+        failure_ttl: float,
+        overrides: Optional[Dict[str, str]] = None
+    ) -> None:
+        self.wheel_dir = wheel_dir
+        self.pip_timeout = pip_timeout
+        self.failure_ttl = failure_ttl
+        self.mapping = {**IMPORT_TO_DISTRIBUTION, **(overrides or {})}
+        self.failures_file = wheel_dir / "failures.json"
+        self.failures: Dict[str, Dict[str, Any]] = self._load_failures()
+        self._index: Optional[Dict[str, List[str]]] = None
+        # pip must not run concurrently against the same site-packages
+        self._lock = asyncio.Lock()
+
+        # Statistics
+        self._pip_runs = 0
+        self._installed_total = 0
+        self._offline_installs = 0
+
+    def _load_failures(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            return json.loads(self.failures_file.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+
+    def _save_failures(self) -> None:
+        try:
+            self.wheel_dir.mkdir(parents=True, exist_ok=True)
+            self.failures_file.write_text(json.dumps(self.failures, indent=2), encoding="utf-8")
+        except OSError as e:
+            print(f"Warning: Failed to save package install failures: {e}")
+
+    def installed_index(self) -> Dict[str, List[str]]:
+        """Top-level import names of installed distributions (cached until the next install)"""
+        if self._index is None:
+            self._index = importlib.metadata.packages_distributions()
+        return self._index
+
+    def distribution_for(self, module: str) -> str:
+        """
+        Distribution that provides an import name
+
+        The most specific mapped prefix wins. Unmapped names under a namespace
+        package follow the dashed convention (google.cloud.storage ->
+        google-cloud-storage); other unknown names map to themselves.
+        """
+        root = import_root(module)
+        parts = module.split(".")
+        for depth in range(len(parts), 0, -1):
+            prefix = ".".join(parts[:depth])
+            if prefix in self.mapping:
+                return self.mapping[prefix]
+        if "." in root:
+            return root.replace(".", "-")
+        installed = self.installed_index().get(root)
+        return installed[0] if installed else root
+
+    def is_installed(self, module: str) -> bool:
+        """Whether the distribution behind an import is installed (without importing the module itself)"""
+        root = import_root(module)
+        # Any distribution can provide a namespace package; only the full name counts
+        if "." not in root and root in self.installed_index():
+            return True
+        try:
+            return importlib.util.find_spec(root) is not None
+        except (ImportError, ValueError):
+            return False
+
+    def _recently_failed(self, distribution: str) -> bool:
+        failure = self.failures.get(distribution)
+        return bool(failure) and time.time() - failure["at"] < self.failure_ttl
+
+    async def _pip(self, *args: str) -> Tuple[bool, str]:
+        """Run pip with a timeout; returns (success, stderr)"""
+        self._pip_runs += 1
+        process = await asyncio.create_subprocess_exec(
+            sys.executable, "-m", "pip", *args,
+            "--disable-pip-version-check",
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.PIPE
+        )
+        try:
+            _, stderr = await asyncio.wait_for(process.communicate(), timeout=self.pip_timeout)
+        except asyncio.TimeoutError:
+            process.kill()
+            await process.wait()
+            return False, f"pip {args[0]} timed out after {self.pip_timeout:g}s"
+        return process.returncode == 0, stderr.decode(errors="replace").strip()
+
+    async def _install_offline(self, distributions: List[str]) -> Tuple[bool, str]:
+        return await self._pip(
+            "install", "--no-index", "--find-links", str(self.wheel_dir), *distributions
+        )
+
+    async def _build_wheels(self, distributions: List[str]) -> Dict[str, str]:
+        """Fetch/build wheels into the wheelhouse; returns errors per distribution that failed"""
+        ok, error = await self._pip(
+            "wheel", "--wheel-dir", str(self.wheel_dir), "--find-links", str(self.wheel_dir), *distributions
+        )
+        if ok:
+            return {}
+        if len(distributions) == 1:
+            return {distributions[0]: error}
+
+        # Isolate the failing ones; downloads into the wheelhouse can run side by side
+        results = await asyncio.gather(*(
+            self._pip("wheel", "--wheel-dir", str(self.wheel_dir), "--find-links", str(self.wheel_dir), dist)
+            for dist in distributions
+        ))
+        return {dist: error for dist, (ok, error) in zip(distributions, results) if not ok}
+
+    async def ensure(self, modules: List[str]) -> Dict[str, List[str]]:
+        """
+        Make the given import names importable
+
+        Returns the distributions installed and those that failed (including
+        ones skipped because they failed recently).
+        """
+        missing: Dict[str, str] = {}
+        for module in modules:
+            if not self.is_installed(module):
+                missing.setdefault(self.distribution_for(module), module)
+        if not missing:
+            return {"installed": [], "failed": []}
+
+        async with self._lock:
+            # Another run may have installed them while we waited
+            missing = {dist: module for dist, module in missing.items() if not self.is_installed(module)}
+            failed = [dist for dist in missing if self._recently_failed(dist)]
+            pending = [dist for dist in missing if dist not in failed]
+            if not pending:
+                return {"installed": [], "failed": failed}
+
+            print(f"Installing packages: {', '.join(pending)}")
+            self.wheel_dir.mkdir(parents=True, exist_ok=True)
+            ok, _ = await self._install_offline(pending)
+            if ok:
+                self._offline_installs += 1
+            else:
+                errors = await self._build_wheels(pending)
+                for dist, error in errors.items():
+                    print(f"Failed to install {dist}: {error[-500:]}")
+                    self.failures[dist] = {"at": time.time(), "error": error[-2000:]}
+                failed += list(errors)
+                pending = [dist for dist in pending if dist not in errors]
+                if pending:
+                    ok, error = await self._install_offline(pending)
+                    if not ok:
+                        print(f"Failed to install {', '.join(pending)}: {error[-500:]}")
+                        for dist in pending:
+                            self.failures[dist] = {"at": time.time(), "error": error[-2000:]}
+                        failed += pending
+                        pending = []
+                self._save_failures()
+
+            changed = False
+            for dist in pending:
+                if dist in self.failures:
+                    del self.failures[dist]
+                    changed = True
+            if changed:
+                self._save_failures()
+            importlib.invalidate_caches()
+            self._index = None
+            self._installed_total += len(pending)
+            if pending:
+                print(f"Successfully installed {', '.join(pending)}")
+            return {"installed": pending, "failed": failed}
+
+    def forget_failures(self) -> int:
+        """Allow failed distributions to be retried immediately"""
+        count = len(self.failures)
+        self.failures = {}
+        self._save_failures()
+        return count
+
+    def stats(self) -> Dict[str, Any]:
+        try:
+            wheels = sum(1 for name in os.listdir(self.wheel_dir) if name.endswith(".whl"))
+        except OSError:
+            wheels = 0
+        return {
+            "wheel_dir": str(self.wheel_dir),
+            "cached_wheels": wheels,
+            "pip_runs": self._pip_runs,
+            "installed_total": self._installed_total,
+            "offline_installs": self._offline_installs,
+            "failures": {
+                dist: {"age": round(time.time() - failure["at"]), "error": failure["error"][-300:]}
+                for dist, failure in self.failures.items()
+            },
+        }
@@ -0,0 +1,216 @@
+"""
+In-process LRU cache for SELECT query results
+"""
+import hashlib
+import re
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Set, Iterable
+
+# Matches the table referenced after FROM / JOIN / UPDATE / INTO, including
+# bracketed and schema-qualified names like [dbo].[Orders]
+_TABLE_REFERENCE = re.compile(
+    r"\b(?:FROM|JOIN|UPDATE|INTO)\s+((?:\[[^\]]+\]|\"[^\"]+\"|[\w#@$]+)(?:\s*\.\s*(?:\[[^\]]+\]|\"[^\"]+\"|[\w#@$]+))*)",
+    re.IGNORECASE
+)
+_READ_ONLY_STATEMENT = re.compile(r"^\s*(?:SELECT|WITH)\b", re.IGNORECASE)
+_SELECT_INTO = re.compile(r"\bINTO\b", re.IGNORECASE)
+_MAIN_STATEMENT = re.compile(r"\b(?:SELECT|INSERT|UPDATE|DELETE|MERGE)\b", re.IGNORECASE)
+# String literals, quoted/bracketed identifiers and comments, or a run of whitespace
+_SQL_TOKEN = re.compile(
+    r"(?P<quoted>N?'(?:[^']|'')*'|\[(?:[^\]]|\]\])*\]|\"(?:[^\"]|\"\")*\"|--[^\n]*|/\*.*?\*/)|(?P<space>\s+)",
+    re.DOTALL
+)
+
+
+def normalize_query(query: str) -> str:
+    """Collapse whitespace outside literals and drop a trailing semicolon so equivalent text shares a key"""
+    normalized = _SQL_TOKEN.sub(lambda match: match.group("quoted") or " ", query)
+    return normalized.strip().rstrip(";").rstrip()
+
+
+def mask_literals(query: str) -> str:
+    """Blank out literals, quoted identifiers and comments so keywords inside them are ignored"""
+    return _SQL_TOKEN.sub(lambda match: " " if match.group("quoted") is None else "''", query)
+
+
+def top_level(query: str) -> str:
+    """Text outside any parentheses"""
+    parts, depth = [], 0
+    for char in query:
+        if char == "(":
+            depth += 1
+        elif char == ")":
+            depth = max(depth - 1, 0)
+        elif depth == 0:
+            parts.append(char)
+    return "".join(parts)
+
+
+def normalize_table_name(name: str) -> str:
+    """Reduce '[dbo].[Orders]' / 'dbo.orders' / 'Orders' to 'orders'"""
+    last = name.split(".")[-1].strip()
+    return last.strip("[]\"").lower()
+
+
+def extract_tables(query: str) -> Set[str]:
+    """Best-effort list of tables a statement reads or writes"""
+    return {normalize_table_name(match) for match in _TABLE_REFERENCE.findall(query)}
+
+
+def is_cacheable(query: str) -> bool:
+    """
+    Only single SELECT statements (optionally behind CTEs) are cached
+
+    `WITH ... DELETE/UPDATE/INSERT/MERGE`, `SELECT ... INTO` and batches of
+    several statements are writes (or may be) and always run.
+    """
+    masked = mask_literals(query).strip().rstrip(";")
+    if not _READ_ONLY_STATEMENT.match(masked) or _SELECT_INTO.search(masked) or ";" in masked:
+        return False
+    # The main statement of a CTE is the first one outside the CTE bodies
+    main = _MAIN_STATEMENT.search(top_level(masked))
+    return main is not None and main.group(0).upper() == "SELECT"
+
+
+def _estimate_size(rows: List[Dict[str, Any]]) -> int:
+    """Rough memory footprint of a result set in bytes"""
+    size = sys.getsizeof(rows)
+    for row in rows:
+        size += sys.getsizeof(row)
+        for value in row.values():
+            size += sys.getsizeof(value)
+    return size
+
+
+class CacheEntry:
+    __slots__ = ("rows", "size", "expires_at", "tables")
+
+    def __init__(self, rows: List[Dict[str, Any]], size: int, expires_at: float, tables: Set[str]) -> None:
+        self.rows = rows
+        self.size = size
+        self.expires_at = expires_at
+        self.tables = tables
+
+
+class QueryCache:
+    """
+    Memory-bounded LRU of query results with per-entry TTL
+
+    Entries are tagged with the tables their query references so writes or
+    explicit invalidation of a table drop every dependent result.
+    """
+
+    def __init__(self, max_bytes: int, default_ttl: float, max_entry_bytes: Optional[int] = None) -> None:
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.max_entry_bytes = max_entry_bytes or max_bytes
+
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        # Statistics
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+        self._invalidations = 0
+
+    @staticmethod
+    def make_key(query: str, params: Optional[Iterable[Any]] = None) -> str:
+        """Content hash of the normalized query text plus typed parameters"""
+        digest = hashlib.sha256(normalize_query(query).encode("utf-8"))
+        for param in params or ():
+            digest.update(f"\x00{type(param).__name__}:{param!r}".encode("utf-8"))
+        return digest.hexdigest()
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+
+    def get(self, key: str) -> Optional[List[Dict[str, Any]]]:
+        """Return cached rows, or None on a miss or expired entry"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+            if entry.expires_at <= time.monotonic():
+                self._remove(key)
+                self._expirations += 1
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return list(entry.rows)
+
+    def put(
+        self,
+        key: str,
+        rows: List[Dict[str, Any]],
+        tables: Set[str],
+        ttl: Optional[float] = None
+    ) -> bool:
+        """Store rows, evicting least recently used entries to stay under max_bytes"""
+        size = _estimate_size(rows)
+        if size > self.max_entry_bytes:
+            return False
+
+        expires_at = time.monotonic() + (self.default_ttl if ttl is None else ttl)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            while self._entries and self._bytes + size > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self._evictions += 1
+            self._entries[key] = CacheEntry(list(rows), size, expires_at, tables)
+            self._bytes += size
+        return True
+
+    def invalidate(self, key: str) -> bool:
+        """Drop a single entry"""
+        with self._lock:
+            if key not in self._entries:
+                return False
+            self._remove(key)
+            self._invalidations += 1
+            return True
+
+    def invalidate_tables(self, tables: Iterable[str]) -> int:
+        """Drop every entry whose query references one of the tables"""
+        targets = {normalize_table_name(table) for table in tables}
+        with self._lock:
+            keys = [key for key, entry in self._entries.items() if entry.tables & targets]
+            for key in keys:
+                self._remove(key)
+            self._invalidations += len(keys)
+            return len(keys)
+
+    def clear(self) -> int:
+        """Drop all entries"""
+        with self._lock:
+            count = len(self._entries)
+            self._entries.clear()
+            self._bytes = 0
+            self._invalidations += count
+            return count
+
+    def stats(self) -> Dict[str, Any]:
+        """Return cache occupancy and hit/miss counters"""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+                "evictions": self._evictions,
+                "expirations": self._expirations,
+                "invalidations": self._invalidations,
+            }
@@ -0,0 +1,215 @@
+"""
+Per-query timing, row-count and slow-query instrumentation
+"""
+import bisect
+import hashlib
+import re
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import List, Dict, Any, Optional, Deque
+from app.services.query_cache import normalize_query
+
+PHASES = ("connect", "execute", "fetch", "serialize")
+
+# Upper bounds (seconds) of the cumulative latency histogram buckets
+HISTOGRAM_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_STRING_LITERAL = re.compile(r"N?'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_VALUE_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+
+
+def fingerprint_query(query: str) -> str:
+    """Normalize a query so statements differing only in literals share a fingerprint"""
+    text = normalize_query(query)
+    text = _STRING_LITERAL.sub("?", text)
+    text = _NUMBER_LITERAL.sub("?", text)
+    return _VALUE_LIST.sub("(?+)", text)
+
+
+def _percentile(sorted_values: List[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class QueryTimer:
+    """Splits elapsed wall time into named phases"""
+
+    def __init__(self) -> None:
+        self.phases: Dict[str, float] = {}
+        self._mark = time.perf_counter()
+
+    def lap(self, phase: str) -> None:
+        """Charge the time since the previous mark to phase"""
+        now = time.perf_counter()
+        self.phases[phase] = self.phases.get(phase, 0.0) + (now - self._mark)
+        self._mark = now
+
+    def restart(self) -> None:
+        """Move the mark without charging any phase (e.g. after a consumer pause)"""
+        self._mark = time.perf_counter()
+
+
+class QueryStats:
+    """Aggregates for one query fingerprint"""
+
+    def __init__(self, fingerprint: str, window: int) -> None:
+        self.id = hashlib.sha1(fingerprint.encode("utf-8")).hexdigest()[:12]
+        self.fingerprint = fingerprint
+        self.count = 0
+        self.errors = 0
+        self.slow = 0
+        self.rows = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self.phase_totals = {phase: 0.0 for phase in PHASES}
+        self.bucket_counts = [0] * (len(HISTOGRAM_BUCKETS) + 1)
+        self.recent: Deque[float] = deque(maxlen=window)
+        self.last_seen = 0.0
+
+    def add(self, phases: Dict[str, float], total: float, rows: int, error: bool, slow: bool) -> None:
+        self.count += 1
+        self.errors += int(error)
+        self.slow += int(slow)
+        self.rows += rows
+        self.total_time += total
+        self.max_time = max(self.max_time, total)
+        for phase, duration in phases.items():
+            self.phase_totals[phase] = self.phase_totals.get(phase, 0.0) + duration
+        self.bucket_counts[bisect.bisect_left(HISTOGRAM_BUCKETS, total)] += 1
+        self.recent.append(total)
+        self.last_seen = time.time()
+
+    def to_dict(self) -> Dict[str, Any]:
+        recent = sorted(self.recent)
+        return {
+            "id": self.id,
+            "fingerprint": self.fingerprint,
+            "count": self.count,
+            "errors": self.errors,
+            "slow": self.slow,
+            "rows": self.rows,
+            "avg_rows": round(self.rows / self.count, 1) if self.count else 0.0,
+            "total_time": round(self.total_time, 6),
+            "avg_time": round(self.total_time / self.count, 6) if self.count else 0.0,
+            "max_time": round(self.max_time, 6),
+            "p50": round(_percentile(recent, 0.50), 6),
+            "p95": round(_percentile(recent, 0.95), 6),
+            "p99": round(_percentile(recent, 0.99), 6),
+            "phases": {phase: round(duration, 6) for phase, duration in self.phase_totals.items()},
+            "last_seen": self.last_seen,
+        }
+
+
+class QueryMetrics:
+    """
+    Rolling latency histograms per query fingerprint
+
+    Percentiles are computed over the last `window` executions of each
+    fingerprint; histogram buckets and totals are cumulative (Prometheus
+    counters). The least recently seen fingerprints are dropped beyond
+    max_fingerprints.
+    """
+
+    def __init__(self, slow_threshold: float, window: int = 1000, max_fingerprints: int = 500) -> None:
+        self.slow_threshold = slow_threshold
+        self.window = window
+        self.max_fingerprints = max_fingerprints
+        self._stats: "OrderedDict[str, QueryStats]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.started_at = time.time()
+
+    def record(
+        self,
+        query: str,
+        phases: Dict[str, float],
+        rows: int = 0,
+        error: bool = False
+    ) -> None:
+        """Record one execution broken down by phase"""
+        fingerprint = fingerprint_query(query)
+        total = sum(phases.values())
+        slow = bool(self.slow_threshold) and total >= self.slow_threshold
+
+        with self._lock:
+            stats = self._stats.get(fingerprint)
+            if stats is None:
+                stats = QueryStats(fingerprint, self.window)
+                self._stats[fingerprint] = stats
+                while len(self._stats) > self.max_fingerprints:
+                    self._stats.popitem(last=False)
+            else:
+                self._stats.move_to_end(fingerprint)
+            stats.add(phases, total, rows, error, slow)
+
+        if slow:
+            breakdown = ", ".join(f"{phase}={duration:.3f}s" for phase, duration in phases.items())
+            print(f"Slow query ({total:.3f}s, {rows} rows; {breakdown}): {fingerprint[:500]}")
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats.clear()
+            self.started_at = time.time()
+
+    def stats(self, limit: Optional[int] = None, sort: str = "total_time") -> Dict[str, Any]:
+        """Per-fingerprint aggregates, sorted by the given field (descending)"""
+        with self._lock:
+            queries = [stats.to_dict() for stats in self._stats.values()]
+
+        if sort not in ("total_time", "count", "avg_time", "max_time", "p99", "rows", "errors", "last_seen"):
+            raise ValueError(f"Unsupported sort field: {sort}")
+        queries.sort(key=lambda item: item[sort], reverse=True)
+        if limit:
+            queries = queries[:limit]
+
+        return {
+            "since": self.started_at,
+            "slow_query_threshold": self.slow_threshold,
+            "fingerprints": len(self._stats),
+            "queries": queries,
+        }
+
+    def prometheus_lines(self, prefix: str = "mssql") -> List[str]:
+        """Render histograms and counters in the Prometheus text format"""
+        with self._lock:
+            snapshot = [
+                (stats.id, list(stats.bucket_counts), stats.total_time, stats.count,
+                 stats.rows, stats.errors, stats.slow, dict(stats.phase_totals))
+                for stats in self._stats.values()
+            ]
+
+        lines = [
+            f"# HELP {prefix}_query_duration_seconds Query latency by fingerprint",
+            f"# TYPE {prefix}_query_duration_seconds histogram",
+        ]
+        for query_id, buckets, total_time, count, _, _, _, _ in snapshot:
+            cumulative = 0
+            for bound, bucket_count in zip(HISTOGRAM_BUCKETS, buckets):
+                cumulative += bucket_count
+                lines.append(f'{prefix}_query_duration_seconds_bucket{{query="{query_id}",le="{bound}"}} {cumulative}')
+            lines.append(f'{prefix}_query_duration_seconds_bucket{{query="{query_id}",le="+Inf"}} {count}')
+            lines.append(f'{prefix}_query_duration_seconds_sum{{query="{query_id}"}} {total_time}')
+            lines.append(f'{prefix}_query_duration_seconds_count{{query="{query_id}"}} {count}')
+
+        lines += [
+            f"# HELP {prefix}_query_phase_seconds_total Time spent per query phase",
+            f"# TYPE {prefix}_query_phase_seconds_total counter",
+        ]
+        for query_id, _, _, _, _, _, _, phases in snapshot:
+            for phase, duration in phases.items():
+                lines.append(f'{prefix}_query_phase_seconds_total{{query="{query_id}",phase="{phase}"}} {duration}')
+
+        for name, index, help_text in (
+            ("rows_total", 4, "Rows returned"),
+            ("errors_total", 5, "Failed executions"),
+            ("slow_total", 6, "Executions over the slow query threshold"),
+        ):
+            lines.append(f"# HELP {prefix}_query_{name} {help_text}")
+            lines.append(f"# TYPE {prefix}_query_{name} counter")
+            for entry in snapshot:
+                lines.append(f'{prefix}_query_{name}{{query="{entry[0]}"}} {entry[index]}')
+
+        return lines
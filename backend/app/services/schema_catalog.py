@@ -0,0 +1,124 @@
+"""
+In-memory catalog of database tables and columns
+"""
+import threading
+import time
+from typing import List, Dict, Any, Optional, Tuple
+
+
+class CatalogTable:
+    __slots__ = ("schema", "name", "columns")
+
+    def __init__(self, schema: str, name: str) -> None:
+        self.schema = schema
+        self.name = name
+        self.columns: List[Dict[str, Any]] = []
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"schema": self.schema, "name": self.name, "columns": list(self.columns)}
+
+
+def split_table_name(table_name: str) -> Tuple[Optional[str], str]:
+    """Split 'dbo.Orders' / '[dbo].[Orders]' / 'Orders' into (schema, table)"""
+    parts = [part.strip().strip("[]\"") for part in table_name.split(".")]
+    if len(parts) == 1:
+        return None, parts[0]
+    return parts[-2], parts[-1]
+
+
+class SchemaCatalog:
+    """
+    Snapshot of INFORMATION_SCHEMA tables and columns
+
+    The snapshot is replaced atomically on each load, so readers never see a
+    partially refreshed catalog. Lookups are case-insensitive, matching the
+    default SQL Server collation.
+    """
+
+    def __init__(self) -> None:
+        self._tables: List[CatalogTable] = []
+        self._by_name: Dict[str, List[CatalogTable]] = {}
+        self._lock = threading.Lock()
+        self.loaded_at: Optional[float] = None
+        self.load_duration: Optional[float] = None
+        self.stale = True
+
+    @property
+    def loaded(self) -> bool:
+        return self.loaded_at is not None
+
+    @property
+    def fresh(self) -> bool:
+        return self.loaded and not self.stale
+
+    def load(self, rows: List[Dict[str, Any]], duration: Optional[float] = None) -> None:
+        """
+        Replace the catalog from bulk query rows
+
+        Rows carry TABLE_SCHEMA, TABLE_NAME and (for tables with columns)
+        COLUMN_NAME, DATA_TYPE, IS_NULLABLE, CHARACTER_MAXIMUM_LENGTH,
+        ordered by table and ordinal position.
+        """
+        tables: List[CatalogTable] = []
+        by_key: Dict[Tuple[str, str], CatalogTable] = {}
+
+        for row in rows:
+            key = (row["TABLE_SCHEMA"], row["TABLE_NAME"])
+            table = by_key.get(key)
+            if table is None:
+                table = CatalogTable(row["TABLE_SCHEMA"], row["TABLE_NAME"])
+                by_key[key] = table
+                tables.append(table)
+            if row.get("COLUMN_NAME") is not None:
+                table.columns.append({
+                    "COLUMN_NAME": row["COLUMN_NAME"],
+                    "DATA_TYPE": row["DATA_TYPE"],
+                    "IS_NULLABLE": row["IS_NULLABLE"],
+                    "CHARACTER_MAXIMUM_LENGTH": row["CHARACTER_MAXIMUM_LENGTH"],
+                })
+
+        tables.sort(key=lambda t: (t.name.lower(), t.schema.lower()))
+        by_name: Dict[str, List[CatalogTable]] = {}
+        for table in tables:
+            by_name.setdefault(table.name.lower(), []).append(table)
+
+        with self._lock:
+            self._tables = tables
+            self._by_name = by_name
+            self.loaded_at = time.time()
+            self.load_duration = duration
+            self.stale = False
+
+    def invalidate(self) -> None:
+        """Mark the catalog stale so the next lookup reloads it"""
+        self.stale = True
+
+    def table_names(self) -> List[str]:
+        with self._lock:
+            return [table.name for table in self._tables]
+
+    def find_table(self, table_name: str) -> Optional[CatalogTable]:
+        """Look up a table by plain or schema-qualified name"""
+        schema, name = split_table_name(table_name)
+        with self._lock:
+            candidates = self._by_name.get(name.lower(), [])
+        if schema is not None:
+            candidates = [table for table in candidates if table.schema.lower() == schema.lower()]
+        return candidates[0] if candidates else None
+
+    def get_columns(self, table_name: str) -> Optional[List[Dict[str, Any]]]:
+        """Columns of a table, or None if it is not in the catalog"""
+        table = self.find_table(table_name)
+        return list(table.columns) if table else None
+
+    def snapshot(self) -> Dict[str, Any]:
+        """The whole catalog as plain data"""
+        with self._lock:
+            tables = list(self._tables)
+        return {
+            "tables": [table.to_dict() for table in tables],
+            "table_count": len(tables),
+            "loaded_at": self.loaded_at,
+            "load_duration": self.load_duration,
+            "stale": self.stale,
+        }
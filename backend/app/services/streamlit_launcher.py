@@ -0,0 +1,46 @@
+"""
+Entry point of a pooled Streamlit worker process
+
+Run as a script (not imported by the backend): imports the heavy modules
+generated apps typically use, then starts Streamlit's server in this
+interpreter, so the first script run finds them already in sys.modules.
+
+    python streamlit_launcher.py APP_FILE --port PORT [--preload pandas,numpy]
+"""
+import argparse
+import importlib
+import sys
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("app_file")
+    parser.add_argument("--port", type=int, required=True)
+    parser.add_argument("--preload", default="")
+    args = parser.parse_args()
+
+    try:
+        from streamlit.web import bootstrap
+    except ImportError:
+        print("Streamlit is not installed. Please run: pip install streamlit", flush=True)
+        sys.exit(1)
+
+    for module in filter(None, args.preload.split(",")):
+        try:
+            importlib.import_module(module.strip())
+        except Exception as e:
+            print(f"Warning: Failed to preload {module}: {e}", flush=True)
+
+    flag_options = {
+        "server_port": args.port,
+        "server_headless": True,
+        # New code is handed over by rewriting the script; rerun open sessions
+        "server_runOnSave": True,
+    }
+    if hasattr(bootstrap, "load_config_options"):
+        bootstrap.load_config_options(flag_options=flag_options)
+    bootstrap.run(args.app_file, False, [], flag_options)
+
+
+if __name__ == "__main__":
+    main()
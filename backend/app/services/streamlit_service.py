@@ -1,118 +1,246 @@
-import subprocess
-import os
-import signal
+import ast
+import asyncio
+import hashlib
 import time
+import uuid
 import re
 import sys
+from collections import OrderedDict
 from pathlib import Path
-from typing import Optional, List
+from typing import Optional, List, Dict, Set
+from app.config import settings
+from app.services.package_installer import NAMESPACE_PACKAGES, PackageInstaller, import_root
+from app.services.streamlit_workers import StreamlitWorker, StreamlitWorkerPool
+
+
+DEFAULT_SESSION = "default"
+
+# Modules that never need installing
+STDLIB_MODULES = frozenset(sys.stdlib_module_names) | frozenset(sys.builtin_module_names)
+
+
+class StreamlitCapacityError(Exception):
+    """Raised when running another app would exceed STREAMLIT_MAX_SESSIONS"""
+
+
+class StreamlitAppSession:
+    """One user's app: its worker process (own directory and port) and activity"""
+
+    def __init__(self, session_id: Optional[str] = None) -> None:
+        self.id = session_id or uuid.uuid4().hex
+        self.worker: Optional[StreamlitWorker] = None
+        self.created_at = time.time()
+        self.last_active = time.monotonic()
+        # One run/stop at a time per session
+        self.lock = asyncio.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self.worker is not None and self.worker.alive
+
+    def touch(self) -> None:
+        self.last_active = time.monotonic()
+
+    def to_dict(self) -> dict:
+        data = {
+            "session_id": self.id,
+            "running": self.running,
+            "created_at": self.created_at,
+            "idle_seconds": round(time.monotonic() - self.last_active, 1),
+        }
+        if self.running:
+            data.update(
+                url=self.worker.url,
+                pid=self.worker.process.pid,
+                directory=str(self.worker.directory)
+            )
+        return data
 
 
 class StreamlitService:
     def __init__(self) -> None:
-        self.process: Optional[subprocess.Popen] = None
-        self.app_file: Path = Path("app.py")
-        self.port: int = 8501
+        self.sessions: Dict[str, StreamlitAppSession] = {}
+        self.pool = StreamlitWorkerPool(
+            size=settings.STREAMLIT_POOL_SIZE,
+            root=Path(settings.STREAMLIT_WORK_DIR).resolve(),
+            base_port=settings.STREAMLIT_PORT,
+            preload=settings.STREAMLIT_PRELOAD_MODULES,
+            startup_timeout=settings.STREAMLIT_STARTUP_TIMEOUT,
+            stop_timeout=settings.STREAMLIT_STOP_TIMEOUT
+        )
+        self.installer = PackageInstaller(
+            wheel_dir=Path(settings.STREAMLIT_WHEEL_DIR).resolve(),
+            pip_timeout=settings.STREAMLIT_PIP_TIMEOUT,
+            failure_ttl=settings.STREAMLIT_INSTALL_FAILURE_TTL,
+            overrides=settings.STREAMLIT_IMPORT_DISTRIBUTIONS
+        )
+        # Workers being started for sessions, counted against the cap
+        self._reserved = 0
+        self._retiring: Set[asyncio.Task] = set()
+
+        # Code hash -> third-party imports still to check ([] once satisfied)
+        self._import_cache: "OrderedDict[str, List[str]]" = OrderedDict()
+
+        # Statistics
+        self._reaped_total = 0
+        self._import_cache_hits = 0
+        self._install_skips = 0
 
     def extract_imports(self, code: str) -> List[str]:
-        """Extract import statements from code to identify required packages"""
-        imports = set()
+        """
+        Top-level modules the code imports, excluding the standard library
 
-        # Find all import statements
-        import_pattern = r'^import\s+(\w+)|^from\s+(\w+)'
-        for line in code.split('\n'):
-            line = line.strip()
-            if match := re.match(import_pattern, line):
-                package = match.group(1) or match.group(2)
-                # Skip standard library and streamlit (already installed)
-                if package not in ['streamlit', 'st', 'os', 'sys', 'time', 'datetime',
-                                  'json', 're', 'math', 'random', 'collections']:
-                    imports.add(package)
-
-        return list(imports)
-
-    def install_package(self, package: str) -> bool:
-        """Install a Python package using pip"""
+        Walks the whole syntax tree, so imports inside functions, try blocks
+        and conditionals count, as do `import a, b` and literal
+        importlib.import_module()/__import__() calls. Relative imports are
+        local and skipped. Imports below namespace packages keep their full
+        name (google.generativeai, not google). Code that does not parse
+        falls back to scanning import lines.
+        """
+        imports = set()
         try:
-            print(f"Installing package: {package}")
-            result = subprocess.run(
-                [sys.executable, '-m', 'pip', 'install', package],
-                capture_output=True,
-                text=True,
-                timeout=60
-            )
-            if result.returncode == 0:
-                print(f"Successfully installed {package}")
-                return True
-            else:
-                print(f"Failed to install {package}: {result.stderr}")
-                return False
-        except Exception as e:
-            print(f"Error installing {package}: {str(e)}")
-            return False
+            tree = ast.parse(code)
+        except (SyntaxError, ValueError):
+            import_pattern = r'^\s*(?:import|from)\s+([\w.]+)'
+            imports.update(match.group(1) for match in re.finditer(import_pattern, code, re.MULTILINE))
+        else:
+            for node in ast.walk(tree):
+                if isinstance(node, ast.Import):
+                    imports.update(alias.name for alias in node.names)
+                elif isinstance(node, ast.ImportFrom):
+                    if node.module and not node.level:
+                        if node.module in NAMESPACE_PACKAGES:
+                            # `from google import genai` imports google.genai
+                            imports.update(f"{node.module}.{alias.name}" for alias in node.names)
+                        else:
+                            imports.add(node.module)
+                elif isinstance(node, ast.Call) and node.args:
+                    func = node.func
+                    name = func.attr if isinstance(func, ast.Attribute) else getattr(func, "id", None)
+                    arg = node.args[0]
+                    if name in ("import_module", "__import__") and isinstance(arg, ast.Constant) and isinstance(arg.value, str):
+                        imports.add(arg.value)
+
+        return sorted(
+            root for root in {import_root(name) for name in imports}
+            if root.split(".")[0] not in STDLIB_MODULES
+        )
 
-    def install_required_packages(self, code: str) -> dict:
-        """Auto-install packages required by the code"""
-        packages = self.extract_imports(code)
-        if not packages:
+    async def install_required_packages(self, code: str) -> dict:
+        """
+        Auto-install the distributions behind the code's imports that are missing
+
+        Import analysis is cached by code hash, and code whose imports were
+        all satisfied before (or are stdlib-only) skips the install step.
+        """
+        digest = hashlib.sha256(code.encode("utf-8")).hexdigest()
+        imports = self._import_cache.get(digest)
+        if imports is not None:
+            self._import_cache.move_to_end(digest)
+            self._import_cache_hits += 1
+        else:
+            imports = self.extract_imports(code)
+        if not imports:
+            self._install_skips += 1
+            self._remember_imports(digest, [])
             return {"installed": [], "failed": []}
 
-        installed = []
-        failed = []
+        result = await self.installer.ensure(imports)
+        # Nothing left to install for this exact code unless something failed
+        self._remember_imports(digest, imports if result["failed"] else [])
+        return result
 
-        for package in packages:
-            if self.install_package(package):
-                installed.append(package)
-            else:
-                failed.append(package)
+    def _remember_imports(self, digest: str, imports: List[str]) -> None:
+        self._import_cache[digest] = imports
+        self._import_cache.move_to_end(digest)
+        while len(self._import_cache) > settings.STREAMLIT_IMPORT_CACHE_SIZE:
+            self._import_cache.popitem(last=False)
 
-        return {"installed": installed, "failed": failed}
+    def package_stats(self) -> dict:
+        """Get package installer statistics and import analysis cache counts"""
+        return {
+            **self.installer.stats(),
+            "import_cache_entries": len(self._import_cache),
+            "import_cache_hits": self._import_cache_hits,
+            "install_skips": self._install_skips,
+        }
 
-    def save_code(self, code: str) -> Path:
-        """Save Streamlit code to a file"""
-        with open(self.app_file, 'w', encoding='utf-8') as f:
-            f.write(code)
-        return self.app_file
+    # Sessions
 
-    def run(self, code: str) -> dict:
-        """Run Streamlit app with auto package installation"""
-        # Stop existing process if running
-        self.stop()
+    def create_session(self) -> StreamlitAppSession:
+        """Register a new session; its app starts on the first run"""
+        session = StreamlitAppSession()
+        self.sessions[session.id] = session
+        return session
 
-        # Auto-install required packages
-        print("Checking for required packages...")
-        package_result = self.install_required_packages(code)
+    def get_session(self, session_id: str) -> Optional[StreamlitAppSession]:
+        """Look up a session; the default session used by the single-app endpoints always exists"""
+        session = self.sessions.get(session_id)
+        if session is None and session_id == DEFAULT_SESSION:
+            session = self.sessions[DEFAULT_SESSION] = StreamlitAppSession(DEFAULT_SESSION)
+        if session is not None:
+            session.touch()
+        return session
 
-        if package_result["installed"]:
-            print(f"Auto-installed packages: {', '.join(package_result['installed'])}")
+    def _require_session(self, session_id: str) -> StreamlitAppSession:
+        session = self.get_session(session_id)
+        if session is None:
+            raise KeyError(session_id)
+        return session
 
-        if package_result["failed"]:
-            print(f"Warning: Failed to install packages: {', '.join(package_result['failed'])}")
+    def list_sessions(self) -> List[dict]:
+        return [session.to_dict() for session in self.sessions.values()]
 
-        # Save code to file
-        self.save_code(code)
+    def save_code(self, code: str, session_id: str = DEFAULT_SESSION) -> Path:
+        """Save Streamlit code to a running app's file"""
+        session = self._require_session(session_id)
+        if not session.running:
+            raise ValueError("Streamlit is not running")
+        return session.worker.save_code(code)
 
-        # Start Streamlit process
-        try:
-            self.process = subprocess.Popen(
-                ['streamlit', 'run', str(self.app_file), '--server.port', str(self.port)],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                creationflags=subprocess.CREATE_NEW_PROCESS_GROUP if os.name == 'nt' else 0
-            )
+    def start_pool(self) -> None:
+        """Begin pre-starting idle workers"""
+        self.pool.fill()
+
+    async def run(self, code: str, session_id: str = DEFAULT_SESSION, restart: bool = False) -> dict:
+        """
+        Run Streamlit app with auto package installation
 
-            # Wait a bit for Streamlit to start
-            time.sleep(3)
+        A session whose app is running gets the new code written over its
+        script (Streamlit reruns it in place) unless restart is set. Otherwise
+        the code is handed to a pre-started worker when one is idle, or a
+        worker is cold-started and the run returns once it answers its
+        health check. A replaced worker is stopped in the background.
+        """
+        session = self._require_session(session_id)
+        async with session.lock:
+            # Auto-install required packages
+            print("Checking for required packages...")
+            package_result = await self.install_required_packages(code)
 
-            # Check if process is still running
-            if self.process.poll() is not None:
-                stderr = self.process.stderr.read().decode() if self.process.stderr else "Unknown error"
-                raise Exception(f"Streamlit failed to start: {stderr}")
+            if package_result["installed"]:
+                print(f"Auto-installed packages: {', '.join(package_result['installed'])}")
+
+            if package_result["failed"]:
+                print(f"Warning: Failed to install packages: {', '.join(package_result['failed'])}")
+
+            started = time.monotonic()
+            if session.running and not restart:
+                session.worker.save_code(code)
+                worker = session.worker
+                reused = True
+            else:
+                worker = await self._start_worker(session, code)
+                reused = False
 
+            session.touch()
             response = {
                 "status": "running",
-                "url": f"http://localhost:{self.port}",
-                "pid": self.process.pid
+                "session_id": session.id,
+                "url": worker.url,
+                "pid": worker.process.pid,
+                "warm": reused or worker.warm,
+                "startup_time": round(time.monotonic() - started, 3)
             }
 
             # Include package installation info
@@ -121,44 +249,110 @@ class StreamlitService:
 
             return response
 
-        except FileNotFoundError:
-            raise Exception("Streamlit is not installed. Please run: pip install streamlit")
+    async def _start_worker(self, session: StreamlitAppSession, code: str) -> StreamlitWorker:
+        running = sum(other.running for other in self.sessions.values() if other is not session)
+        if running + self._reserved >= settings.STREAMLIT_MAX_SESSIONS:
+            raise StreamlitCapacityError(
+                f"{settings.STREAMLIT_MAX_SESSIONS} Streamlit apps are already running; stop one first"
+            )
+
+        self._reserved += 1
+        try:
+            worker = await self.pool.acquire(code)
         except Exception as e:
             raise Exception(f"Failed to start Streamlit: {str(e)}")
+        finally:
+            self._reserved -= 1
 
-    def stop(self) -> dict:
-        """Stop Streamlit app"""
-        if self.process and self.process.poll() is None:
-            try:
-                if os.name == 'nt':  # Windows
-                    self.process.send_signal(signal.CTRL_BREAK_EVENT)
-                    time.sleep(1)
-                    if self.process.poll() is None:
-                        self.process.terminate()
-                        time.sleep(1)
-                        if self.process.poll() is None:
-                            self.process.kill()
-                else:  # Unix
-                    self.process.terminate()
-                    time.sleep(1)
-                    if self.process.poll() is None:
-                        self.process.kill()
-
-                self.process = None
-                return {"status": "stopped"}
-            except Exception as e:
-                return {"status": "error", "message": str(e)}
-        return {"status": "not_running"}
+        previous, session.worker = session.worker, worker
+        if previous:
+            self._retire(previous)
+        return worker
 
-    def status(self) -> dict:
+    def _retire(self, worker: StreamlitWorker) -> None:
+        task = asyncio.create_task(self.pool.release(worker))
+        self._retiring.add(task)
+        task.add_done_callback(self._retiring.discard)
+
+    async def stop(self, session_id: str = DEFAULT_SESSION) -> dict:
+        """Stop a session's app; the session itself remains"""
+        session = self._require_session(session_id)
+        async with session.lock:
+            if session.running:
+                try:
+                    await self.pool.release(session.worker)
+                    session.worker = None
+                    return {"status": "stopped"}
+                except Exception as e:
+                    return {"status": "error", "message": str(e)}
+            return {"status": "not_running"}
+
+    async def delete_session(self, session_id: str) -> bool:
+        """Stop a session's app and forget the session"""
+        session = self.sessions.get(session_id)
+        if session is None:
+            return False
+        await self.stop(session_id)
+        self.sessions.pop(session_id, None)
+        return True
+
+    def status(self, session_id: str = DEFAULT_SESSION) -> dict:
         """Get Streamlit app status"""
-        if self.process and self.process.poll() is None:
+        session = self._require_session(session_id)
+        if session.running:
             return {
                 "running": True,
-                "url": f"http://localhost:{self.port}",
-                "pid": self.process.pid
+                "session_id": session.id,
+                "url": session.worker.url,
+                "pid": session.worker.process.pid
             }
-        return {"running": False}
+        return {"running": False, "session_id": session.id}
+
+    async def reap_idle(self) -> int:
+        """
+        Delete sessions with no API activity for STREAMLIT_IDLE_TIMEOUT seconds
+
+        The default session is exempt: the single-app endpoints serve the
+        frontend's preview, which is viewed without any API calls.
+        """
+        cutoff = time.monotonic() - settings.STREAMLIT_IDLE_TIMEOUT
+        idle = [
+            session.id for session in self.sessions.values()
+            if session.id != DEFAULT_SESSION and session.last_active < cutoff and not session.lock.locked()
+        ]
+        for session_id in idle:
+            print(f"Stopping idle Streamlit session {session_id}")
+            await self.delete_session(session_id)
+        self._reaped_total += len(idle)
+        return len(idle)
+
+    async def reap_periodically(self) -> None:
+        """Reap idle sessions every minute until cancelled"""
+        if settings.STREAMLIT_IDLE_TIMEOUT <= 0:
+            return
+        while True:
+            await asyncio.sleep(min(60.0, settings.STREAMLIT_IDLE_TIMEOUT))
+            try:
+                await self.reap_idle()
+            except Exception as e:
+                print(f"Warning: Failed to reap idle Streamlit sessions: {e}")
+
+    def pool_stats(self) -> dict:
+        """Get warm worker pool and session statistics"""
+        return {
+            **self.pool.stats(),
+            "sessions": len(self.sessions),
+            "running": sum(session.running for session in self.sessions.values()),
+            "max_sessions": settings.STREAMLIT_MAX_SESSIONS,
+            "reaped_total": self._reaped_total,
+        }
+
+    async def close(self) -> None:
+        """Stop every session's app and every pooled worker"""
+        for session_id in list(self.sessions):
+            await self.delete_session(session_id)
+        await asyncio.gather(*self._retiring, return_exceptions=True)
+        await self.pool.close()
 
 
 streamlit_service = StreamlitService()
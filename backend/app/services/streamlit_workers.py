@@ -0,0 +1,266 @@
+"""
+Streamlit worker processes and a pool of pre-started, idle ones
+"""
+import asyncio
+import os
+import shutil
+import signal
+import socket
+import subprocess
+import sys
+import time
+import uuid
+from pathlib import Path
+from typing import List, Dict, Any, Optional, Set
+import httpx
+
+LAUNCHER = Path(__file__).with_name("streamlit_launcher.py")
+PLACEHOLDER_APP = "import streamlit as st\n"
+
+
+def allocate_port(start: int, in_use: Set[int], attempts: int = 1000) -> int:
+    """First port from `start` that is neither reserved by us nor bound by anyone else"""
+    for port in range(start, start + attempts):
+        if port in in_use:
+            continue
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+            try:
+                sock.bind(("", port))
+            except OSError:
+                continue
+        return port
+    raise RuntimeError(f"No free port in {start}-{start + attempts - 1}")
+
+
+class StreamlitWorker:
+    """One Streamlit server process serving the app file in its own directory"""
+
+    def __init__(self, directory: Path, port: int, preload: List[str]) -> None:
+        self.id = uuid.uuid4().hex[:12]
+        self.directory = directory
+        self.port = port
+        self.preload = preload
+        self.app_file = directory / "app.py"
+        self.log_file = directory / "streamlit.log"
+        self.process: Optional[asyncio.subprocess.Process] = None
+        self.started_at: Optional[float] = None
+        self.ready_at: Optional[float] = None
+        # Handed out already serving (pre-started) rather than cold-started
+        self.warm = False
+
+    @property
+    def url(self) -> str:
+        return f"http://localhost:{self.port}"
+
+    @property
+    def alive(self) -> bool:
+        return self.process is not None and self.process.returncode is None
+
+    def save_code(self, code: str) -> Path:
+        with open(self.app_file, 'w', encoding='utf-8') as f:
+            f.write(code)
+        return self.app_file
+
+    def log_tail(self, limit: int = 4000) -> str:
+        try:
+            return self.log_file.read_text(encoding='utf-8', errors='replace')[-limit:].strip()
+        except OSError:
+            return ""
+
+    async def start(self, code: str = PLACEHOLDER_APP) -> None:
+        """Launch the process; its output goes to a log file (unread pipes would stall it)"""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.save_code(code)
+        self.started_at = time.monotonic()
+        with open(self.log_file, 'wb') as log:
+            self.process = await asyncio.create_subprocess_exec(
+                sys.executable, str(LAUNCHER), str(self.app_file),
+                '--port', str(self.port),
+                '--preload', ",".join(self.preload),
+                cwd=str(self.directory),
+                stdout=log,
+                stderr=subprocess.STDOUT,
+                creationflags=subprocess.CREATE_NEW_PROCESS_GROUP if os.name == 'nt' else 0
+            )
+
+    async def wait_until_ready(self, timeout: float) -> None:
+        """Poll the health endpoint until it reports ready, the process exits or the timeout passes"""
+        url = f"http://127.0.0.1:{self.port}/_stcore/health"
+        deadline = time.monotonic() + timeout
+        async with httpx.AsyncClient(timeout=1.0, trust_env=False) as client:
+            while True:
+                if not self.alive:
+                    code = self.process.returncode if self.process else None
+                    raise Exception(self.log_tail() or f"process exited with code {code}")
+                try:
+                    response = await client.get(url)
+                    # 503 until the runtime can accept browser sessions
+                    if response.status_code == 200:
+                        self.ready_at = time.monotonic()
+                        return
+                except httpx.TransportError:
+                    pass
+                if time.monotonic() >= deadline:
+                    raise Exception(f"not ready after {timeout:g}s")
+                await asyncio.sleep(0.1)
+
+    async def stop(self, timeout: float) -> None:
+        """Terminate the process (killing it after `timeout`) and remove its directory"""
+        if self.alive:
+            try:
+                if os.name == 'nt':  # Windows
+                    self.process.send_signal(signal.CTRL_BREAK_EVENT)
+                else:  # Unix
+                    self.process.terminate()
+                try:
+                    await asyncio.wait_for(self.process.wait(), timeout=timeout)
+                except asyncio.TimeoutError:
+                    self.process.kill()
+                    await self.process.wait()
+            except ProcessLookupError:
+                pass
+        await asyncio.to_thread(shutil.rmtree, self.directory, True)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "worker_id": self.id,
+            "port": self.port,
+            "pid": self.process.pid if self.process else None,
+            "alive": self.alive,
+            "startup_time": round(self.ready_at - self.started_at, 3) if self.ready_at and self.started_at else None,
+        }
+
+
+class StreamlitWorkerPool:
+    """
+    Keeps `size` Streamlit workers started and idle
+
+    Each worker has already paid for interpreter startup, `import streamlit`
+    and the preload modules, so acquire() hands out a server that is
+    serving before the caller writes its code. The pool refills in the
+    background; when it is empty, acquire() cold-starts a worker instead.
+    """
+
+    def __init__(
+        self,
+        size: int,
+        root: Path,
+        base_port: int,
+        preload: List[str],
+        startup_timeout: float,
+        stop_timeout: float
+    ) -> None:
+        self.size = size
+        self.root = root
+        self.base_port = base_port
+        self.preload = preload
+        self.startup_timeout = startup_timeout
+        self.stop_timeout = stop_timeout
+
+        self.idle: List[StreamlitWorker] = []
+        self.ports: Set[int] = set()
+        self._starting = 0
+        self._fill_task: Optional[asyncio.Task] = None
+        self._closed = False
+
+        # Statistics
+        self._warm_hits = 0
+        self._cold_starts = 0
+        self._start_failures = 0
+        self._last_error: Optional[str] = None
+
+    def _new_worker(self) -> StreamlitWorker:
+        port = allocate_port(self.base_port, self.ports)
+        self.ports.add(port)
+        return StreamlitWorker(self.root / f"worker-{uuid.uuid4().hex[:12]}", port, self.preload)
+
+    async def spawn(self, code: str = PLACEHOLDER_APP) -> StreamlitWorker:
+        """Start a worker and wait until it serves"""
+        worker = self._new_worker()
+        try:
+            await worker.start(code)
+            await worker.wait_until_ready(self.startup_timeout)
+        except BaseException:
+            await self.release(worker)
+            raise
+        return worker
+
+    async def release(self, worker: StreamlitWorker) -> None:
+        """Stop a worker handed out by acquire() or spawn()"""
+        try:
+            await worker.stop(self.stop_timeout)
+        finally:
+            self.ports.discard(worker.port)
+
+    def fill(self) -> None:
+        """Top the pool up to its size in the background"""
+        if self.size <= 0 or self._closed:
+            return
+        if self._fill_task is None or self._fill_task.done():
+            self._fill_task = asyncio.create_task(self._fill())
+
+    async def _fill(self) -> None:
+        while not self._closed and len(self.idle) + self._starting < self.size:
+            self._starting += 1
+            try:
+                worker = await self.spawn()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Stop refilling until the next acquire() rather than crash-looping
+                self._start_failures += 1
+                self._last_error = str(e)
+                print(f"Warning: Failed to start a warm Streamlit worker: {e}")
+                return
+            finally:
+                self._starting -= 1
+            if self._closed:
+                await self.release(worker)
+                return
+            self.idle.append(worker)
+
+    async def acquire(self, code: str) -> StreamlitWorker:
+        """
+        A serving worker running `code`
+
+        A warm worker gets the code written over its placeholder script and is
+        replaced in the background; with none idle, a worker is cold-started.
+        """
+        while self.idle:
+            worker = self.idle.pop(0)
+            if worker.alive:
+                worker.save_code(code)
+                worker.warm = True
+                self._warm_hits += 1
+                self.fill()
+                return worker
+            await self.release(worker)
+
+        self._cold_starts += 1
+        self.fill()
+        return await self.spawn(code)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "size": self.size,
+            "idle": len(self.idle),
+            "starting": self._starting,
+            "warm_hits": self._warm_hits,
+            "cold_starts": self._cold_starts,
+            "start_failures": self._start_failures,
+            "last_error": self._last_error,
+            "preload": self.preload,
+        }
+
+    async def close(self) -> None:
+        """Stop the refill task and every idle worker"""
+        self._closed = True
+        if self._fill_task is not None:
+            self._fill_task.cancel()
+            # A worker being spawned is released by the cancelled task; let it finish
+            try:
+                await self._fill_task
+            except asyncio.CancelledError:
+                pass
+        workers, self.idle = self.idle, []
+        await asyncio.gather(*(self.release(worker) for worker in workers), return_exceptions=True)